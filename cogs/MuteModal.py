@@ -1,9 +1,12 @@
 import discord
 from discord.ui import Modal, TextInput
+import asyncio
 import datetime
-import json
 import os
 
+from core import codec
+from core.io_assincrono import em_thread
+
 PUNICOES_ARQUIVO = "punicoes.json"
 
 
@@ -12,16 +15,27 @@ def load_punicoes():
     if not os.path.exists(PUNICOES_ARQUIVO):
         return []
     try:
-        with open(PUNICOES_ARQUIVO, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(PUNICOES_ARQUIVO, "rb") as f:
+            return codec.loads(f.read())
     except:
         return []
 
 
 def save_punicoes(data):
     """Salva punições no JSON."""
-    with open(PUNICOES_ARQUIVO, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    with open(PUNICOES_ARQUIVO, "wb") as f:
+        f.write(codec.dumps(data))
+
+
+_punicoes_lock = asyncio.Lock()
+
+
+async def registrar_punicao(registro: dict) -> None:
+    """Acrescenta uma punição ao arquivo, lendo e gravando no pool de I/O"""
+    async with _punicoes_lock:
+        puni = await em_thread(load_punicoes)
+        puni.append(registro)
+        await em_thread(save_punicoes, puni)
 
 
 class MuteModal(Modal):
@@ -136,8 +150,7 @@ class MuteModal(Modal):
 
         # REGISTRO
         try:
-            puni = load_punicoes()
-            puni.append({
+            await registrar_punicao({
                 "tipo": "mute",
                 "membro": membro.id,
                 "moderador": interaction.user.id,
@@ -145,7 +158,6 @@ class MuteModal(Modal):
                 "duracao_min": minutos,
                 "data": datetime.datetime.now().isoformat()
             })
-            save_punicoes(puni)
         except Exception as e:
             return await interaction.response.send_message(
                 f"⚠️ Mute aplicado, mas não consegui registrar!\n```{e}```",
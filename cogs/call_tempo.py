@@ -1,19 +1,35 @@
 import discord
 from discord.ext import commands, tasks
 import time
-import asyncio
+
+from core.renomeios import RENAME_WINDOW, RenameBudget, TimerLabels
+
 
 class VoiceChannelTimer(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.active_channels = {}  # {channel_id: start_time}
+        self.budget = RenameBudget()
+        self.labels = TimerLabels(self.budget)
+        # Canais que ficaram vazios e precisam voltar ao nome original
+        self.reset_channels = set()
         self.update_channel_names.start()
 
-    def format_time(self, seconds):
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        sec = seconds % 60
-        return f"{hours}:{minutes:02d}:{sec:02d}"
+    def desired_name(self, channel, agora):
+        """(nome que o canal deveria ter agora, segundos mostrados nele)
+
+        Sempre o mais recente: atualizações pendentes se fundem. Se o tempo
+        mostrado ainda vale, o nome atual é mantido.
+        """
+        base_name = channel.name.split(" —")[0]  # nome original sem timer
+        start_time = self.active_channels.get(channel.id)
+        if start_time is None:
+            return base_name, None
+        proximo = self.labels.proximo(channel.id, start_time, agora)
+        if proximo is None:
+            return channel.name, None
+        elapsed, texto = proximo
+        return f"{base_name} — {texto}", elapsed
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
@@ -25,42 +41,70 @@ class VoiceChannelTimer(commands.Cog):
             # Se o canal ainda não está sendo contado, inicia
             if channel.id not in self.active_channels:
                 self.active_channels[channel.id] = int(time.time())
+                self.labels.esquecer(channel.id)
+            self.reset_channels.discard(channel.id)
 
         # Saiu de um canal
         if before.channel is not None and after.channel is None:
             channel = before.channel
 
-            # Se ficou vazio, remove o contador
+            # Se ficou vazio, remove o contador; o nome volta ao original
+            # pelo loop, quando houver orçamento de renomeio
             if len(channel.members) == 0:
                 if channel.id in self.active_channels:
                     del self.active_channels[channel.id]
-                # Volta nome ao original
-                try:
-                    await channel.edit(name=channel.name.split(" —")[0])
-                except:
-                    pass
+                self.labels.esquecer(channel.id)
+                self.reset_channels.add(channel.id)
 
-    @tasks.loop(seconds=5)  # atualiza a cada 5 segundos
+    @tasks.loop(seconds=5)  # confere a cada 5 segundos; só edita quando o nome muda
     async def update_channel_names(self):
-        for channel_id, start_time in list(self.active_channels.items()):
+        for channel_id in list(self.active_channels) + list(self.reset_channels):
             channel = self.bot.get_channel(channel_id)
 
-            if channel and isinstance(channel, discord.VoiceChannel):
-                elapsed = int(time.time()) - start_time
-                formatted = self.format_time(elapsed)
+            if not channel or not isinstance(channel, discord.VoiceChannel):
+                self.active_channels.pop(channel_id, None)
+                self.reset_channels.discard(channel_id)
+                self.labels.esquecer(channel_id)
+                continue
+
+            agora = time.time()
+            name, elapsed = self.desired_name(channel, agora)
+            if name == channel.name:
+                if elapsed is not None:
+                    # O canal já mostra esse tempo (ex.: depois de um reinício)
+                    self.labels.mostrado(channel_id, elapsed, agora)
+                # Nada a renomear
+                if channel_id not in self.active_channels:
+                    self.reset_channels.discard(channel_id)
+                    self.budget.esquecer(channel_id)
+                continue
 
-                base_name = channel.name.split(" —")[0]  # nome original sem timer
+            # Sem orçamento: a atualização fica para quando a janela liberar
+            if self.budget.restante(channel_id, agora) == 0:
+                continue
 
-                try:
-                    await channel.edit(name=f"{base_name} — {formatted}")
-                except discord.Forbidden:
-                    pass
-                except Exception as e:
+            try:
+                self.budget.consumir(channel_id, agora)
+                await channel.edit(name=name)
+                if elapsed is not None:
+                    # A granularidade fica escolhida até o próximo renomeio
+                    self.labels.mostrado(channel_id, elapsed, agora)
+            except discord.Forbidden:
+                self.active_channels.pop(channel_id, None)
+                self.reset_channels.discard(channel_id)
+                self.labels.esquecer(channel_id)
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    retry_after = getattr(e, "retry_after", None) or RENAME_WINDOW
+                    self.budget.esgotar(channel_id, agora, retry_after)
+                else:
                     print("Erro ao editar canal:", e)
+            except Exception as e:
+                print("Erro ao editar canal:", e)
 
     @update_channel_names.before_loop
     async def before_update(self):
         await self.bot.wait_until_ready()
 
 async def setup(bot):
-    await bot.add_cog(VoiceChannelTimer(bot))
\ No newline at end of file
+    await bot.add_cog(VoiceChannelTimer(bot))
@@ -1,36 +1,14 @@
 # casamento.py  cog de sistema de casamento para discord.py usando db diferente
 
 import discord
-import json
 import datetime
-from pathlib import Path
 from discord.ext import commands
 from discord import app_commands
 
-# ==============================
-# Funções de Banco de Dados
-# ==============================
-BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR / "data"
-PERFIL_DB_PATH = DATA_DIR / "perfil.json"
+from core.esquemas import PERFIL
 
-def ensure_perfil_db_file() -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if not PERFIL_DB_PATH.exists():
-        PERFIL_DB_PATH.write_text("{}", encoding="utf-8")
+# O banco de perfil é o residente do bot (`bot.perfil_store`), gravado pelo flush_db
 
-def load_perfil_db() -> dict:
-    ensure_perfil_db_file()
-    try:
-        with PERFIL_DB_PATH.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except json.JSONDecodeError:
-        return {}
-
-def save_perfil_db(data: dict) -> None:
-    ensure_perfil_db_file()
-    with PERFIL_DB_PATH.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
 
 class CasamentoButtons(discord.ui.View):
     def __init__(self, proposer: discord.Member, target: discord.Member, bot):
@@ -48,27 +26,16 @@ class CasamentoButtons(discord.ui.View):
             )
             return
 
-        db = load_perfil_db()
+        db = self.bot.perfil_store.load()
         proposer_id = str(self.proposer.id)
         target_id = str(self.target.id)
 
-        # Garantir que os usuários existem no DB
-        if proposer_id not in db:
-            db[proposer_id] = {
-                "sobre": None,
-                "tempo_total": 0,
-                "casado_com": None
-            }
-        if target_id not in db:
-            db[target_id] = {
-                "sobre": None,
-                "tempo_total": 0,
-                "casado_com": None
-            }
+        proposer = PERFIL.view(db.get(proposer_id))
+        target = PERFIL.view(db.get(target_id))
 
         # Verificar se algum dos dois já está casado
-        if db[proposer_id].get("casado_com"):
-            casado_com_id = db[proposer_id].get("casado_com")
+        if proposer["casado_com"]:
+            casado_com_id = proposer["casado_com"]
             try:
                 casado_com_user = await self.bot.fetch_user(int(casado_com_id))
                 await interaction.response.send_message(
@@ -82,8 +49,8 @@ class CasamentoButtons(discord.ui.View):
                 )
             return
 
-        if db[target_id].get("casado_com"):
-            casado_com_id = db[target_id].get("casado_com")
+        if target["casado_com"]:
+            casado_com_id = target["casado_com"]
             try:
                 casado_com_user = await self.bot.fetch_user(int(casado_com_id))
                 await interaction.response.send_message(
@@ -97,10 +64,10 @@ class CasamentoButtons(discord.ui.View):
                 )
             return
 
-        # Salvar o casamento
-        db[proposer_id]["casado_com"] = target_id
-        db[target_id]["casado_com"] = proposer_id
-        save_perfil_db(db)
+        # Salvar o casamento (criando os perfis que ainda não existem)
+        db.setdefault(proposer_id, PERFIL.novo())["casado_com"] = target_id
+        db.setdefault(target_id, PERFIL.novo())["casado_com"] = proposer_id
+        self.bot.perfil_store.mark_dirty(proposer_id, target_id)
 
         # Embed de sucesso
         embed = discord.Embed(
@@ -192,28 +159,16 @@ class Casamento(commands.Cog):
             )
             return
 
-        db = load_perfil_db()
+        db = self.bot.perfil_store.load()
         proposer_id = str(interaction.user.id)
         target_id = str(pessoa.id)
 
-        # Garantir que os usuários existem no DB
-        if proposer_id not in db:
-            db[proposer_id] = {
-                "sobre": None,
-                "tempo_total": 0,
-                "casado_com": None
-            }
-        if target_id not in db:
-            db[target_id] = {
-                "sobre": None,
-                "tempo_total": 0,
-                "casado_com": None
-            }
-        save_perfil_db(db)
+        proposer = PERFIL.view(db.get(proposer_id))
+        target = PERFIL.view(db.get(target_id))
 
         # Verificar se o proposer já está casado
-        if db[proposer_id].get("casado_com"):
-            casado_com_id = db[proposer_id].get("casado_com")
+        if proposer["casado_com"]:
+            casado_com_id = proposer["casado_com"]
             try:
                 casado_com_user = await self.bot.fetch_user(int(casado_com_id))
                 await interaction.response.send_message(
@@ -228,8 +183,8 @@ class Casamento(commands.Cog):
             return
 
         # Verificar se o alvo já está casado
-        if db[target_id].get("casado_com"):
-            casado_com_id = db[target_id].get("casado_com")
+        if target["casado_com"]:
+            casado_com_id = target["casado_com"]
             try:
                 casado_com_user = await self.bot.fetch_user(int(casado_com_id))
                 await interaction.response.send_message(
@@ -266,7 +221,7 @@ class Casamento(commands.Cog):
 
     @app_commands.command(name="divorciar", description="Divorcie-se de seu parceiro(a)")
     async def divorciar(self, interaction: discord.Interaction):
-        db = load_perfil_db()
+        db = self.bot.perfil_store.load()
         user_id = str(interaction.user.id)
 
         if user_id not in db or not db[user_id].get("casado_com"):
@@ -282,7 +237,7 @@ class Casamento(commands.Cog):
         db[user_id]["casado_com"] = None
         if casado_com_id in db:
             db[casado_com_id]["casado_com"] = None
-        save_perfil_db(db)
+        self.bot.perfil_store.mark_dirty(user_id, casado_com_id)
 
         try:
             ex_parceiro = await self.bot.fetch_user(int(casado_com_id))
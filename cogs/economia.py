@@ -5,7 +5,13 @@ import asyncio
 import json
 from pathlib import Path
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
+
+from core.agendador import DeadlineScheduler
+from core.catalogo import get_catalog
+from core.esquemas import ECONOMIA
+from core.registros import EconomyRecord, agora
+from core.niveis import calculate_level, get_xp_for_level, get_xp_for_next_level
 
 
 # ==================== BALANCEAMENTO ====================
@@ -53,51 +59,40 @@ class BalanceConfig:
 
 # =====================================================
 
-def calculate_level(xp: int) -> int:
-    """Calcula o nível baseado na XP"""
-    level = 1
-    required_xp = 100
-    current_xp = xp
-    
-    while current_xp >= required_xp:
-        current_xp -= required_xp
-        level += 1
-        required_xp = int(required_xp * 1.5)  # Aumenta 50% a cada nível
-    
-    return level
+# Ação de cooldown -> (chave em "configuracoes" do economia.json, segundos por unidade, padrão em segundos)
+COOLDOWNS = {
+    "daily": ("cooldown_diario_minutos", 60, BalanceConfig.DAILY_COOLDOWN),
+    "mine": ("cooldown_mineracao_segundos", 1, BalanceConfig.MINE_COOLDOWN),
+    "caca": ("cooldown_caca_segundos", 1, BalanceConfig.CACA_COOLDOWN),
+    "trabalho": ("cooldown_trabalho_segundos", 1, BalanceConfig.TRABALHO_COOLDOWN),
+}
 
 
-def get_xp_for_level(level: int) -> int:
-    """Retorna a XP total necessária para alcançar um nível"""
-    total_xp = 0
-    required_xp = 100
-    
-    for _ in range(1, level):
-        total_xp += required_xp
-        required_xp = int(required_xp * 1.5)
-    
-    return total_xp
+def _duracao_configurada(acao: str):
+    """Duração do cooldown lida do catálogo (recarregado quando o arquivo muda)"""
+    chave, unidade, padrao = COOLDOWNS[acao]
+
+    def duracao() -> int:
+        valor = get_catalog().configuracoes.get(chave)
+        return int(valor * unidade) if valor is not None else padrao
+    return duracao
 
 
-def get_xp_for_next_level(level: int) -> int:
-    """Retorna a XP necessária para o próximo nível"""
-    if level == 1:
-        return 100
-    required_xp = 100
-    for _ in range(1, level):
-        required_xp = int(required_xp * 1.5)
-    return required_xp
+# Métrica dos rankings por período -> tipo de missão que ela faz progredir
+MISSOES_POR_METRICA = {"tempo": "call"}
+
+# Períodos aceitos por /top-souls e /top-level
+PERIODOS = {"dia": "Hoje", "semana": "Esta semana", "mes": "Este mês"}
 
 
 class Economia(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # Usar valores do BalanceConfig
-        self.mine_cooldown = BalanceConfig.MINE_COOLDOWN
-        self.daily_cooldown = BalanceConfig.DAILY_COOLDOWN
-        self.caca_cooldown = BalanceConfig.CACA_COOLDOWN
         self.caca_longa_duration = BalanceConfig.CACA_LONGA_DURATION
-        self.trabalho_cooldown = BalanceConfig.TRABALHO_COOLDOWN
+        # Cooldowns verificados em memória (bot.cooldowns) e gravados nos campos last_* do registro
+        self.cooldowns = bot.cooldowns
+        for acao in COOLDOWNS:
+            self.cooldowns.registrar(acao, _duracao_configurada(acao), f"last_{acao}")
         
         # Definição dos trabalhos disponíveis
         self.trabalhos = {
@@ -183,54 +178,35 @@ class Economia(commands.Cog):
             }
         }
         
-        self.check_cacas_longas.start()
+        # Caças longas pendentes: uma única task dorme até o próximo término
+        self.cacas_longas = DeadlineScheduler(self._concluir_caca_longa)
+        bot.janelas.on_add(self._progresso_janelas)
+
+    async def cog_load(self):
+        """Reconstrói o agendamento das caças longas a partir do banco"""
+        for uid, data in self.bot.db().items():
+            caca_longa = data.get("caca_longa_ativa")
+            if not caca_longa:
+                continue
+            if caca_longa.get("fim") is None:
+                continue
+            self.cacas_longas.schedule(uid, caca_longa["fim"], caca_longa.get("channel_id"))
+        self.cacas_longas.start()
 
     def ensure_user(self, user_id: int):
-        """Garante que o usuário existe no banco de dados"""
+        """Garante que o usuário existe no banco (só grava ao criar o registro)"""
         uid = str(user_id)
         db = self.bot.db()
         if uid not in db:
-            db[uid] = {
-                "sobre": None,
-                "tempo_total": 0,
-                "soul": 0,
-                "xp": 0,
-                "level": 1,
-                "last_daily": None,
-                "last_mine": None,
-                "mine_streak": 0,
-                "last_caca": None,
-                "caca_streak": 0,
-                "caca_longa_ativa": None,
-                "trabalho_atual": None,
-                "last_trabalho": None,
-                "missoes": [],
-                "missoes_completas": []
-            }
-            self.bot.save_db(db)
-        else:
-            defaults = {
-                "soul": 0,
-                "xp": 0,
-                "level": 1,
-                "last_daily": None,
-                "last_mine": None,
-                "mine_streak": 0,
-                "daily_streak": 0,
-                "last_caca": None,
-                "caca_streak": 0,
-                "caca_longa_ativa": None,
-                "trabalho_atual": None,
-                "last_trabalho": None,
-                "missoes": [],
-                "missoes_completas": []
-            }
-            for key, value in defaults.items():
-                if key not in db[uid]:
-                    db[uid][key] = value
-            self.bot.save_db(db)
+            db[uid] = ECONOMIA.novo()
+            self.bot.db_store.mark_dirty(uid)
+            self.bot.rankings.update("level", uid, (1, 0))
         return uid
 
+    def registro(self, user_id) -> EconomyRecord:
+        """Registro do usuário com os padrões do esquema, para consultas (não cria nada)"""
+        return ECONOMIA.view(self.bot.db().get(str(user_id)))
+
     def add_xp(self, user_id: int, amount: int):
         """Adiciona XP e atualiza o nível se necessário"""
         uid = self.ensure_user(user_id)
@@ -241,17 +217,27 @@ class Economia(commands.Cog):
         new_level = calculate_level(db[uid]["xp"])
         db[uid]["level"] = new_level
         
-        self.bot.save_db(db)
+        self.bot.db_store.mark_dirty(uid)
+        self.bot.rankings.update("level", uid, (new_level, db[uid]["xp"]))
+        self.bot.janelas.add("xp", uid, amount)
         
         # Retorna se subiu de nível
         return new_level > old_level, new_level
 
-    def add_soul(self, user_id: int, amount: int):
-        """Adiciona almas ao usuário"""
+    def add_soul(self, user_id: int, amount: int, motivo: str):
+        """Adiciona almas ao usuário (lançamento no livro-razão)"""
         uid = self.ensure_user(user_id)
+        self.bot.ledger.creditar(uid, amount, motivo)
+        self.bot.janelas.add("soul", uid, amount)
+
+    def _progresso_janelas(self, metrica: str, uid: str, quantidade: int):
+        """Alimenta as missões a partir dos incrementos dos rankings por período"""
+        tipo = MISSOES_POR_METRICA.get(metrica)
         db = self.bot.db()
-        db[uid]["soul"] = db[uid].get("soul", 0) + amount
-        self.bot.save_db(db)
+        if tipo is None or uid not in db:
+            return
+        self.update_missao_progresso(db, uid, tipo, quantidade)
+        self.bot.db_store.mark_dirty(uid)
     
     def update_missao_progresso(self, db: dict, uid: str, tipo: str, quantidade: int = 1):
         """Atualiza o progresso de missões"""
@@ -260,62 +246,86 @@ class Economia(commands.Cog):
             if missao.get("tipo") == tipo:
                 missao["progresso"] = missao.get("progresso", 0) + quantidade
 
+    def _embed_cooldown(self, acao: str, remaining: int) -> discord.Embed:
+        """Resposta de um comando ainda em cooldown"""
+        hours = int(remaining // 3600)
+        minutes = int((remaining % 3600) // 60)
+        seconds = int(remaining % 60)
+        if acao == "daily":
+            return discord.Embed(
+                title="⏰ Daily já coletado!",
+                description=f"Você já coletou seu daily hoje!\n"
+                          f"Próximo daily disponível em: **{hours}h {minutes}m {seconds}s**",
+                color=discord.Color.orange()
+            )
+        if acao == "trabalho":
+            return discord.Embed(
+                title="⏰ Descansando",
+                description=f"Você está cansado de trabalhar!\n"
+                          f"Poderá trabalhar novamente em: **{hours}h {minutes}m {seconds}s**",
+                color=discord.Color.orange()
+            )
+        if acao == "caca":
+            espera, verbo = f"{int(remaining // 60)}m {seconds}s", "caçar"
+        else:
+            espera, verbo = f"{int(remaining)}s", "minerar"
+        return discord.Embed(
+            title="⏰ Aguarde!",
+            description=f"Você precisa esperar **{espera}** para {verbo} novamente!",
+            color=discord.Color.orange()
+        )
+
     @app_commands.command(name="daily", description="Receba sua recompensa diária de almas e XP!")
     async def daily(self, interaction: discord.Interaction):
-        uid = self.ensure_user(interaction.user.id)
-        db = self.bot.db()
+        uid = str(interaction.user.id)
+        # Cooldown verificado em memória, antes do lock e do banco: cliques repetidos
+        # são recusados sem esperar na fila do usuário
+        remaining = self.cooldowns.restante(uid, "daily")
+        if remaining:
+            await interaction.response.send_message(embed=self._embed_cooldown("daily", remaining), ephemeral=True)
+            return
+
+        async with self.bot.locks.hold(uid):
+            # Confere de novo: outro comando do usuário pode ter iniciado o cooldown enquanto esperava o lock
+            remaining = self.cooldowns.restante(uid, "daily")
+            if remaining:
+                await interaction.response.send_message(embed=self._embed_cooldown("daily", remaining), ephemeral=True)
+                return
+
+            self.ensure_user(uid)
+            db = self.bot.db()
         
-        last_daily = db[uid].get("last_daily")
-        now = datetime.datetime.now()
+            registro = db[uid]
+            now = agora()
         
-        streak = db[uid].get("daily_streak", 0)
+            streak = registro.daily_streak
         
-        if last_daily:
-            last_daily_dt = datetime.datetime.fromisoformat(last_daily)
-            time_diff = (now - last_daily_dt).total_seconds()
-            
-            if time_diff < self.daily_cooldown:
-                remaining = self.daily_cooldown - time_diff
-                hours = int(remaining // 3600)
-                minutes = int((remaining % 3600) // 60)
-                seconds = int(remaining % 60)
-                
-                embed = discord.Embed(
-                    title="⏰ Daily já coletado!",
-                    description=f"Você já coletou seu daily hoje!\n"
-                              f"Próximo daily disponível em: **{hours}h {minutes}m {seconds}s**",
-                    color=discord.Color.orange()
-                )
-                await interaction.response.send_message(embed=embed, ephemeral=True)
-                return
-            elif time_diff >= self.daily_cooldown * 2:
-                # Se passou mais de 48 horas, resetar streak
+            # Se passou mais de dois cooldowns (48 horas) desde o último daily, resetar streak
+            if registro.last_daily is None or now - registro.last_daily >= self.cooldowns.duracao("daily") * 2:
                 streak = 0
-        else:
-            streak = 0
         
-        # Incrementar streak
-        streak += 1
+            # Incrementar streak
+            streak += 1
         
-        # Recompensas do daily
-        base_souls = random.randint(50, 150)
-        base_xp = random.randint(20, 50)
-        bonus_souls = int(base_souls * (1 + streak * 0.1))  # 10% de bônus por streak
-        bonus_xp = int(base_xp * (1 + streak * 0.1))
+            # Recompensas do daily
+            base_souls = random.randint(50, 150)
+            base_xp = random.randint(20, 50)
+            bonus_souls = int(base_souls * (1 + streak * 0.1))  # 10% de bônus por streak
+            bonus_xp = int(base_xp * (1 + streak * 0.1))
         
-        # Adicionar recompensas
-        self.add_soul(interaction.user.id, bonus_souls)
-        leveled_up, new_level = self.add_xp(interaction.user.id, bonus_xp)
+            # Adicionar recompensas
+            self.add_soul(interaction.user.id, bonus_souls, "daily")
+            leveled_up, new_level = self.add_xp(interaction.user.id, bonus_xp)
         
-        # Recarregar DB e atualizar last_daily e streak
-        db = self.bot.db()
-        db[uid]["last_daily"] = now.isoformat()
-        db[uid]["daily_streak"] = streak
+            # Registro residente (já sob o lock do usuário): last_daily e streak
+            db = self.bot.db()
+            self.cooldowns.iniciar(uid, "daily", registro, now)
+            registro.daily_streak = streak
         
-        # Atualizar progresso de missões
-        self.update_missao_progresso(db, uid, "daily", 1)
+            # Atualizar progresso de missões
+            self.update_missao_progresso(db, uid, "daily", 1)
         
-        self.bot.save_db(db)
+            self.bot.db_store.mark_dirty(uid)
         
         embed = discord.Embed(
             title="🎁 Daily Coletado!",
@@ -353,9 +363,7 @@ class Economia(commands.Cog):
             await interaction.response.send_message("❌ O valor deve ser maior que zero.", ephemeral=True)
             return
 
-        sender_uid = self.ensure_user(interaction.user.id)
-        db = self.bot.db()
-        balance = db.get(sender_uid, {}).get("soul", 0)
+        balance = self.bot.ledger.saldo(interaction.user.id)
 
         if balance < valor:
             await interaction.response.send_message("❌ Saldo insuficiente.", ephemeral=True)
@@ -370,6 +378,8 @@ class Economia(commands.Cog):
                 self.recipient_id = recipient_id
                 self.amount = amount
                 self.confirmed = False
+                # Versão do remetente quando o pedido foi feito
+                self.versao_remetente = bot.locks.versao(sender_id)
 
             def disable_all_items(self):
                 """Compat shim: desabilita todos os itens do view."""
@@ -385,22 +395,26 @@ class Economia(commands.Cog):
                     await interaction_button.response.send_message("Somente o destinatário pode confirmar esta transferência.", ephemeral=True)
                     return
 
-                # Recarregar DB e checar saldo do remetente novamente
-                db_local = self.bot.db()
                 sender_uid_local = str(self.sender_id)
                 recipient_uid_local = str(self.recipient_id)
 
-                if sender_uid_local not in db_local:
-                    await interaction_button.response.send_message("❌ Dados do remetente não encontrados.", ephemeral=True)
-                    self.disable_all_items()
-                    try:
-                        await interaction_button.message.edit(view=self)
-                    except:
-                        pass
-                    return
+                # Remetente e destinatário ficam travados (sempre na mesma ordem) até o fim da transferência
+                async with self.bot.locks.hold(sender_uid_local, recipient_uid_local):
+                    if self.confirmed:
+                        # Um segundo clique que esperou o lock não transfere de novo
+                        falha = "❌ Esta transferência já foi confirmada."
+                    elif not self.bot.ledger.transferir(sender_uid_local, recipient_uid_local, self.amount, "pay"):
+                        if self.bot.locks.mudou(sender_uid_local, self.versao_remetente):
+                            motivo = "o saldo do remetente mudou desde o pedido e não é mais suficiente"
+                        else:
+                            motivo = "remetente não tem saldo suficiente"
+                        falha = f"❌ Transferência falhou: {motivo}."
+                    else:
+                        falha = None
+                        self.confirmed = True
 
-                if db_local[sender_uid_local].get("soul", 0) < self.amount:
-                    await interaction_button.response.send_message("❌ Transferência falhou: remetente não tem saldo suficiente.", ephemeral=True)
+                if falha:
+                    await interaction_button.response.send_message(falha, ephemeral=True)
                     self.disable_all_items()
                     try:
                         await interaction_button.message.edit(view=self)
@@ -408,31 +422,6 @@ class Economia(commands.Cog):
                         pass
                     return
 
-                # Garantir que o destinatário possui entrada no DB
-                if recipient_uid_local not in db_local:
-                    db_local[recipient_uid_local] = {
-                        "sobre": None,
-                        "tempo_total": 0,
-                        "soul": 0,
-                        "xp": 0,
-                        "level": 1,
-                        "last_daily": None,
-                        "last_mine": None,
-                        "mine_streak": 0,
-                        "daily_streak": 0,
-                        "last_caca": None,
-                        "caca_streak": 0,
-                        "caca_longa_ativa": None,
-                        "missoes": [],
-                        "missoes_completas": []
-                    }
-
-                # Efetuar transferência
-                db_local[sender_uid_local]["soul"] = db_local[sender_uid_local].get("soul", 0) - self.amount
-                db_local[recipient_uid_local]["soul"] = db_local[recipient_uid_local].get("soul", 0) + self.amount
-                self.bot.save_db(db_local)
-
-                self.confirmed = True
                 self.disable_all_items()
                 try:
                     await interaction_button.response.send_message(f"✅ Transferência de **{self.amount:,}** almas confirmada por {interaction_button.user.mention}.")
@@ -470,63 +459,61 @@ class Economia(commands.Cog):
 
     @app_commands.command(name="mine", description="Mine e ganhe almas! (Cooldown: 60s)")
     async def mine(self, interaction: discord.Interaction):
-        uid = self.ensure_user(interaction.user.id)
-        db = self.bot.db()
-        
-        last_mine = db[uid].get("last_mine")
-        now = datetime.datetime.now()
-        
-        if last_mine:
-            last_mine_dt = datetime.datetime.fromisoformat(last_mine)
-            time_diff = (now - last_mine_dt).total_seconds()
-            
-            if time_diff < self.mine_cooldown:
-                remaining = self.mine_cooldown - time_diff
-                embed = discord.Embed(
-                    title="⏰ Aguarde!",
-                    description=f"Você precisa esperar **{int(remaining)}s** para minerar novamente!",
-                    color=discord.Color.orange()
-                )
-                await interaction.response.send_message(embed=embed, ephemeral=True)
+        uid = str(interaction.user.id)
+        # Cooldown verificado em memória, antes do lock e do banco
+        remaining = self.cooldowns.restante(uid, "mine")
+        if remaining:
+            await interaction.response.send_message(embed=self._embed_cooldown("mine", remaining), ephemeral=True)
+            return
+
+        async with self.bot.locks.hold(uid):
+            # Confere de novo: outro comando do usuário pode ter iniciado o cooldown enquanto esperava o lock
+            remaining = self.cooldowns.restante(uid, "mine")
+            if remaining:
+                await interaction.response.send_message(embed=self._embed_cooldown("mine", remaining), ephemeral=True)
                 return
-        
-        # Recompensas da mineração
-        base_souls = random.randint(10, 50)
-        base_xp = random.randint(5, 15)
-        
-        # Bônus por streak de mineração
-        streak = db[uid].get("mine_streak", 0) + 1
-        bonus_multiplier = min(1 + (streak * 0.05), 2.0)  # Máximo 2x de bônus
-        bonus_souls = int(base_souls * bonus_multiplier)
-        bonus_xp = int(base_xp * bonus_multiplier)
-        
-        # Chance de encontrar itens raros
-        rare_chance = random.random()
-        rare_bonus = 0
-        rare_message = ""
-        
-        if rare_chance < 0.05:  # 5% de chance
-            rare_bonus = random.randint(100, 300)
-            bonus_souls += rare_bonus
-            rare_message = "<:alma:1443647166399909998> **Você encontrou uma gema rara!**"
-        elif rare_chance < 0.15:  # 10% de chance
-            rare_bonus = random.randint(50, 150)
-            bonus_souls += rare_bonus
-            rare_message = "✨ **Você encontrou um cristal especial!**"
-        
-        # Adicionar recompensas
-        self.add_soul(interaction.user.id, bonus_souls)
-        leveled_up, new_level = self.add_xp(interaction.user.id, bonus_xp)
-        
-        # Recarregar DB e atualizar last_mine e streak
-        db = self.bot.db()
-        db[uid]["last_mine"] = now.isoformat()
-        db[uid]["mine_streak"] = streak
-        
-        # Atualizar progresso de missões
-        self.update_missao_progresso(db, uid, "mine", 1)
-        
-        self.bot.save_db(db)
+
+            self.ensure_user(uid)
+            db = self.bot.db()
+            registro = db[uid]
+        
+            # Recompensas da mineração
+            base_souls = random.randint(10, 50)
+            base_xp = random.randint(5, 15)
+        
+            # Bônus por streak de mineração
+            streak = registro.mine_streak + 1
+            bonus_multiplier = min(1 + (streak * 0.05), 2.0)  # Máximo 2x de bônus
+            bonus_souls = int(base_souls * bonus_multiplier)
+            bonus_xp = int(base_xp * bonus_multiplier)
+        
+            # Chance de encontrar itens raros
+            rare_chance = random.random()
+            rare_bonus = 0
+            rare_message = ""
+        
+            if rare_chance < 0.05:  # 5% de chance
+                rare_bonus = random.randint(100, 300)
+                bonus_souls += rare_bonus
+                rare_message = "<:alma:1443647166399909998> **Você encontrou uma gema rara!**"
+            elif rare_chance < 0.15:  # 10% de chance
+                rare_bonus = random.randint(50, 150)
+                bonus_souls += rare_bonus
+                rare_message = "✨ **Você encontrou um cristal especial!**"
+        
+            # Adicionar recompensas
+            self.add_soul(interaction.user.id, bonus_souls, "mine")
+            leveled_up, new_level = self.add_xp(interaction.user.id, bonus_xp)
+        
+            # Registro residente (já sob o lock do usuário): last_mine e streak
+            db = self.bot.db()
+            self.cooldowns.iniciar(uid, "mine", registro)
+            registro.mine_streak = streak
+        
+            # Atualizar progresso de missões
+            self.update_missao_progresso(db, uid, "mine", 1)
+        
+            self.bot.db_store.mark_dirty(uid)
         
         # Emojis aleatórios para a mineração
         mine_emojis = ["⛏️", "🔨", "<:alma:1443647166399909998>", "⚒️", "🪨"]
@@ -559,13 +546,12 @@ class Economia(commands.Cog):
     @app_commands.describe(membro="Membro para ver o saldo (opcional)")
     async def balance(self, interaction: discord.Interaction, membro: discord.Member = None):
         membro = membro or interaction.user
-        uid = self.ensure_user(membro.id)
-        db = self.bot.db()
+        registro = self.registro(membro.id)
         
-        souls = db[uid].get("soul", 0)
-        xp = db[uid].get("xp", 0)
-        level = db[uid].get("level", 1)
-        trabalho_atual = db[uid].get("trabalho_atual")
+        souls = self.bot.ledger.saldo(membro.id)
+        xp = registro["xp"]
+        level = registro["level"]
+        trabalho_atual = registro["trabalho_atual"]
         
         xp_for_next = get_xp_for_next_level(level)
         xp_for_current = get_xp_for_level(level)
@@ -598,30 +584,22 @@ class Economia(commands.Cog):
         embed.set_footer(text="Aeternum Exilium • Sistema de Economia")
         await interaction.response.send_message(embed=embed)
 
+    async def top_membros(self, interaction: discord.Interaction, metrica: str, limite: int = 10, periodo: str | None = None):
+        """Lê o topo do índice de ranking, pulando bots, até juntar `limite` membros.
+
+        Com `periodo` (dia, semana, mes), usa o ranking do período atual da métrica.
+        """
+        board = self.bot.janelas.board(metrica, periodo) if periodo else self.bot.rankings[metrica]
+        return await self.bot.identities.top_humanos(board, interaction.guild, limite)
+
     @app_commands.command(name="top-souls", description="Ranking dos mais ricos em almas")
-    async def top_souls(self, interaction: discord.Interaction):
-        db = self.bot.db()
-        
-        ranking_items = []
-        for uid, data in db.items():
-            try:
-                user_id = int(uid)
-                member = interaction.guild.get_member(user_id) if interaction.guild else None
-                if member and not member.bot:
-                    souls = data.get("soul", 0)
-                    ranking_items.append((uid, souls))
-                elif not member:
-                    user = await self.bot.fetch_user(user_id)
-                    if not user.bot:
-                        souls = data.get("soul", 0)
-                        ranking_items.append((uid, souls))
-            except (ValueError, discord.NotFound, discord.HTTPException):
-                continue
-        
-        ranking = sorted(ranking_items, key=lambda x: x[1], reverse=True)[:10]
+    @app_commands.describe(periodo="Almas ganhas no período (padrão: saldo total)")
+    @app_commands.choices(periodo=[app_commands.Choice(name=nome, value=valor) for valor, nome in PERIODOS.items()])
+    async def top_souls(self, interaction: discord.Interaction, periodo: app_commands.Choice[str] = None):
+        ranking = await self.top_membros(interaction, "soul", periodo=periodo.value if periodo else None)
         
         embed = discord.Embed(
-            title="🏆 Top 10 — Mais Ricos em Almas",
+            title=f"🏆 Top 10 — Almas Ganhas ({periodo.name})" if periodo else "🏆 Top 10 — Mais Ricos em Almas",
             color=discord.Color.gold()
         )
         
@@ -629,15 +607,7 @@ class Economia(commands.Cog):
             embed.description = "Ainda não há registros."
         else:
             for pos, (uid, souls) in enumerate(ranking, start=1):
-                member = interaction.guild.get_member(int(uid)) if interaction.guild else None
-                if member:
-                    nome = member.display_name
-                else:
-                    try:
-                        user = await self.bot.fetch_user(int(uid))
-                        nome = user.name
-                    except:
-                        nome = f"Usuário {uid}"
+                nome = await self.bot.identities.display_name(uid, interaction.guild)
                 embed.add_field(
                     name=f"{pos}. {nome}",
                     value=f"**{souls:,}** <:alma:1443647166399909998>",
@@ -647,28 +617,27 @@ class Economia(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="top-level", description="Ranking dos maiores níveis")
-    async def top_level(self, interaction: discord.Interaction):
-        db = self.bot.db()
-        
-        ranking_items = []
-        for uid, data in db.items():
-            try:
-                user_id = int(uid)
-                member = interaction.guild.get_member(user_id) if interaction.guild else None
-                if member and not member.bot:
-                    level = data.get("level", 1)
-                    xp = data.get("xp", 0)
-                    ranking_items.append((uid, level, xp))
-                elif not member:
-                    user = await self.bot.fetch_user(user_id)
-                    if not user.bot:
-                        level = data.get("level", 1)
-                        xp = data.get("xp", 0)
-                        ranking_items.append((uid, level, xp))
-            except (ValueError, discord.NotFound, discord.HTTPException):
-                continue
-        
-        ranking = sorted(ranking_items, key=lambda x: (x[1], x[2]), reverse=True)[:10]
+    @app_commands.describe(periodo="XP ganha no período (padrão: nível total)")
+    @app_commands.choices(periodo=[app_commands.Choice(name=nome, value=valor) for valor, nome in PERIODOS.items()])
+    async def top_level(self, interaction: discord.Interaction, periodo: app_commands.Choice[str] = None):
+        if periodo:
+            ranking = await self.top_membros(interaction, "xp", periodo=periodo.value)
+            embed = discord.Embed(
+                title=f"🏆 Top 10 — XP Ganha ({periodo.name})",
+                color=discord.Color.purple()
+            )
+            if not ranking:
+                embed.description = "Ainda não há registros."
+            for pos, (uid, xp) in enumerate(ranking, start=1):
+                nome = await self.bot.identities.display_name(uid, interaction.guild)
+                embed.add_field(name=f"{pos}. {nome}", value=f"**{xp:,}** XP", inline=False)
+            await interaction.response.send_message(embed=embed)
+            return
+
+        ranking = [
+            (uid, level, xp)
+            for uid, (level, xp) in await self.top_membros(interaction, "level")
+        ]
         
         embed = discord.Embed(
             title="🏆 Top 10 — Maiores Níveis",
@@ -679,15 +648,7 @@ class Economia(commands.Cog):
             embed.description = "Ainda não há registros."
         else:
             for pos, (uid, level, xp) in enumerate(ranking, start=1):
-                member = interaction.guild.get_member(int(uid)) if interaction.guild else None
-                if member:
-                    nome = member.display_name
-                else:
-                    try:
-                        user = await self.bot.fetch_user(int(uid))
-                        nome = user.name
-                    except:
-                        nome = f"Usuário {uid}"
+                nome = await self.bot.identities.display_name(uid, interaction.guild)
                 embed.add_field(
                     name=f"{pos}. {nome}",
                     value=f"Nível **{level}** | **{xp:,}** XP",
@@ -747,7 +708,7 @@ class Economia(commands.Cog):
                 missao["progresso"] = 0
                 missoes_ativas.append(missao)
             db[uid]["missoes"] = missoes_ativas
-            self.bot.save_db(db)
+            self.bot.db_store.mark_dirty(uid)
         
         embed = discord.Embed(
             title="📋 Suas Missões",
@@ -789,42 +750,43 @@ class Economia(commands.Cog):
             return
         
         uid = self.ensure_user(interaction.user.id)
-        db = self.bot.db()
+        async with self.bot.locks.hold(uid):
+            db = self.bot.db()
         
-        missoes_ativas = db[uid].get("missoes", [])
+            missoes_ativas = db[uid].get("missoes", [])
         
-        if not missoes_ativas or len(missoes_ativas) < numero:
-            await interaction.response.send_message(
-                "❌ Missão não encontrada!",
-                ephemeral=True
-            )
-            return
+            if not missoes_ativas or len(missoes_ativas) < numero:
+                await interaction.response.send_message(
+                    "❌ Missão não encontrada!",
+                    ephemeral=True
+                )
+                return
         
-        missao = missoes_ativas[numero - 1]
-        objetivo = missao.get("objetivo", 1)
-        progresso = missao.get("progresso", 0)
+            missao = missoes_ativas[numero - 1]
+            objetivo = missao.get("objetivo", 1)
+            progresso = missao.get("progresso", 0)
         
-        if progresso < objetivo:
-            await interaction.response.send_message(
-                f"❌ Esta missão ainda não foi completada! Progresso: **{progresso}/{objetivo}**",
-                ephemeral=True
-            )
-            return
+            if progresso < objetivo:
+                await interaction.response.send_message(
+                    f"❌ Esta missão ainda não foi completada! Progresso: **{progresso}/{objetivo}**",
+                    ephemeral=True
+                )
+                return
         
-        # Dar recompensas
-        recompensa_soul = missao.get("recompensa_soul", 0)
-        recompensa_xp = missao.get("recompensa_xp", 0)
+            # Dar recompensas
+            recompensa_soul = missao.get("recompensa_soul", 0)
+            recompensa_xp = missao.get("recompensa_xp", 0)
         
-        self.add_soul(interaction.user.id, recompensa_soul)
-        leveled_up, new_level = self.add_xp(interaction.user.id, recompensa_xp)
+            self.add_soul(interaction.user.id, recompensa_soul, "missao")
+            leveled_up, new_level = self.add_xp(interaction.user.id, recompensa_xp)
         
-        # Remover missão e adicionar às completas
-        missoes_ativas.pop(numero - 1)
-        missoes_completas = db[uid].get("missoes_completas", [])
-        missoes_completas.append(missao.get("tipo", "unknown"))
-        db[uid]["missoes"] = missoes_ativas
-        db[uid]["missoes_completas"] = missoes_completas
-        self.bot.save_db(db)
+            # Remover missão e adicionar às completas
+            missoes_ativas.pop(numero - 1)
+            missoes_completas = db[uid].get("missoes_completas", [])
+            missoes_completas.append(missao.get("tipo", "unknown"))
+            db[uid]["missoes"] = missoes_ativas
+            db[uid]["missoes_completas"] = missoes_completas
+            self.bot.db_store.mark_dirty(uid)
         
         embed = discord.Embed(
             title="🎉 Missão Reivindicada!",
@@ -845,38 +807,37 @@ class Economia(commands.Cog):
 
     @app_commands.command(name="caça", description="Caçe almas na floresta escura! (Cooldown: 2min)")
     async def caca(self, interaction: discord.Interaction):
-        uid = self.ensure_user(interaction.user.id)
-        db = self.bot.db()
-        
-        last_caca = db[uid].get("last_caca")
-        now = datetime.datetime.now()
-        
-        if last_caca:
-            last_caca_dt = datetime.datetime.fromisoformat(last_caca)
-            time_diff = (now - last_caca_dt).total_seconds()
+        uid = str(interaction.user.id)
+        # Cooldown verificado em memória, antes do lock e do banco
+        remaining = self.cooldowns.restante(uid, "caca")
+        if remaining:
+            await interaction.response.send_message(embed=self._embed_cooldown("caca", remaining), ephemeral=True)
+            return
+
+        async with self.bot.locks.hold(uid):
+            # Confere de novo: outro comando do usuário pode ter iniciado o cooldown enquanto esperava o lock
+            remaining = self.cooldowns.restante(uid, "caca")
+            if remaining:
+                await interaction.response.send_message(embed=self._embed_cooldown("caca", remaining), ephemeral=True)
+                return
+            
+            self.ensure_user(uid)
+            db = self.bot.db()
+            registro = db[uid]
             
-            if time_diff < self.caca_cooldown:
-                remaining = self.caca_cooldown - time_diff
-                minutes = int(remaining // 60)
-                seconds = int(remaining % 60)
+            # Verificar se está em caça longa
+            if registro.caca_longa_ativa:
                 embed = discord.Embed(
-                    title="⏰ Aguarde!",
-                    description=f"Você precisa esperar **{minutes}m {seconds}s** para caçar novamente!",
+                    title="⏰ Caça Longa em Andamento!",
+                    description="Você já está em uma caça longa! Use `/caça-longa` para ver o status.",
                     color=discord.Color.orange()
                 )
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
-        
-        # Verificar se está em caça longa
-        caca_longa = db[uid].get("caca_longa_ativa")
-        if caca_longa:
-            embed = discord.Embed(
-                title="⏰ Caça Longa em Andamento!",
-                description="Você já está em uma caça longa! Use `/caça-longa` para ver o status.",
-                color=discord.Color.orange()
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-            return
+            
+            # O cooldown começa já na saída para a caçada: outra /caça durante a espera é recusada
+            self.cooldowns.iniciar(uid, "caca", registro)
+            self.bot.db_store.mark_dirty(uid)
         
         # Iniciar caçada
         embed_inicio = discord.Embed(
@@ -888,42 +849,41 @@ class Economia(commands.Cog):
         embed_inicio.set_image(url="https://i.pinimg.com/736x/15/29/ab/1529abc5be2e4c2a4392ef693503b7db.jpg")
         await interaction.response.send_message(embed=embed_inicio)
         
-        # Aguardar 5 segundos
+        # Aguardar 5 segundos (sem segurar o lock do usuário)
         await asyncio.sleep(5)
         
         # Calcular recompensas
         base_souls = random.randint(15, 60)
         base_xp = random.randint(8, 20)
         
-        # Bônus por streak de caça
-        streak = db[uid].get("caca_streak", 0) + 1
-        bonus_multiplier = min(1 + (streak * 0.06), 2.2)  # Máximo 2.2x de bônus
-        bonus_souls = int(base_souls * bonus_multiplier)
-        bonus_xp = int(base_xp * bonus_multiplier)
-        
         # Chance de encontrar almas raras
         rare_chance = random.random()
         rare_bonus = 0
         rare_message = ""
         
-        if rare_chance < 0.04:  # 4% de chance
-            rare_bonus = random.randint(120, 350)
-            bonus_souls += rare_bonus
-            rare_message = "👻 **Você encontrou uma alma rara poderosa!**"
-        elif rare_chance < 0.12:  # 8% de chance
-            rare_bonus = random.randint(60, 180)
-            bonus_souls += rare_bonus
-            rare_message = "✨ **Você encontrou uma alma especial!**"
-        
-        # Adicionar recompensas
-        self.add_soul(interaction.user.id, bonus_souls)
-        leveled_up, new_level = self.add_xp(interaction.user.id, bonus_xp)
-        
-        # Recarregar DB e atualizar last_caca e streak
-        db = self.bot.db()
-        db[uid]["last_caca"] = now.isoformat()
-        db[uid]["caca_streak"] = streak
-        self.bot.save_db(db)
+        async with self.bot.locks.hold(uid):
+            # Bônus por streak de caça
+            db = self.bot.db()
+            streak = db[uid].get("caca_streak", 0) + 1
+            bonus_multiplier = min(1 + (streak * 0.06), 2.2)  # Máximo 2.2x de bônus
+            bonus_souls = int(base_souls * bonus_multiplier)
+            bonus_xp = int(base_xp * bonus_multiplier)
+            
+            if rare_chance < 0.04:  # 4% de chance
+                rare_bonus = random.randint(120, 350)
+                bonus_souls += rare_bonus
+                rare_message = "👻 **Você encontrou uma alma rara poderosa!**"
+            elif rare_chance < 0.12:  # 8% de chance
+                rare_bonus = random.randint(60, 180)
+                bonus_souls += rare_bonus
+                rare_message = "✨ **Você encontrou uma alma especial!**"
+            
+            # Adicionar recompensas
+            self.add_soul(interaction.user.id, bonus_souls, "caca")
+            leveled_up, new_level = self.add_xp(interaction.user.id, bonus_xp)
+            
+            db[uid]["caca_streak"] = streak
+            self.bot.db_store.mark_dirty(uid)
         
         # Embed de resultado
         embed_resultado = discord.Embed(
@@ -957,12 +917,9 @@ class Economia(commands.Cog):
         db = self.bot.db()
         
         # Verificar se já está em uma caça longa
-        caca_longa = db[uid].get("caca_longa_ativa")
+        caca_longa = db[uid].caca_longa_ativa
         if caca_longa:
-            inicio_dt = datetime.datetime.fromisoformat(caca_longa["inicio"])
-            agora = datetime.datetime.now()
-            tempo_decorrido = (agora - inicio_dt).total_seconds()
-            tempo_restante = self.caca_longa_duration - tempo_decorrido
+            tempo_restante = caca_longa["inicio"] + self.caca_longa_duration - agora()
             
             if tempo_restante > 0:
                 horas = int(tempo_restante // 3600)
@@ -984,15 +941,16 @@ class Economia(commands.Cog):
                 return
         
         # Iniciar nova caça longa
-        agora = datetime.datetime.now()
-        fim_caca = agora + datetime.timedelta(seconds=self.caca_longa_duration)
+        inicio = agora()
+        fim_caca = inicio + self.caca_longa_duration
         
-        db[uid]["caca_longa_ativa"] = {
-            "inicio": agora.isoformat(),
-            "fim": fim_caca.isoformat(),
+        db[uid].caca_longa_ativa = {
+            "inicio": inicio,
+            "fim": fim_caca,
             "channel_id": interaction.channel_id
         }
-        self.bot.save_db(db)
+        self.bot.db_store.mark_dirty(uid)
+        self.cacas_longas.schedule(uid, fim_caca, interaction.channel_id)
         
         embed = discord.Embed(
             title="🌲 Caça Longa Iniciada!",
@@ -1004,7 +962,7 @@ class Economia(commands.Cog):
         embed.set_image(url="https://i.pinimg.com/736x/15/29/ab/1529abc5be2e4c2a4392ef693503b7db.jpg")
         embed.add_field(
             name="⏳ Tempo estimado",
-            value=f"Termina em: <t:{int(fim_caca.timestamp())}:R>",
+            value=f"Termina em: <t:{fim_caca}:R>",
             inline=False
         )
         embed.set_footer(text="Aeternum Exilium • Sistema de Caça Longa")
@@ -1013,42 +971,44 @@ class Economia(commands.Cog):
     async def processar_caca_longa(self, user_id: int, channel_id: int = None):
         """Processa uma caça longa concluída"""
         uid = self.ensure_user(user_id)
-        db = self.bot.db()
-        
-        caca_longa = db[uid].get("caca_longa_ativa")
-        if not caca_longa:
-            return
-        
-        # Calcular recompensas (maiores que caça rápida)
-        base_souls = random.randint(200, 500)
-        base_xp = random.randint(100, 250)
-        
-        # Bônus extra por caça longa
-        bonus_souls = int(base_souls * 1.5)
-        bonus_xp = int(base_xp * 1.5)
-        
-        # Chance maior de encontrar almas raras
-        rare_chance = random.random()
-        rare_bonus = 0
-        rare_message = ""
-        
-        if rare_chance < 0.15:  # 15% de chance
-            rare_bonus = random.randint(300, 800)
-            bonus_souls += rare_bonus
-            rare_message = "👻 **Você encontrou uma alma lendária!**"
-        elif rare_chance < 0.35:  # 20% de chance
-            rare_bonus = random.randint(150, 400)
-            bonus_souls += rare_bonus
-            rare_message = "✨ **Você encontrou uma alma rara poderosa!**"
+        async with self.bot.locks.hold(uid):
+            db = self.bot.db()
         
-        # Adicionar recompensas
-        self.add_soul(user_id, bonus_souls)
-        leveled_up, new_level = self.add_xp(user_id, bonus_xp)
-        
-        # Recarregar DB e remover caça longa ativa
-        db = self.bot.db()
-        del db[uid]["caca_longa_ativa"]
-        self.bot.save_db(db)
+            caca_longa = db[uid].get("caca_longa_ativa")
+            if not caca_longa:
+                return
+            self.cacas_longas.cancel(uid)
+        
+            # Calcular recompensas (maiores que caça rápida)
+            base_souls = random.randint(200, 500)
+            base_xp = random.randint(100, 250)
+        
+            # Bônus extra por caça longa
+            bonus_souls = int(base_souls * 1.5)
+            bonus_xp = int(base_xp * 1.5)
+        
+            # Chance maior de encontrar almas raras
+            rare_chance = random.random()
+            rare_bonus = 0
+            rare_message = ""
+        
+            if rare_chance < 0.15:  # 15% de chance
+                rare_bonus = random.randint(300, 800)
+                bonus_souls += rare_bonus
+                rare_message = "👻 **Você encontrou uma alma lendária!**"
+            elif rare_chance < 0.35:  # 20% de chance
+                rare_bonus = random.randint(150, 400)
+                bonus_souls += rare_bonus
+                rare_message = "✨ **Você encontrou uma alma rara poderosa!**"
+        
+            # Adicionar recompensas
+            self.add_soul(user_id, bonus_souls, "caca_longa")
+            leveled_up, new_level = self.add_xp(user_id, bonus_xp)
+        
+            # Registro residente (já sob o lock do usuário): encerra a caça longa
+            db = self.bot.db()
+            del db[uid]["caca_longa_ativa"]
+            self.bot.db_store.mark_dirty(uid)
         
         # Criar embed de resultado
         embed = discord.Embed(
@@ -1089,43 +1049,17 @@ class Economia(commands.Cog):
         except:
             pass
 
-    @tasks.loop(seconds=60)  # Verificar a cada minuto
-    async def check_cacas_longas(self):
-        """Verifica e processa caças longas concluídas"""
-        if not self.bot.is_ready():
-            return
-        
-        db = self.bot.db()
-        agora = datetime.datetime.now()
-        
-        for uid, data in db.items():
-            caca_longa = data.get("caca_longa_ativa")
-            if not caca_longa:
-                continue
-            
-            try:
-                fim_dt = datetime.datetime.fromisoformat(caca_longa["fim"])
-                if agora >= fim_dt:
-                    # Caça longa terminou
-                    user_id = int(uid)
-                    channel_id = caca_longa.get("channel_id")
-                    await self.processar_caca_longa(user_id, channel_id)
-            except (ValueError, KeyError):
-                continue
-
-    @check_cacas_longas.before_loop
-    async def before_check_cacas_longas(self):
+    async def _concluir_caca_longa(self, uid: str, channel_id: int | None):
+        """Chamado pelo agendador no horário de término da caça longa"""
         await self.bot.wait_until_ready()
+        await self.processar_caca_longa(int(uid), channel_id)
 
     def cog_unload(self):
-        self.check_cacas_longas.cancel()
+        self.cacas_longas.stop()
 
     @app_commands.command(name="escolher-trabalho", description="Escolha sua profissão para ganhar almas e XP!")
     async def escolher_trabalho(self, interaction: discord.Interaction):
-        uid = self.ensure_user(interaction.user.id)
-        db = self.bot.db()
-        
-        trabalho_atual = db[uid].get("trabalho_atual")
+        trabalho_atual = self.registro(interaction.user.id)["trabalho_atual"]
         
         embed = discord.Embed(
             title="💼 Escolha sua Profissão",
@@ -1180,7 +1114,7 @@ class Economia(commands.Cog):
                 db = self.cog_self.bot.db()
                 
                 db[uid]["trabalho_atual"] = trabalho_escolhido
-                self.cog_self.bot.save_db(db)
+                self.cog_self.bot.db_store.mark_dirty(uid)
                 
                 trabalho_info = self.cog_self.trabalhos[trabalho_escolhido]
                 
@@ -1219,62 +1153,55 @@ class Economia(commands.Cog):
 
     @app_commands.command(name="trabalhar", description="Trabalhe e ganhe almas e XP!")
     async def trabalhar(self, interaction: discord.Interaction):
-        uid = self.ensure_user(interaction.user.id)
-        db = self.bot.db()
-        
-        trabalho_atual = db[uid].get("trabalho_atual")
-        
-        # Verificar se o usuário escolheu uma profissão
-        if not trabalho_atual or trabalho_atual not in self.trabalhos:
-            embed = discord.Embed(
-                title="❌ Sem Profissão",
-                description="Você ainda não escolheu uma profissão!\n"
-                          "Use `/escolher-trabalho` para selecionar sua profissão primeiro.",
-                color=discord.Color.red()
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+        uid = str(interaction.user.id)
+        # Cooldown verificado em memória, antes do lock e do banco
+        remaining = self.cooldowns.restante(uid, "trabalho")
+        if remaining:
+            await interaction.response.send_message(embed=self._embed_cooldown("trabalho", remaining), ephemeral=True)
             return
+
+        async with self.bot.locks.hold(uid):
+            # Confere de novo: outro comando do usuário pode ter iniciado o cooldown enquanto esperava o lock
+            remaining = self.cooldowns.restante(uid, "trabalho")
+            if remaining:
+                await interaction.response.send_message(embed=self._embed_cooldown("trabalho", remaining), ephemeral=True)
+                return
+
+            self.ensure_user(uid)
+            db = self.bot.db()
         
-        # Verificar cooldown
-        last_trabalho = db[uid].get("last_trabalho")
-        now = datetime.datetime.now()
+            trabalho_atual = db[uid].get("trabalho_atual")
         
-        if last_trabalho:
-            last_trabalho_dt = datetime.datetime.fromisoformat(last_trabalho)
-            time_diff = (now - last_trabalho_dt).total_seconds()
-            
-            if time_diff < self.trabalho_cooldown:
-                remaining = self.trabalho_cooldown - time_diff
-                hours = int(remaining // 3600)
-                minutes = int((remaining % 3600) // 60)
-                seconds = int(remaining % 60)
-                
+            # Verificar se o usuário escolheu uma profissão
+            if not trabalho_atual or trabalho_atual not in self.trabalhos:
                 embed = discord.Embed(
-                    title="⏰ Descansando",
-                    description=f"Você está cansado de trabalhar!\n"
-                              f"Poderá trabalhar novamente em: **{hours}h {minutes}m {seconds}s**",
-                    color=discord.Color.orange()
+                    title="❌ Sem Profissão",
+                    description="Você ainda não escolheu uma profissão!\n"
+                              "Use `/escolher-trabalho` para selecionar sua profissão primeiro.",
+                    color=discord.Color.red()
                 )
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
         
-        # Processar trabalho
-        trabalho_info = self.trabalhos[trabalho_atual]
-        souls_ganhos = random.randint(trabalho_info["souls_min"], trabalho_info["souls_max"])
-        xp_ganho = random.randint(trabalho_info["xp_min"], trabalho_info["xp_max"])
+            registro = db[uid]
         
-        # Adicionar recompensas
-        self.add_soul(interaction.user.id, souls_ganhos)
-        leveled_up, new_level = self.add_xp(interaction.user.id, xp_ganho)
+            # Processar trabalho
+            trabalho_info = self.trabalhos[trabalho_atual]
+            souls_ganhos = random.randint(trabalho_info["souls_min"], trabalho_info["souls_max"])
+            xp_ganho = random.randint(trabalho_info["xp_min"], trabalho_info["xp_max"])
         
-        # Atualizar last_trabalho
-        db = self.bot.db()
-        db[uid]["last_trabalho"] = now.isoformat()
+            # Adicionar recompensas
+            self.add_soul(interaction.user.id, souls_ganhos, "trabalho")
+            leveled_up, new_level = self.add_xp(interaction.user.id, xp_ganho)
+        
+            # Atualizar last_trabalho
+            db = self.bot.db()
+            self.cooldowns.iniciar(uid, "trabalho", registro)
         
-        # Atualizar progresso de missões
-        self.update_missao_progresso(db, uid, "trabalhar", 1)
+            # Atualizar progresso de missões
+            self.update_missao_progresso(db, uid, "trabalhar", 1)
         
-        self.bot.save_db(db)
+            self.bot.db_store.mark_dirty(uid)
         
         # Mensagens aleatórias de trabalho
         mensagens_trabalho = [
@@ -1,6 +1,5 @@
 # gf.py testando banco de dados simples de pessoas e relacionamentos
 
-import json
 import os
 import discord
 from discord.ext import commands
@@ -8,6 +7,8 @@ from discord import app_commands
 from datetime import datetime
 from uuid import uuid4
 
+from core import codec
+
 # ==============================
 # arquivos
 # ==============================
@@ -23,12 +24,12 @@ ARQ_LOGS = "logs.txt"
 def carregar(arquivo):
     if not os.path.exists(arquivo):
         return []
-    with open(arquivo, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(arquivo, "rb") as f:
+        return codec.loads(f.read())
 
 def salvar(arquivo, dados):
-    with open(arquivo, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=4, ensure_ascii=False)
+    with open(arquivo, "wb") as f:
+        f.write(codec.dumps(dados))
 
 def log(msg):
     with open(ARQ_LOGS, "a", encoding="utf-8") as f:
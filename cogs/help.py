@@ -233,13 +233,18 @@ class Help(commands.Cog):
             color=discord.Color.green()
         )
         embed_mercado.add_field(
-            name="/mercado",
-            value="**Acessa:** Todas as listagens de itens\n**Ofertas:** De outros jogadores\n**Sistema:** Sem taxa (negociação direta)",
+            name="/mercado vender · /mercado comprar",
+            value="**Abre:** Uma ordem de venda ou de compra com preço por unidade\n**Custódia:** Itens/almas ficam reservados até a ordem fechar\n**Taxa:** 5% do valor, paga por quem vende",
+            inline=False
+        )
+        embed_mercado.add_field(
+            name="/mercado ver · /mercado ordens · /mercado cancelar · /mercado historico",
+            value="Livro de ofertas de um item, suas ordens abertas, cancelamento (devolve a custódia) e seus últimos negócios",
             inline=False
         )
         embed_mercado.add_field(
             name="Como Funciona:",
-            value="1️⃣ Veja ofertas de outros players\n2️⃣ Negocie preço diretamente\n3️⃣ Confirme a transação\n4️⃣ Itens são transferidos\n\n**Taxa:** 5% em todas as transações",
+            value="1️⃣ Coloque uma ordem com o preço que aceita\n2️⃣ Ela fecha na hora com a melhor oferta do outro lado\n3️⃣ O que sobrar fica no livro, por ordem de preço e chegada\n4️⃣ Itens e almas são entregues automaticamente",
             inline=False
         )
         embed_mercado.set_footer(text="🌙 Rede Exilium • /help")
@@ -257,8 +262,13 @@ class Help(commands.Cog):
             inline=False
         )
         embed_rank.add_field(
-            name="/top-tempo",
-            value="**Mostra:** Top 10 membros em calls\n**Ordenação:** Tempo total em voz\n**Atualização:** A cada 6 horas",
+            name="/top-tempo [periodo]",
+            value="**Mostra:** Top 10 membros em calls\n**Ordenação:** Tempo total em voz, ou hoje/esta semana/este mês (zeram na virada do dia, da semana e do mês)\n**Atualização:** Em tempo real",
+            inline=False
+        )
+        embed_rank.add_field(
+            name="/top-canais [periodo]",
+            value="**Mostra:** Canais de voz mais movimentados\n**Períodos:** Últimas 24h, 7 dias ou 30 dias (janelas móveis, contadas a partir de agora; não zeram como as do /top-tempo)\n**Atualização:** Em tempo real",
             inline=False
         )
         embed_rank.set_footer(text="🌙 Rede Exilium • /help")
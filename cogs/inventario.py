@@ -1,131 +1,15 @@
 import discord
-import json
-from pathlib import Path
 from discord import app_commands
 from discord.ext import commands
 
+from core.catalogo import get_catalog
+
 
 class Inventario(commands.Cog):
     """Sistema de Inventário e Gerenciamento de Items"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.data_path = Path("data")
-        self.inventario_file = self.data_path / "inventario.json"
-        self.economia_file = self.data_path / "economia.json"
-    
-    def load_json(self, file_path):
-        """Carrega dados de um arquivo JSON"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
-    
-    def save_json(self, file_path, data):
-        """Salva dados em um arquivo JSON"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    def get_user_inventory(self, user_id: str):
-        """Obtém inventário do usuário ou cria novo"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        
-        if user_id_str not in inventario.get("usuarios", {}):
-            inventario["usuarios"] = inventario.get("usuarios", {})
-            inventario["usuarios"][user_id_str] = {
-                "itens": {},
-                "equipados": {},
-                "almas": 0,
-                "created_at": ""
-            }
-            self.save_json(self.inventario_file, inventario)
-        
-        return inventario["usuarios"][user_id_str]
-    
-    def add_item(self, user_id: str, item_id: str, quantidade: int = 1):
-        """Adiciona item ao inventário"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        user_inv = self.get_user_inventory(user_id)
-        
-        if item_id not in user_inv["itens"]:
-            user_inv["itens"][item_id] = 0
-        
-        user_inv["itens"][item_id] += quantidade
-        inventario["usuarios"][user_id_str] = user_inv
-        self.save_json(self.inventario_file, inventario)
-        return True
-    
-    def remove_item(self, user_id: str, item_id: str, quantidade: int = 1) -> bool:
-        """Remove item do inventário se existir em quantidade suficiente"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        user_inv = self.get_user_inventory(user_id)
-        
-        if item_id not in user_inv["itens"] or user_inv["itens"][item_id] < quantidade:
-            return False
-        
-        user_inv["itens"][item_id] -= quantidade
-        if user_inv["itens"][item_id] == 0:
-            del user_inv["itens"][item_id]
-        
-        inventario["usuarios"][user_id_str] = user_inv
-        self.save_json(self.inventario_file, inventario)
-        return True
-    
-    def equip_item(self, user_id: str, item_id: str) -> bool:
-        """Equipa um item passivo"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        user_inv = self.get_user_inventory(user_id)
-        
-        if item_id in user_inv["itens"] and user_inv["itens"][item_id] > 0:
-            user_inv["equipados"][item_id] = True
-            inventario["usuarios"][user_id_str] = user_inv
-            self.save_json(self.inventario_file, inventario)
-            return True
-        return False
-    
-    def unequip_item(self, user_id: str, item_id: str) -> bool:
-        """Desequipa um item"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        user_inv = self.get_user_inventory(user_id)
-        
-        if item_id in user_inv["equipados"]:
-            del user_inv["equipados"][item_id]
-            inventario["usuarios"][user_id_str] = user_inv
-            self.save_json(self.inventario_file, inventario)
-            return True
-        return False
-    
-    def get_almas(self, user_id: str) -> int:
-        """Obtém quantidade de almas do usuário"""
-        user_inv = self.get_user_inventory(user_id)
-        return user_inv.get("almas", 0)
-    
-    def add_almas(self, user_id: str, quantidade: int):
-        """Adiciona almas ao usuário"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        user_inv = self.get_user_inventory(user_id)
-        user_inv["almas"] = user_inv.get("almas", 0) + quantidade
-        inventario["usuarios"][user_id_str] = user_inv
-        self.save_json(self.inventario_file, inventario)
-    
-    def remove_almas(self, user_id: str, quantidade: int) -> bool:
-        """Remove almas se tiver quantidade suficiente"""
-        user_inv = self.get_user_inventory(user_id)
-        if user_inv.get("almas", 0) >= quantidade:
-            inventario = self.load_json(self.inventario_file)
-            user_id_str = str(user_id)
-            user_inv["almas"] -= quantidade
-            inventario["usuarios"][user_id_str] = user_inv
-            self.save_json(self.inventario_file, inventario)
-            return True
-        return False
     
     def get_cor_embed(self, raridade: str) -> int:
         """Retorna cor do embed baseado na raridade"""
@@ -143,11 +27,11 @@ class Inventario(commands.Cog):
     @app_commands.command(name="inventario", description="Veja seu inventário")
     async def inventario(self, interaction: discord.Interaction):
         """Mostra inventário do usuário"""
-        economia = self.load_json(self.economia_file)
-        user_inv = self.get_user_inventory(interaction.user.id)
+        catalogo = get_catalog()
+        user_inv = self.bot.inventarios.get(interaction.user.id)
         
         itens = user_inv.get("itens", {})
-        almas = user_inv.get("almas", 0)
+        almas = self.bot.ledger.saldo(interaction.user.id)
         
         if not itens:
             embed = discord.Embed(
@@ -162,20 +46,17 @@ class Inventario(commands.Cog):
         # Organizar itens por raridade
         itens_por_raridade = {}
         
-        for categoria in ["itens_craft", "itens_forja", "itens_passivos", "loja_items"]:
-            cat_items = economia.get(categoria, {})
-            for item_id, item_data in cat_items.items():
-                if item_id in itens:
-                    raridade = item_data.get("raridade", "comum")
-                    if raridade not in itens_por_raridade:
-                        itens_por_raridade[raridade] = []
-                    
-                    emoji = item_data.get("emoji", "⭐")
-                    nome = item_data.get("nome", item_id)
-                    qtd = itens[item_id]
-                    equipado = "✅" if user_inv.get("equipados", {}).get(item_id) else ""
-                    
-                    itens_por_raridade[raridade].append(f"{emoji} **{nome}** x{qtd} {equipado}")
+        # Só os itens do usuário, cada um com uma busca no índice do catálogo
+        for item_id, qtd in itens.items():
+            catalogo_item = catalogo.get(item_id)
+            if not catalogo_item:
+                continue
+            item_data = catalogo_item.dados
+            emoji = item_data.get("emoji", "⭐")
+            nome = item_data.get("nome", item_id)
+            equipado = "✅" if user_inv.get("equipados", {}).get(item_id) else ""
+            
+            itens_por_raridade.setdefault(catalogo_item.raridade, []).append(f"{emoji} **{nome}** x{qtd} {equipado}")
         
         embed = discord.Embed(
             title="📦 Seu Inventário",
@@ -208,10 +89,8 @@ class Inventario(commands.Cog):
     @app_commands.describe(item="ID do item para equipar")
     async def equipar(self, interaction: discord.Interaction, item: str):
         """Equipa um item passivo"""
-        economia = self.load_json(self.economia_file)
-        
         # Procurar item em passivos
-        passivos = economia.get("itens_passivos", {})
+        passivos = get_catalog().categoria("itens_passivos")
         if item not in passivos:
             await interaction.response.send_message(
                 "❌ Item não é um equipável válido!",
@@ -219,7 +98,10 @@ class Inventario(commands.Cog):
             )
             return
         
-        if self.equip_item(interaction.user.id, item):
+        async with self.bot.inventarios.transaction(interaction.user.id) as tx:
+            equipou = tx.equip(item)
+        
+        if equipou:
             item_data = passivos[item]
             emoji = item_data.get("emoji", "⭐")
             nome = item_data.get("nome", item)
@@ -240,10 +122,12 @@ class Inventario(commands.Cog):
     @app_commands.describe(item="ID do item para remover")
     async def desequipar(self, interaction: discord.Interaction, item: str):
         """Desequipa um item"""
-        economia = self.load_json(self.economia_file)
-        passivos = economia.get("itens_passivos", {})
+        passivos = get_catalog().categoria("itens_passivos")
+        
+        async with self.bot.inventarios.transaction(interaction.user.id) as tx:
+            desequipou = tx.unequip(item)
         
-        if self.unequip_item(interaction.user.id, item):
+        if desequipou:
             item_data = passivos.get(item, {})
             emoji = item_data.get("emoji", "⭐")
             nome = item_data.get("nome", item)
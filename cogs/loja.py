@@ -1,11 +1,11 @@
 import discord
-import json
 import random
 import asyncio
 from datetime import datetime, timedelta
 from discord import app_commands
 from discord.ext import commands
-from pathlib import Path
+
+from core.catalogo import get_catalog
 
 
 class Loja(commands.Cog):
@@ -13,95 +13,6 @@ class Loja(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.data_path = Path("data")
-        self.economia_file = self.data_path / "economia.json"
-        self.inventario_file = self.data_path / "inventario.json"
-    
-    def load_json(self, file_path):
-        """Carrega dados de um arquivo JSON"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
-    
-    def save_json(self, file_path, data):
-        """Salva dados em um arquivo JSON"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    def get_user_inventory(self, user_id: str):
-        """Obtém inventário do usuário (chama método de Inventario cog)"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        
-        if user_id_str not in inventario.get("usuarios", {}):
-            inventario["usuarios"] = inventario.get("usuarios", {})
-            inventario["usuarios"][user_id_str] = {
-                "itens": {},
-                "equipados": {},
-                "almas": 0,
-                "created_at": ""
-            }
-            self.save_json(self.inventario_file, inventario)
-        
-        return inventario["usuarios"][user_id_str]
-    
-    def add_item(self, user_id: str, item_id: str, quantidade: int = 1):
-        """Adiciona item ao inventário"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        user_inv = self.get_user_inventory(user_id)
-        
-        if item_id not in user_inv["itens"]:
-            user_inv["itens"][item_id] = 0
-        
-        user_inv["itens"][item_id] += quantidade
-        inventario["usuarios"][user_id_str] = user_inv
-        self.save_json(self.inventario_file, inventario)
-    
-    def remove_item(self, user_id: str, item_id: str, quantidade: int = 1) -> bool:
-        """Remove item do inventário"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        user_inv = self.get_user_inventory(user_id)
-        
-        if item_id not in user_inv["itens"] or user_inv["itens"][item_id] < quantidade:
-            return False
-        
-        user_inv["itens"][item_id] -= quantidade
-        if user_inv["itens"][item_id] == 0:
-            del user_inv["itens"][item_id]
-        
-        inventario["usuarios"][user_id_str] = user_inv
-        self.save_json(self.inventario_file, inventario)
-        return True
-    
-    def get_almas(self, user_id: str) -> int:
-        """Obtém almas do usuário"""
-        user_inv = self.get_user_inventory(user_id)
-        return user_inv.get("almas", 0)
-    
-    def add_almas(self, user_id: str, quantidade: int):
-        """Adiciona almas"""
-        inventario = self.load_json(self.inventario_file)
-        user_id_str = str(user_id)
-        user_inv = self.get_user_inventory(user_id)
-        user_inv["almas"] = user_inv.get("almas", 0) + quantidade
-        inventario["usuarios"][user_id_str] = user_inv
-        self.save_json(self.inventario_file, inventario)
-    
-    def remove_almas(self, user_id: str, quantidade: int) -> bool:
-        """Remove almas se tiver quantidade suficiente"""
-        user_inv = self.get_user_inventory(user_id)
-        if user_inv.get("almas", 0) >= quantidade:
-            inventario = self.load_json(self.inventario_file)
-            user_id_str = str(user_id)
-            user_inv["almas"] -= quantidade
-            inventario["usuarios"][user_id_str] = user_inv
-            self.save_json(self.inventario_file, inventario)
-            return True
-        return False
     
     def get_cor_embed(self, raridade: str):
         """Obtém cor do embed baseado na raridade"""
@@ -119,30 +30,23 @@ class Loja(commands.Cog):
     @app_commands.command(name="loja", description="Acesse a loja e compre itens com almas")
     async def loja(self, interaction: discord.Interaction):
         """Mostra loja de itens"""
-        economia = self.load_json(self.economia_file)
-        loja_items = economia.get("loja_items", {})
+        catalogo = get_catalog()
         
-        user_almas = self.get_almas(interaction.user.id)
+        user_almas = self.bot.ledger.saldo(interaction.user.id)
         
-        # Categorizar itens
+        # Itens já vêm agrupados por tipo no catálogo
         categorias = {
-            "consumivel": [],
-            "lootbox": [],
-            "especial": []
+            tipo: catalogo.loja_por_tipo(tipo)
+            for tipo in ("consumivel", "lootbox", "especial")
         }
         
-        for item_id, item_data in loja_items.items():
-            tipo = item_data.get("tipo", "consumivel")
-            if tipo in categorias:
-                categorias[tipo].append((item_id, item_data))
-        
         # Criar view com buttons
         class LojaView(discord.ui.View):
-            def __init__(self, ctx_self, items, economia):
+            def __init__(self, ctx_self, items, catalogo):
                 super().__init__(timeout=300)
                 self.ctx = ctx_self
                 self.items = items
-                self.economia = economia
+                self.catalogo = catalogo
                 self.current_category = "consumivel"
                 self.page = 0
             
@@ -195,7 +99,7 @@ class Loja(commands.Cog):
                 
                 await interaction.response.edit_message(embed=embed, view=self)
         
-        view = LojaView(self, categorias, economia)
+        view = LojaView(self, categorias, catalogo)
         
         embed = discord.Embed(
             title="🏪 Loja - CONSUMÍVEIS",
@@ -209,8 +113,10 @@ class Loja(commands.Cog):
     @app_commands.describe(item="ID do item para comprar", quantidade="Quantidade (padrão: 1)")
     async def comprar(self, interaction: discord.Interaction, item: str, quantidade: int = 1):
         """Compra um item da loja"""
-        economia = self.load_json(self.economia_file)
-        loja_items = economia.get("loja_items", {})
+        if quantidade <= 0:
+            await interaction.response.send_message("❌ A quantidade precisa ser positiva!", ephemeral=True)
+            return
+        loja_items = get_catalog().categoria("loja_items")
         
         if item not in loja_items:
             await interaction.response.send_message("❌ Item não existe na loja!", ephemeral=True)
@@ -220,9 +126,14 @@ class Loja(commands.Cog):
         valor_unitario = item_data.get("valor", 0)
         custo_total = valor_unitario * quantidade
         
-        user_almas = self.get_almas(interaction.user.id)
+        # Débito das almas e entrega do item numa única transação
+        async with self.bot.inventarios.transaction(interaction.user.id, "loja_compra") as tx:
+            user_almas = tx.almas
+            comprou = tx.remove_almas(custo_total)
+            if comprou:
+                tx.add_item(item, quantidade)
         
-        if user_almas < custo_total:
+        if not comprou:
             embed = discord.Embed(
                 title="❌ Almas insuficientes",
                 description=f"Você tem: **{user_almas}** almas\nNecessário: **{custo_total}** almas",
@@ -231,10 +142,6 @@ class Loja(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        # Fazer compra
-        self.remove_almas(interaction.user.id, custo_total)
-        self.add_item(interaction.user.id, item, quantidade)
-        
         embed = discord.Embed(
             title="✅ Compra realizada!",
             description=f"Você comprou **{quantidade}x** {item_data.get('emoji', '')} **{item_data.get('nome', 'Item')}**",
@@ -249,9 +156,7 @@ class Loja(commands.Cog):
     @app_commands.describe(item="ID do item para craftar")
     async def craft(self, interaction: discord.Interaction, item: str):
         """Crafta um item"""
-        economia = self.load_json(self.economia_file)
-        itens_craft = economia.get("itens_craft", {})
-        user_inv = self.get_user_inventory(interaction.user.id)
+        itens_craft = get_catalog().categoria("itens_craft")
         
         if item not in itens_craft:
             # Mostrar lista de items que podem ser craftados
@@ -293,10 +198,7 @@ class Loja(commands.Cog):
         """Forja uma arma"""
         await interaction.response.defer()
         
-        economia = self.load_json(self.economia_file)
-        itens_forja = economia.get("itens_forja", {})
-        user_inv = self.get_user_inventory(interaction.user.id)
-        user_almas = user_inv.get("almas", 0)
+        itens_forja = get_catalog().categoria("itens_forja")
         
         if item not in itens_forja:
             # Mostrar lista de itens que podem ser forjados
@@ -329,6 +231,17 @@ class Loja(commands.Cog):
         ingredientes = arma_data.get("ingredientes", {})
         taxa_falha = arma_data.get("taxa_falha", 0.15)
         
+        # Verificação, consumo dos recursos e entrega da arma numa única transação
+        async with self.bot.inventarios.transaction(interaction.user.id, "forja") as tx:
+            user_almas = tx.almas
+            faltando = tx.faltando(ingredientes)
+            if user_almas >= custo and not faltando:
+                tx.remove_itens(ingredientes)
+                tx.remove_almas(custo)
+                sucesso = random.random() > taxa_falha
+                if sucesso:
+                    tx.add_item(item, 1)
+        
         # Verificar almas
         if user_almas < custo:
             embed = discord.Embed(
@@ -340,40 +253,23 @@ class Loja(commands.Cog):
             return
         
         # Verificar ingredientes
-        itens_inv = user_inv.get("itens", {})
-        ingredientes_ok = True
-        faltando = []
-        
-        for ing_id, ing_qtd in ingredientes.items():
-            qtd_user = itens_inv.get(ing_id, 0)
-            if qtd_user < ing_qtd:
-                ingredientes_ok = False
-                faltando.append(f"{ing_id}: você tem {qtd_user}, precisa de {ing_qtd}")
-        
-        if not ingredientes_ok:
+        if faltando:
+            linhas = [
+                f"{ing_id}: você tem {qtd_user}, precisa de {ing_qtd}"
+                for ing_id, (qtd_user, ing_qtd) in faltando.items()
+            ]
             embed = discord.Embed(
                 title="❌ Ingredientes insuficientes",
-                description="Você não tem todos os materiais necessários:\n\n" + "\n".join(faltando),
+                description="Você não tem todos os materiais necessários:\n\n" + "\n".join(linhas),
                 color=discord.Color.red()
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
             return
         
-        # Remover recursos
-        for ing_id, ing_qtd in ingredientes.items():
-            self.remove_item(interaction.user.id, ing_id, ing_qtd)
-        self.remove_almas(interaction.user.id, custo)
-        
-        # Esperar um pouco para efeito dramático
+        # Esperar um pouco para efeito dramático (o resultado já foi gravado)
         await asyncio.sleep(2)
         
-        # Determinar sucesso
-        sucesso = random.random() > taxa_falha
-        
         if sucesso:
-            # Adicionar arma
-            self.add_item(interaction.user.id, item, 1)
-            
             embed = discord.Embed(
                 title="✨ FORJA BEM-SUCEDIDA! ✨",
                 description=f"Você criou: **{emoji} {nome_arma}**",
@@ -396,41 +292,32 @@ class Loja(commands.Cog):
     @app_commands.describe(item="ID do item para vender", quantidade="Quantidade (padrão: 1)")
     async def vender(self, interaction: discord.Interaction, item: str, quantidade: int = 1):
         """Vende um item para a loja"""
-        economia = self.load_json(self.economia_file)
-        user_inv = self.get_user_inventory(interaction.user.id)
-        itens_inv = user_inv.get("itens", {})
-        
-        # Procurar item em todas as categorias
-        item_data = None
-        valor_unitario = 0
-        
-        for categoria in ["itens_craft", "itens_forja", "itens_passivos", "loja_items"]:
-            cat_items = economia.get(categoria, {})
-            if item in cat_items:
-                item_data = cat_items[item]
-                raridade = item_data.get("raridade", "comum")
-                valor_base = item_data.get("valor_base", item_data.get("valor", 0))
-                multiplicador = economia.get("raridades", {}).get(raridade, {}).get("valor_multiplicador", 1.0)
-                valor_unitario = int(valor_base * multiplicador * 0.7)  # 70% do valor
-                break
-        
-        if not item_data:
+        if quantidade <= 0:
+            await interaction.response.send_message("❌ A quantidade precisa ser positiva!", ephemeral=True)
+            return
+        # Busca única no catálogo, com o preço de venda (70% do valor) já calculado
+        catalogo_item = get_catalog().get(item)
+        if not catalogo_item:
             await interaction.response.send_message("❌ Item não encontrado!", ephemeral=True)
             return
+        item_data = catalogo_item.dados
+        valor_unitario = catalogo_item.preco_venda
+        
+        valor_total = valor_unitario * quantidade
+        
+        # Retirada do item e crédito das almas numa única transação
+        async with self.bot.inventarios.transaction(interaction.user.id, "loja_venda") as tx:
+            vendeu = tx.remove_item(item, quantidade)
+            if vendeu:
+                tx.add_almas(valor_total)
         
-        if item not in itens_inv or itens_inv[item] < quantidade:
+        if not vendeu:
             await interaction.response.send_message(
                 f"❌ Você não tem {quantidade}x desse item!",
                 ephemeral=True
             )
             return
         
-        valor_total = valor_unitario * quantidade
-        
-        # Fazer venda
-        self.remove_item(interaction.user.id, item, quantidade)
-        self.add_almas(interaction.user.id, valor_total)
-        
         emoji = item_data.get("emoji", "⭐")
         nome = item_data.get("nome", item)
         
@@ -445,46 +332,165 @@ class Loja(commands.Cog):
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
-    @app_commands.command(name="mercado", description="Sistema de mercado entre players")
-    async def mercado(self, interaction: discord.Interaction):
-        """Mercado entre players (em desenvolvimento)"""
+    # ==================== MERCADO ====================
+    
+    mercado = app_commands.Group(name="mercado", description="Mercado de itens entre players")
+    
+    def nome_item(self, item: str) -> str:
+        catalogo_item = get_catalog().get(item)
+        if not catalogo_item:
+            return item
+        return f"{catalogo_item.dados.get('emoji', '⭐')} {catalogo_item.dados.get('nome', item)}"
+    
+    async def abrir_ordem(self, interaction: discord.Interaction, item: str, lado: str, quantidade: int, preco: int):
+        """Abre uma ordem de compra ou venda e mostra o que foi negociado"""
+        if item not in get_catalog():
+            await interaction.response.send_message("❌ Item não encontrado!", ephemeral=True)
+            return
+        if quantidade <= 0 or preco <= 0:
+            await interaction.response.send_message("❌ Quantidade e preço precisam ser positivos!", ephemeral=True)
+            return
+        
+        # Os locks do mercado e do inventário podem demorar mais que o prazo da interação
+        await interaction.response.defer()
+        resultado = await self.bot.mercado.colocar(interaction.user.id, item, lado, preco, quantidade)
+        if resultado is None:
+            if lado == "venda":
+                mensagem = f"❌ Você não tem {quantidade}x desse item!"
+            else:
+                mensagem = f"❌ Almas insuficientes! Necessário: **{preco * quantidade}** almas"
+            await interaction.followup.send(mensagem, ephemeral=True)
+            return
+        
+        ordem, negocios = resultado
+        negociado = ordem["quantidade"] - ordem["restante"]
+        acao = "Venda" if lado == "venda" else "Compra"
         embed = discord.Embed(
-            title="🏪 Mercado Global",
-            description="""
-**Mercado em desenvolvimento!**
-
-Este será um sistema onde você pode:
-- 📤 Colocar itens à venda
-- 📥 Comprar itens de outros players
-- 💰 Negociar preços
-- 📊 Ver histórico de vendas
-
-**Funcionalidades:**
-- Taxa de imposto: 5% das vendas
-- Sistema de oferta/contra-oferta
-- Ranking de vendedores
-- Histórico de transações
-            """,
+            title=f"🏪 {acao} no mercado",
+            description=f"**{ordem['quantidade']}x** {self.nome_item(item)} a **{preco}** almas cada",
             color=0x2ECC71
         )
-        embed.set_footer(text="Volte em breve!")
+        if negocios:
+            linhas = [f"{n['quantidade']}x a {n['preco']} almas" for n in negocios[:10]]
+            embed.add_field(name=f"✅ Negociado: {negociado}x", value="\n".join(linhas), inline=False)
+            if lado == "venda":
+                imposto = sum(n["imposto"] for n in negocios)
+                embed.add_field(name="Imposto do mercado", value=f"{imposto} almas", inline=True)
+        if ordem["restante"] > 0:
+            embed.add_field(
+                name="📋 No livro",
+                value=f"Ordem `#{ordem['id']}`: {ordem['restante']}x aguardando\nCancele com `/mercado cancelar`",
+                inline=False
+            )
         
-        await interaction.response.send_message(embed=embed, ephemeral=False)
+        await interaction.followup.send(embed=embed)
+    
+    @mercado.command(name="vender", description="Coloca um item à venda no mercado")
+    @app_commands.describe(item="ID do item", quantidade="Quantidade", preco="Preço por unidade (almas)")
+    async def mercado_vender(self, interaction: discord.Interaction, item: str, quantidade: int, preco: int):
+        await self.abrir_ordem(interaction, item, "venda", quantidade, preco)
+    
+    @mercado.command(name="comprar", description="Faz uma oferta de compra no mercado")
+    @app_commands.describe(item="ID do item", quantidade="Quantidade", preco="Preço máximo por unidade (almas)")
+    async def mercado_comprar(self, interaction: discord.Interaction, item: str, quantidade: int, preco: int):
+        await self.abrir_ordem(interaction, item, "compra", quantidade, preco)
+    
+    @mercado.command(name="cancelar", description="Cancela uma ordem sua no mercado")
+    @app_commands.describe(ordem="Número da ordem")
+    async def mercado_cancelar(self, interaction: discord.Interaction, ordem: int):
+        await interaction.response.defer(ephemeral=True)
+        cancelada = await self.bot.mercado.cancelar(interaction.user.id, ordem)
+        if cancelada is None:
+            await interaction.followup.send("❌ Você não tem uma ordem aberta com esse número!", ephemeral=True)
+            return
+        devolvido = (
+            f"{cancelada['restante']}x {self.nome_item(cancelada['item'])}"
+            if cancelada["lado"] == "venda"
+            else f"{cancelada['restante'] * cancelada['preco']} almas"
+        )
+        await interaction.followup.send(
+            f"✅ Ordem `#{ordem}` cancelada. Devolvido: **{devolvido}**",
+            ephemeral=True
+        )
+    
+    @mercado.command(name="ver", description="Mostra as ofertas do mercado")
+    @app_commands.describe(item="ID do item (vazio: itens com ofertas)")
+    async def mercado_ver(self, interaction: discord.Interaction, item: str | None = None):
+        mercado = self.bot.mercado
+        
+        if item is None:
+            embed = discord.Embed(
+                title="🏪 Mercado Global",
+                description="Use `/mercado ver item:` para ver o livro de um item",
+                color=0x2ECC71
+            )
+            for item_id in mercado.itens_ativos()[:25]:
+                venda = mercado.melhor(item_id, "venda")
+                compra = mercado.melhor(item_id, "compra")
+                embed.add_field(
+                    name=self.nome_item(item_id),
+                    value=(
+                        f"Venda: **{venda['preco'] if venda else '—'}**\n"
+                        f"Compra: **{compra['preco'] if compra else '—'}**"
+                    ),
+                    inline=True
+                )
+            if not embed.fields:
+                embed.description = "Nenhuma oferta no momento. Use `/mercado vender` para começar!"
+            await interaction.response.send_message(embed=embed)
+            return
+        
+        embed = discord.Embed(title=f"🏪 Mercado: {self.nome_item(item)}", color=0x2ECC71)
+        for lado, titulo in (("venda", "📤 Vendendo"), ("compra", "📥 Comprando")):
+            niveis = mercado.profundidade(item, lado)
+            valor = "\n".join(f"{qtd}x a **{preco}** almas" for preco, qtd in niveis) or "Sem ofertas"
+            embed.add_field(name=titulo, value=valor, inline=True)
+        
+        ultimos = mercado.historico(item=item, limite=5)
+        if ultimos:
+            embed.add_field(
+                name="📊 Últimos negócios",
+                value="\n".join(f"{n['quantidade']}x a {n['preco']} almas <t:{n['ts']}:R>" for n in ultimos),
+                inline=False
+            )
+        await interaction.response.send_message(embed=embed)
+    
+    @mercado.command(name="ordens", description="Mostra suas ordens abertas no mercado")
+    async def mercado_ordens(self, interaction: discord.Interaction):
+        ordens = self.bot.mercado.ordens_do_usuario(interaction.user.id)
+        embed = discord.Embed(title="📋 Suas ordens", color=0x2ECC71)
+        for ordem in ordens[:25]:
+            acao = "Venda" if ordem["lado"] == "venda" else "Compra"
+            embed.add_field(
+                name=f"#{ordem['id']} • {acao}",
+                value=f"{ordem['restante']}/{ordem['quantidade']}x {self.nome_item(ordem['item'])}\na **{ordem['preco']}** almas",
+                inline=True
+            )
+        if not ordens:
+            embed.description = "Você não tem ordens abertas."
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @mercado.command(name="historico", description="Mostra seus últimos negócios no mercado")
+    async def mercado_historico(self, interaction: discord.Interaction):
+        uid = str(interaction.user.id)
+        negocios = self.bot.mercado.historico(uid=uid, limite=10)
+        embed = discord.Embed(title="📊 Seus negócios", color=0x2ECC71)
+        linhas = []
+        for n in negocios:
+            if n["comprador"] == uid:
+                linhas.append(f"📥 Comprou {n['quantidade']}x {self.nome_item(n['item'])} a {n['preco']} <t:{n['ts']}:R>")
+            else:
+                linhas.append(f"📤 Vendeu {n['quantidade']}x {self.nome_item(n['item'])} a {n['preco']} <t:{n['ts']}:R>")
+        embed.description = "\n".join(linhas) or "Você ainda não negociou no mercado."
+        await interaction.response.send_message(embed=embed, ephemeral=True)
     
     @app_commands.command(name="ranking", description="Veja o ranking de almas")
     async def ranking(self, interaction: discord.Interaction):
         """Mostra ranking de almas"""
         await interaction.response.defer()
         
-        inventario = self.load_json(self.inventario_file)
-        usuarios = inventario.get("usuarios", {})
-        
-        # Ordenar por almas
-        ranking = sorted(
-            usuarios.items(),
-            key=lambda x: x[1].get("almas", 0),
-            reverse=True
-        )[:10]
+        # Top 10 direto do índice de ranking, sem ler o inventário, pulando bots como os outros rankings
+        ranking = await self.bot.identities.top_humanos(self.bot.rankings["soul"], interaction.guild)
         
         embed = discord.Embed(
             title="🏆 Ranking de Almas",
@@ -492,14 +498,8 @@ Este será um sistema onde você pode:
             color=0xFFD700
         )
         
-        for idx, (user_id, user_data) in enumerate(ranking, 1):
-            almas = user_data.get("almas", 0)
-            
-            try:
-                user = await self.bot.fetch_user(int(user_id))
-                nome = user.name
-            except:
-                nome = f"User {user_id}"
+        for idx, (user_id, almas) in enumerate(ranking, 1):
+            nome = await self.bot.identities.display_name(user_id, interaction.guild, f"User {user_id}")
             
             medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"#{idx}"
             embed.add_field(
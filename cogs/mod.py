@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
-import asyncio
 import datetime
+import time
 from typing import Optional
 
 
@@ -33,31 +33,99 @@ def parse_duration(text: str) -> Optional[int]:
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Expirações ficam no agendador persistente do bot (data/agendamentos.json)
+        bot.agendamentos.register("remover_cargo", self._timed_remove_role)
+        bot.agendamentos.register("desmutar_call", self._timed_unmute_call)
+        bot.agendamentos.register("soltar", self._timed_release)
 
     # ---------- Helpers ----------
     def check_admin(self, ctx: commands.Context) -> bool:
         return ctx.author.guild_permissions.manage_guild or ctx.author.guild_permissions.manage_roles
 
-    async def _timed_unmute(self, guild: discord.Guild, member: discord.Member, delay: int):
-        await asyncio.sleep(delay)
-        mute_role = discord.utils.get(guild.roles, name="Muted")
+    async def _schedule(self, tipo: str, guild: discord.Guild, member_id: int, delay: int,
+                        chave: tuple = (), **dados) -> None:
+        """Agenda uma expiração; reagendar o mesmo tipo/membro/`chave` substitui a anterior"""
+        job_id = ":".join(str(parte) for parte in (tipo, guild.id, member_id, *chave))
+        await self.bot.agendamentos.schedule(
+            job_id, tipo, time.time() + delay, guild_id=guild.id, member_id=member_id, **dados
+        )
+
+    async def _cancel(self, tipo: str, guild: discord.Guild, member_id: int) -> None:
+        await self.bot.agendamentos.cancel(f"{tipo}:{guild.id}:{member_id}")
+
+    async def _get_member(self, guild_id: int, member_id: int) -> Optional[discord.Member]:
+        """Membro do cache ou buscado na API; None se saiu do servidor.
+
+        Levanta LookupError se o servidor não está disponível, para o
+        agendador tentar de novo mais tarde.
+        """
+        await self.bot.wait_until_ready()
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            raise LookupError(f"servidor {guild_id} indisponível")
+        member = guild.get_member(member_id)
+        if member is not None:
+            return member
         try:
-            if mute_role and mute_role in member.roles:
-                await member.remove_roles(mute_role, reason="Mute temporário expirado")
-        except Exception:
-            pass
-
-    async def _timed_remove_role(self, guild: discord.Guild, member_id: int, role: discord.Role, delay: int):
-        """Remove um role de um membro após `delay` segundos se ainda existir."""
-        await asyncio.sleep(delay)
+            return await guild.fetch_member(member_id)
+        except discord.NotFound:
+            return None
+
+    async def _punido_depois(self, member: discord.Member, desde: Optional[float], campo: str) -> bool:
+        """True se o membro levou outro mute/deafen de servidor depois de `desde`.
+
+        Consulta o registro de auditoria: o job só desfaz a punição que ele
+        mesmo agendou, nunca uma aplicada depois (por comando ou pelo Discord).
+        """
+        if desde is None:
+            return False
+        # Margem para o registro da própria punição, criado antes de `desde`
+        inicio = datetime.datetime.fromtimestamp(desde + 2, datetime.timezone.utc)
         try:
-            member = guild.get_member(member_id)
-            if not member:
-                return
-            if role in member.roles:
-                await member.remove_roles(role, reason="Tempo de role expirado")
-        except Exception:
-            pass
+            async for entrada in member.guild.audit_logs(
+                action=discord.AuditLogAction.member_update, after=inicio, limit=100
+            ):
+                if entrada.target and entrada.target.id == member.id and getattr(entrada.after, campo, None) is True:
+                    return True
+        except discord.Forbidden:
+            # Sem acesso à auditoria: vale o prazo agendado
+            return False
+        return False
+
+    # Os handlers retornam False quando a ação não pôde ser concluída agora;
+    # o agendador mantém o job e tenta de novo mais tarde
+
+    async def _timed_remove_role(self, guild_id: int, member_id: int, role_id: int):
+        """Remove um role de um membro quando o prazo vence, se ainda existir."""
+        member = await self._get_member(guild_id, member_id)
+        if not member:
+            print(f"⚠️ Cargo {role_id} expirado de {member_id}: membro saiu do servidor {guild_id}")
+            return True
+        role = member.guild.get_role(role_id)
+        if role and role in member.roles:
+            await member.remove_roles(role, reason="Tempo de role expirado")
+
+    async def _timed_unmute_call(self, guild_id: int, member_id: int, desde: Optional[float] = None):
+        # O mute de servidor continua valendo se o membro voltar, e só pode
+        # ser tirado com ele conectado: fora da call, tenta de novo depois
+        member = await self._get_member(guild_id, member_id)
+        if not member or not member.voice:
+            print(f"⚠️ Mute de call expirado de {member_id} adiado: membro fora da call")
+            return False
+        if await self._punido_depois(member, desde, "mute"):
+            print(f"⚠️ Mute de call expirado de {member_id} ignorado: há um mute mais recente")
+            return True
+        await member.edit(mute=False, reason="Tempo de mute expirado")
+
+    async def _timed_release(self, guild_id: int, member_id: int, desde: Optional[float] = None):
+        member = await self._get_member(guild_id, member_id)
+        if not member or not member.voice:
+            print(f"⚠️ Soltura de {member_id} adiada: membro fora da call")
+            return False
+        if await self._punido_depois(member, desde, "mute") or await self._punido_depois(member, desde, "deaf"):
+            print(f"⚠️ Soltura de {member_id} ignorada: há uma punição mais recente")
+            return True
+        await member.edit(mute=False, deafen=False, reason="Tempo de prisão expirado")
 
     # ---------- Comandos gerais ----------
     @commands.command(name="tempo")
@@ -90,9 +158,9 @@ class Moderation(commands.Cog):
             secs = parse_duration(duration)
             if not secs:
                 return await ctx.send("❌ Duração inválida. Use s/m/h/d (ex: 10m).")
-            # agendar a remoção em background
+            # agendar a remoção no agendador persistente
             try:
-                asyncio.create_task(self._timed_remove_role(ctx.guild, member.id, role, secs))
+                await self._schedule("remover_cargo", ctx.guild, member.id, secs, chave=(role.id,), role_id=role.id)
                 await ctx.send(f"⏳ O cargo `{role.name}` será removido de {member.mention} em {duration}.")
             except Exception:
                 await ctx.send("⚠️ Falha ao agendar remoção do cargo.")
@@ -105,6 +173,7 @@ class Moderation(commands.Cog):
             return await ctx.send("❌ Cargo não pertence a este servidor.")
         try:
             await member.remove_roles(role, reason=f"Removido por {ctx.author}")
+            await self.bot.agendamentos.cancel(f"remover_cargo:{ctx.guild.id}:{member.id}:{role.id}")
             await ctx.send(f"✅ Cargo `{role.name}` removido de {member.mention}")
         except discord.Forbidden:
             await ctx.send("❌ Não tenho permissão para gerenciar cargos neste membro.")
@@ -203,16 +272,12 @@ class Moderation(commands.Cog):
         except discord.Forbidden:
             return await ctx.send("❌ Não tenho permissão para mutar membros em voice.")
 
-        if duration:
-            secs = parse_duration(duration)
-            if secs:
-                async def _unmute_after():
-                    await asyncio.sleep(secs)
-                    try:
-                        await member.edit(mute=False, reason="Tempo de mute expirado")
-                    except Exception:
-                        pass
-                asyncio.create_task(_unmute_after())
+        secs = parse_duration(duration) if duration else None
+        if secs:
+            await self._schedule("desmutar_call", ctx.guild, member.id, secs, desde=time.time())
+        else:
+            # Mute sem prazo substitui um temporário anterior
+            await self._cancel("desmutar_call", ctx.guild, member.id)
 
     @commands.command(name="unmutecall")
     @commands.has_permissions(mute_members=True)
@@ -221,6 +286,7 @@ class Moderation(commands.Cog):
             return await ctx.send("❌ Membro não está em um canal de voz.")
         try:
             await member.edit(mute=False, reason=reason)
+            await self._cancel("desmutar_call", ctx.guild, member.id)
             await ctx.send(f"🔊 {member.mention} foi desmutado na call.")
         except discord.Forbidden:
             await ctx.send("❌ Não tenho permissão para desmutar membros em voice.")
@@ -242,22 +308,18 @@ class Moderation(commands.Cog):
         except discord.Forbidden:
             await ctx.send("❌ Não tenho permissão para mover/mutar membros.")
 
-        if duration:
-            secs = parse_duration(duration)
-            if secs:
-                async def _release_after():
-                    await asyncio.sleep(secs)
-                    try:
-                        await member.edit(mute=False, deafen=False, reason="Tempo de prisão expirado")
-                    except Exception:
-                        pass
-                asyncio.create_task(_release_after())
+        secs = parse_duration(duration) if duration else None
+        if secs:
+            await self._schedule("soltar", ctx.guild, member.id, secs, desde=time.time())
+        else:
+            await self._cancel("soltar", ctx.guild, member.id)
 
     @commands.command(name="soltar")
     @commands.has_permissions(move_members=True)
     async def cmd_soltar(self, ctx, member: discord.Member, *, reason: str = "Solto"):
         try:
             await member.edit(mute=False, deafen=False, reason=reason)
+            await self._cancel("soltar", ctx.guild, member.id)
             await ctx.send(f"✅ {member.mention} foi solto.")
         except discord.Forbidden:
             await ctx.send("❌ Não tenho permissão para desmutar/desdeafen membros.")
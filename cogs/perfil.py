@@ -1,49 +1,11 @@
 
 import discord
-import json
 import datetime
-from pathlib import Path
 from discord import app_commands
 from discord.ext import commands
 
-# ==============================
-# Funções de Banco de Dados
-# ==============================
-BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR / "data"
-PERFIL_DB_PATH = DATA_DIR / "perfil.json"
-TOP_TEMPO_DB_PATH = DATA_DIR / "top_tempo.json"
-
-def ensure_perfil_db_file() -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if not PERFIL_DB_PATH.exists():
-        PERFIL_DB_PATH.write_text("{}", encoding="utf-8")
-
-def load_perfil_db() -> dict:
-    ensure_perfil_db_file()
-    try:
-        with PERFIL_DB_PATH.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except json.JSONDecodeError:
-        return {}
-
-def save_perfil_db(data: dict) -> None:
-    ensure_perfil_db_file()
-    with PERFIL_DB_PATH.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
-
-def ensure_top_tempo_db_file() -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if not TOP_TEMPO_DB_PATH.exists():
-        TOP_TEMPO_DB_PATH.write_text("{}", encoding="utf-8")
-
-def load_top_tempo_db() -> dict:
-    ensure_top_tempo_db_file()
-    try:
-        with TOP_TEMPO_DB_PATH.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except json.JSONDecodeError:
-        return {}
+from core.esquemas import PERFIL, TOP_TEMPO
+
 
 def format_time(seconds: int):
     hours, remainder = divmod(seconds, 3600)
@@ -58,89 +20,27 @@ class Perfil(commands.Cog):
     def cog_unload(self):
         self.bot.tree.remove_command(self.perfil.name, type=self.perfil.type)
 
-    async def get_user_rank(self, user_id: str, category: str, interaction: discord.Interaction):
-        """Calcula o ranking do usuário em uma categoria específica"""
-        if category == "call":
-            # Importar funções do top_tempo para ler o banco de dados correto
-            db = load_top_tempo_db()
-        else:
+    def get_user_rank(self, user_id: str, category: str) -> tuple[int, float] | None:
+        """Posição e percentil do usuário em uma categoria, lidos do índice de ranking"""
+        if category != "call":
             return None
-        
-        ranking_items = []
-        checked_users = {}  # Cache de usuários já verificados
-        
-        for uid, data in db.items():
-            try:
-                uid_int = int(uid)
-                is_bot = None
-                
-                # Verificar cache primeiro
-                if uid in checked_users:
-                    is_bot = checked_users[uid]
-                else:
-                    member = interaction.guild.get_member(uid_int) if interaction.guild else None
-                    if member:
-                        is_bot = member.bot
-                        checked_users[uid] = is_bot
-                    else:
-                        try:
-                            user = await self.bot.fetch_user(uid_int)
-                            is_bot = user.bot
-                            checked_users[uid] = is_bot
-                        except:
-                            checked_users[uid] = True  # Marcar como bot se não conseguir buscar
-                            continue
-                
-                if not is_bot:
-                    if category == "call":
-                        value = data.get("tempo_total", 0)
-                        ranking_items.append((uid, value))
-                    else:
-                        continue
-            except (ValueError, discord.NotFound, discord.HTTPException):
-                continue
-        
-        # Ordenar por valor (maior primeiro)
-        ranking_items.sort(key=lambda x: x[1], reverse=True)
-        
-        # Encontrar posição do usuário
-        for pos, (uid, _) in enumerate(ranking_items, start=1):
-            if uid == user_id:
-                return pos
-        
-        return None
+        ranking = self.bot.rankings["tempo"]
+        rank = ranking.rank(user_id)
+        if rank is None:
+            return None
+        return rank, ranking.percentile(user_id)
 
     @app_commands.command(name="perfil", description="Mostra um perfil bonito e completo do usuário.")
     async def perfil(self, interaction: discord.Interaction, membro: discord.Member = None):
         membro = membro or interaction.user
-        db = load_perfil_db()
-
         user_id = str(membro.id)
-
-        # Criar conta no DB caso não exista
-        if user_id not in db:
-            db[user_id] = {
-                "sobre": None,
-                "casado_com": None
-            }
-            save_perfil_db(db)
-        else:
-            # Garantir que campos novos existam para usuários antigos
-            defaults = {
-                "sobre": None,
-                "casado_com": None
-            }
-            for key, value in defaults.items():
-                if key not in db[user_id]:
-                    db[user_id][key] = value
-            save_perfil_db(db)
+        perfil = PERFIL.view(self.bot.perfil_store.load().get(user_id))
 
         # SOBRE MIM
-        sobre = db[user_id].get("sobre") or "❌ Nenhum Sobre Mim definido ainda."
+        sobre = perfil["sobre"] or "❌ Nenhum Sobre Mim definido ainda."
 
         # TEMPO TOTAL (ler do banco de top_tempo)
-        top_tempo_db = load_top_tempo_db()
-        tempo_total = top_tempo_db.get(user_id, {}).get("tempo_total", 0)
+        tempo_total = TOP_TEMPO.view(self.bot.top_tempo_store.load().get(user_id))["tempo_total"]
         tempo_total_fmt = format_time(tempo_total)
 
         # TEMPO ATUAL NA CALL
@@ -152,7 +52,7 @@ class Perfil(commands.Cog):
             tempo_atual = "❌ Não está em call"
 
         # Calcular ranking
-        rank_call = await self.get_user_rank(user_id, "call", interaction)
+        rank_call = self.get_user_rank(user_id, "call")
 
         # EMBED
         embed = discord.Embed(
@@ -171,16 +71,15 @@ class Perfil(commands.Cog):
         )
 
         # CASAMENTO
-        casado_com_id = db[user_id].get("casado_com")
+        casado_com_id = perfil["casado_com"]
         if casado_com_id:
-            try:
-                casado_com_user = await self.bot.fetch_user(int(casado_com_id))
+            if await self.bot.identities.resolve(casado_com_id, interaction.guild):
                 embed.add_field(
                     name="💍 Casado(a) com:",
-                    value=casado_com_user.mention,
+                    value=f"<@{casado_com_id}>",
                     inline=True
                 )
-            except:
+            else:
                 embed.add_field(
                     name="💍 Casado(a) com:",
                     value="Usuário não encontrado",
@@ -207,7 +106,10 @@ class Perfil(commands.Cog):
         )
 
         # TEMPO EM CALL
-        rank_call_text = f"🏆 **#{rank_call}**" if rank_call else "❌ Sem ranking"
+        if rank_call:
+            rank_call_text = f"🏆 **#{rank_call[0]}** (acima de {rank_call[1]:.0f}% dos membros)"
+        else:
+            rank_call_text = "❌ Sem ranking"
         embed.add_field(
             name="🎧 Tempo em Call",
             value=f"**Atual:** {tempo_atual}\n**Total:** {tempo_total_fmt}\n**Rank:** {rank_call_text}",
@@ -1,67 +1,17 @@
 # rpg_combate.py - Mini game de RPG com combate contra mobs integrado com economia
 
 import discord
-import json
 import random
-from pathlib import Path
 from discord.ext import commands
 from discord import app_commands
 
 # ==============================
-# Funções de Banco de Dados
+# Recompensas
 # ==============================
-BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR / "data"
-ECONOMIA_DB_PATH = DATA_DIR / "economia.json"
-
-def ensure_economia_db_file() -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if not ECONOMIA_DB_PATH.exists():
-        ECONOMIA_DB_PATH.write_text("{}", encoding="utf-8")
-
-def load_economia_db() -> dict:
-    ensure_economia_db_file()
-    try:
-        with ECONOMIA_DB_PATH.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except json.JSONDecodeError:
-        return {}
-
-def save_economia_db(data: dict) -> None:
-    ensure_economia_db_file()
-    with ECONOMIA_DB_PATH.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
-
-
-def ensure_user_economia(user_id: int):
-    """Garante que o usuário existe no banco de dados de economia"""
-    uid = str(user_id)
-    db = load_economia_db()
-    if uid not in db:
-        db[uid] = {
-            "soul": 0,
-            "xp": 0,
-            "level": 1,
-            "last_daily": None,
-            "last_mine": None,
-            "mine_streak": 0,
-            "daily_streak": 0,
-            "last_caca": None,
-            "caca_streak": 0,
-            "caca_longa_ativa": None,
-            "missoes": [],
-            "missoes_completas": []
-        }
-        save_economia_db(db)
-    return uid
-
-
-def add_soul(user_id: int, amount: int):
-    """Adiciona almas (soul) ao usuário"""
-    uid = ensure_user_economia(user_id)
-    db = load_economia_db()
-    db[uid]["soul"] = db[uid].get("soul", 0) + amount
-    save_economia_db(db)
+def add_soul(bot, user_id: int, amount: int):
+    """Adiciona almas (soul) ao usuário pelo livro-razão da economia"""
+    bot.ledger.creditar(user_id, amount, "rpg")
+    bot.janelas.add("soul", user_id, amount)
 
 
 # ==============================
@@ -260,7 +210,7 @@ class CombateButtons(discord.ui.View):
         )
         
         # Adiciona almas ao jogador
-        add_soul(self.user_id, 100)
+        add_soul(interaction.client, self.user_id, 100)
         
         embed.add_field(
             name="💰 Recompensa",
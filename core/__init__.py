@@ -0,0 +1 @@
+# Módulos compartilhados entre o main.py e os cogs.
@@ -0,0 +1,195 @@
+"""Agendador de prazos baseado em min-heap.
+
+Guarda os prazos pendentes num heap ordenado pelo horário de término e
+mantém uma única task que dorme exatamente até o próximo vencimento, em vez
+de um loop que acorda a cada minuto e varre o banco inteiro procurando o que
+já venceu. `PersistentScheduler` acrescenta um diário em disco para ações
+que precisam sobreviver a reinícios (mutes, cargos temporários, prisão).
+"""
+
+import asyncio
+import heapq
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from core.io_assincrono import Retrato, gravar
+from core.persistencia import read_json, write_json_atomic
+
+
+class DeadlineScheduler:
+    """Executa `callback(chave, dados)` quando o prazo de cada chave vence"""
+
+    def __init__(self, callback: Callable[[str, object], Awaitable[None]]):
+        self.callback = callback
+        # (quando, seq, chave); entradas canceladas ou reagendadas ficam no heap
+        # e são descartadas quando chegam ao topo
+        self._heap: list[tuple[float, int, str]] = []
+        # chave -> (seq, quando, dados) do agendamento válido
+        self._ativos: dict[str, tuple[int, float, object]] = {}
+        self._seq = 0
+        self._acordar = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        # Callbacks em andamento (referência forte até terminarem)
+        self._tarefas: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._ativos)
+
+    def __contains__(self, chave: str) -> bool:
+        return chave in self._ativos
+
+    def schedule(self, chave: str, quando: float, dados=None) -> None:
+        """Agenda (ou reagenda) a chave para o instante `quando` (epoch em segundos)"""
+        self._seq += 1
+        self._ativos[chave] = (self._seq, quando, dados)
+        heapq.heappush(self._heap, (quando, self._seq, chave))
+        # Só precisa acordar a task se o novo prazo passou a ser o próximo
+        if self._heap[0][1] == self._seq:
+            self._acordar.set()
+
+    def cancel(self, chave: str) -> None:
+        self._ativos.pop(chave, None)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _proximo(self) -> tuple[float, int, str] | None:
+        """Topo válido do heap, descartando entradas canceladas/reagendadas"""
+        while self._heap:
+            quando, seq, chave = self._heap[0]
+            ativo = self._ativos.get(chave)
+            if ativo is not None and ativo[0] == seq:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    async def _run(self) -> None:
+        while True:
+            self._acordar.clear()
+            proximo = self._proximo()
+            if proximo is None:
+                await self._acordar.wait()
+                continue
+
+            atraso = proximo[0] - time.time()
+            if atraso > 0:
+                try:
+                    await asyncio.wait_for(self._acordar.wait(), timeout=atraso)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            chave = proximo[2]
+            _, _, dados = self._ativos.pop(chave)
+            # Cada callback roda na sua task: um handler lento (API do Discord)
+            # não atrasa os prazos seguintes
+            tarefa = asyncio.create_task(self.callback(chave, dados), name=chave)
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._terminou)
+
+    def _terminou(self, tarefa: asyncio.Task) -> None:
+        self._tarefas.discard(tarefa)
+        if tarefa.cancelled():
+            return
+        erro = tarefa.exception()
+        if erro is not None:
+            print(f"❌ Erro ao executar agendamento {tarefa.get_name()}: {erro}")
+
+
+class PersistentScheduler:
+    """Agendador de ações com diário em disco, que sobrevive a reinícios.
+
+    Cada ação fica em `path` como `job_id -> {"tipo", "quando", "dados"}` até
+    terminar de executar; no boot, as pendentes são reagendadas e as que
+    venceram com o bot desligado rodam logo em seguida. O `job_id` identifica
+    a ação (ex.: cargo X do membro Y), então reagendar substitui a anterior e
+    os handlers devem ser idempotentes.
+
+    Um handler que não conseguiu concluir a ação (membro fora do cache ou
+    fora da call, erro da API) retorna False ou levanta uma exceção: a ação
+    continua no diário e é tentada de novo a cada `REPETIR` segundos, até
+    `TENTATIVAS` vezes.
+    """
+
+    REPETIR = 15 * 60
+    TENTATIVAS = 96
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._handlers: dict[str, Callable[..., Awaitable[None]]] = {}
+        self._jobs: dict[str, dict] = read_json(self.path)
+        self._prazos = DeadlineScheduler(self._executar)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def register(self, tipo: str, handler: Callable[..., Awaitable[None]]) -> None:
+        """Registra a função chamada com `**dados` quando uma ação do tipo vence"""
+        self._handlers[tipo] = handler
+
+    async def schedule(self, job_id: str, tipo: str, quando: float, **dados) -> None:
+        """Agenda a ação e espera ela chegar ao diário em disco"""
+        self._jobs[job_id] = {"tipo": tipo, "quando": quando, "dados": dados}
+        self._prazos.schedule(job_id, quando)
+        await self._gravar()
+
+    async def cancel(self, job_id: str) -> None:
+        self._prazos.cancel(job_id)
+        if self._jobs.pop(job_id, None) is not None:
+            await self._gravar()
+
+    def start(self) -> None:
+        """Reagenda as ações do diário e inicia o timer (após registrar os handlers)"""
+        for job_id, job in self._jobs.items():
+            self._prazos.schedule(job_id, job["quando"])
+        self._prazos.start()
+
+    def stop(self) -> None:
+        self._prazos.stop()
+
+    async def _gravar(self) -> None:
+        # No pool de I/O; agendamentos seguidos viram uma gravação só
+        await gravar(self.path, write_json_atomic, self.path, Retrato(self._jobs))
+
+    def flush(self) -> None:
+        """Grava o diário direto (no desligamento, depois de fechar o pool)"""
+        write_json_atomic(self.path, self._jobs)
+
+    async def _executar(self, job_id: str, _dados) -> None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        handler = self._handlers.get(job["tipo"])
+        if handler is None:
+            # Tipo que nenhum cog trata mais: sem isso ficaria no diário para sempre
+            print(f"⚠️ Agendamento {job_id} descartado: sem handler para o tipo {job['tipo']}")
+            del self._jobs[job_id]
+            await self._gravar()
+            return
+        concluido = False
+        try:
+            concluido = await handler(**job["dados"]) is not False
+        except Exception as e:
+            print(f"❌ Erro ao executar agendamento {job_id}: {e}")
+        # Se foi reagendado no meio da execução, o novo agendamento prevalece
+        if self._jobs.get(job_id) is not job:
+            return
+        tentativas = job.get("tentativas", 0) + 1
+        if concluido or tentativas >= self.TENTATIVAS:
+            if not concluido:
+                print(f"⚠️ Agendamento {job_id} descartado após {tentativas} tentativas")
+            # Só sai do diário depois de executar
+            del self._jobs[job_id]
+        else:
+            job["tentativas"] = tentativas
+            job["quando"] = time.time() + self.REPETIR
+            self._prazos.schedule(job_id, job["quando"])
+        await self._gravar()
@@ -0,0 +1,229 @@
+"""Agregados por hora do tempo em call, por canal, por usuário e por servidor.
+
+Cada série (um canal, um usuário ou um servidor) é um `array` de inteiros
+com uma posição por hora, usado como buffer circular com a retenção
+configurada. Junto de cada série ficam as somas das janelas deslizantes
+(24h, 7 dias, 30 dias), atualizadas a cada crédito e quando a hora vira, então
+"canal mais movimentado da semana" sai direto das somas, sem varrer eventos.
+
+O arquivo data/analise_voz.json guarda as séries em base64 e é gravado
+quando a hora vira e no desligamento do bot.
+"""
+
+import base64
+import heapq
+import sys
+from array import array
+from pathlib import Path
+
+from core.io_assincrono import Retrato, gravar
+from core.persistencia import read_json, write_json_atomic
+
+# Horas mantidas em cada série
+RETENCAO_HORAS = 31 * 24
+# Janelas deslizantes mantidas pré-somadas (em horas)
+JANELAS = {"dia": 24, "semana": 7 * 24, "mes": 30 * 24}
+# Prefixo da chave de cada tipo de série
+TIPOS = {"canal": "c", "usuario": "u", "servidor": "g"}
+
+
+class VoiceAnalytics:
+    """Agregados por hora de segundos em call, com retenção e janelas pré-somadas"""
+
+    def __init__(self, path: Path, retencao: int = RETENCAO_HORAS):
+        self.path = Path(path)
+        self.retencao = retencao
+        self._janelas = list(JANELAS.values())
+        # chave ("c:<id>", "u:<id>", "g:<id>") -> segundos por hora (buffer circular)
+        self._series: dict[str, array] = {}
+        # chave -> soma de cada janela, na ordem de JANELAS
+        self._somas: dict[str, array] = {}
+        self._hora: int | None = None
+        self._hora_salva: int | None = None
+        # user_id -> [guild_id, channel_id, creditado até]
+        self._presencas: dict[int, list[int]] = {}
+        self._carregar()
+
+    # ---------- Presença nas calls ----------
+    def entrar(self, user_id: int, guild_id: int, channel_id: int, agora: int) -> None:
+        self.sair(user_id, agora)
+        self._presencas[user_id] = [guild_id, channel_id, agora]
+
+    def sair(self, user_id: int, agora: int) -> None:
+        presenca = self._presencas.pop(user_id, None)
+        if presenca is not None:
+            self._creditar(user_id, presenca, agora)
+
+    def checkpoint(self, agora: int) -> None:
+        """Credita o tempo de quem está em call até agora"""
+        for user_id, presenca in self._presencas.items():
+            self._creditar(user_id, presenca, agora)
+        self._avancar(agora // 3600)
+
+    def _creditar(self, user_id: int, presenca: list[int], agora: int) -> None:
+        guild_id, channel_id, inicio = presenca
+        if agora <= inicio:
+            return
+        chaves = (f"c:{channel_id}", f"u:{user_id}", f"g:{guild_id}")
+        self._avancar(agora // 3600)
+        # Divide o intervalo entre as horas que ele atravessa
+        while inicio < agora:
+            hora = inicio // 3600
+            fim = min(agora, (hora + 1) * 3600)
+            self._somar(hora, chaves, fim - inicio)
+            inicio = fim
+        presenca[2] = agora
+
+    # ---------- Buckets ----------
+    def _serie(self, chave: str) -> tuple[array, array]:
+        serie = self._series.get(chave)
+        if serie is None:
+            serie = self._series[chave] = array("I", bytes(4 * self.retencao))
+            self._somas[chave] = array("Q", [0] * len(self._janelas))
+        return serie, self._somas[chave]
+
+    def _somar(self, hora: int, chaves, segundos: int) -> None:
+        idade = self._hora - hora
+        if idade >= self.retencao or idade < 0:
+            return
+        for chave in chaves:
+            serie, somas = self._serie(chave)
+            serie[hora % self.retencao] += segundos
+            for i, janela in enumerate(self._janelas):
+                if idade < janela:
+                    somas[i] += segundos
+
+    def _avancar(self, hora: int) -> None:
+        """Vira a hora: tira das somas as horas que saíram de cada janela e limpa os buckets expirados"""
+        if self._hora is None:
+            self._hora = hora
+            return
+        if hora - self._hora >= self.retencao:
+            # Bot ficou desligado mais que a retenção: tudo expirou
+            self._hora = hora
+            for chave, serie in self._series.items():
+                serie[:] = array("I", bytes(4 * self.retencao))
+                self._somas[chave] = array("Q", [0] * len(self._janelas))
+            return
+        while self._hora < hora:
+            self._hora += 1
+            slot_novo = self._hora % self.retencao
+            for chave, serie in self._series.items():
+                somas = self._somas[chave]
+                for i, janela in enumerate(self._janelas):
+                    somas[i] -= serie[(self._hora - janela) % self.retencao]
+                serie[slot_novo] = 0
+
+    def _recalcular(self) -> None:
+        """Refaz as somas das janelas a partir dos buckets (na carga do arquivo)"""
+        for chave, serie in self._series.items():
+            somas = self._somas[chave]
+            for i, janela in enumerate(self._janelas):
+                somas[i] = sum(serie[(self._hora - idade) % self.retencao] for idade in range(janela))
+
+    # ---------- Consultas ----------
+    def _em_andamento(self, tipo: str, agora: int) -> dict[int, int]:
+        """Segundos de quem está em call ainda não creditados, por id do `tipo`
+
+        Só lê as presenças: as séries continuam intactas até o próximo
+        `checkpoint`, feito pela tarefa periódica.
+        """
+        extras: dict[int, int] = {}
+        for user_id, (guild_id, channel_id, inicio) in self._presencas.items():
+            if agora > inicio:
+                id_ = {"canal": channel_id, "usuario": user_id, "servidor": guild_id}[tipo]
+                extras[id_] = extras.get(id_, 0) + agora - inicio
+        return extras
+
+    def total(self, tipo: str, id_, janela: str, agora: int | None = None) -> int:
+        """Segundos do `tipo`/`id_` na janela; com `agora`, inclui quem está em call"""
+        somas = self._somas.get(f"{TIPOS[tipo]}:{id_}")
+        total = somas[list(JANELAS).index(janela)] if somas is not None else 0
+        if agora is not None:
+            total += self._em_andamento(tipo, agora).get(int(id_), 0)
+        return total
+
+    def top(self, tipo: str, janela: str, n: int = 10, filtro=None, agora: int | None = None) -> list[tuple[int, int]]:
+        """Maiores `tipo` (canal, usuario, servidor) em segundos na janela
+
+        Com `agora`, soma o tempo ainda não creditado de quem está em call.
+        """
+        prefixo = TIPOS[tipo] + ":"
+        i = list(JANELAS).index(janela)
+        extras = self._em_andamento(tipo, agora) if agora is not None else {}
+        candidatos = (
+            (int(chave[len(prefixo):]), somas[i])
+            for chave, somas in self._somas.items()
+            if chave.startswith(prefixo) and somas[i] > 0
+        )
+        if extras:
+            totais = dict(candidatos)
+            for id_, segundos in extras.items():
+                totais[id_] = totais.get(id_, 0) + segundos
+            candidatos = totais.items()
+        if filtro is not None:
+            candidatos = ((id_, total) for id_, total in candidatos if filtro(id_))
+        return heapq.nlargest(n, candidatos, key=lambda item: item[1])
+
+    def por_hora(self, tipo: str, id_, horas: int = 24) -> list[int]:
+        """Segundos por hora das últimas `horas` (da mais antiga para a atual)"""
+        serie = self._series.get(f"{TIPOS[tipo]}:{id_}")
+        horas = min(horas, self.retencao)
+        if serie is None or self._hora is None:
+            return [0] * horas
+        return [serie[(self._hora - idade) % self.retencao] for idade in range(horas - 1, -1, -1)]
+
+    # ---------- Persistência ----------
+    def _carregar(self) -> None:
+        data = read_json(self.path)
+        hora_salva = data.get("hora")
+        if hora_salva is None or data.get("retencao") != self.retencao:
+            return
+        for chave, codificada in data.get("series", {}).items():
+            serie = array("I")
+            serie.frombytes(base64.b64decode(codificada))
+            if data.get("byteorder") != sys.byteorder:
+                serie.byteswap()
+            if len(serie) != self.retencao:
+                continue
+            self._series[chave] = serie
+            self._somas[chave] = array("Q", [0] * len(self._janelas))
+        self._hora = hora_salva
+        self._hora_salva = hora_salva
+        self._recalcular()
+
+    def _retrato(self, force: bool) -> Retrato | None:
+        """Cópia das séries para gravar (None se a hora não virou desde a última gravação)"""
+        if self._hora is None or (not force and self._hora == self._hora_salva):
+            return None
+        return Retrato({
+            "hora": self._hora,
+            "retencao": self.retencao,
+            "series": {chave: serie for chave, serie in self._series.items() if any(serie)},
+        })
+
+    @staticmethod
+    def _gravar(path: Path, dados: dict) -> None:
+        dados["byteorder"] = sys.byteorder
+        dados["series"] = {
+            chave: base64.b64encode(serie.tobytes()).decode("ascii")
+            for chave, serie in dados["series"].items()
+        }
+        write_json_atomic(path, dados)
+
+    def flush(self, force: bool = False) -> None:
+        """Grava as séries quando a hora virou desde a última gravação (ou se `force`)"""
+        retrato = self._retrato(force)
+        if retrato is None:
+            return
+        self._gravar(self.path, retrato.abrir())
+        self._hora_salva = self._hora
+
+    async def flush_async(self) -> None:
+        """Como `flush()`, mas codifica e grava as séries no pool de I/O"""
+        retrato = self._retrato(False)
+        if retrato is None:
+            return
+        hora = self._hora
+        await gravar(self.path, self._gravar, self.path, retrato)
+        self._hora_salva = hora
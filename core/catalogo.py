@@ -0,0 +1,104 @@
+"""Catálogo de itens (dados estáticos de data/economia.json) em cache.
+
+O catálogo é carregado uma vez e indexado: busca por id em todas as
+categorias, preço de venda já calculado e itens agrupados por raridade.
+`get_catalog()` só relê o arquivo quando o mtime muda, então os comandos da
+loja e do inventário não reprocessam o JSON a cada uso. Os dados são
+congelados (mappings somente leitura e tuplas) para ninguém alterar o cache
+sem querer.
+"""
+
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+from core.config import BASE_DIR
+from core.persistencia import read_json
+
+ECONOMIA_PATH = BASE_DIR / "data" / "economia.json"
+
+# Categorias com itens, na ordem de precedência quando um id aparece em mais de uma
+CATEGORIAS = ("itens_craft", "itens_forja", "itens_passivos", "loja_items")
+# A loja paga 70% do valor do item
+FATOR_VENDA = 0.7
+
+
+def _congelar(valor):
+    if isinstance(valor, dict):
+        return MappingProxyType({chave: _congelar(v) for chave, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+class CatalogItem(NamedTuple):
+    id: str
+    categoria: str
+    dados: Mapping
+    raridade: str
+    preco_venda: int
+
+
+class ItemCatalog:
+    """Catálogo imutável e pré-indexado de itens"""
+
+    def __init__(self, data: dict):
+        self.raridades: Mapping = _congelar(data.get("raridades", {}))
+        self.configuracoes: Mapping = _congelar(data.get("configuracoes", {}))
+        self._categorias: dict[str, Mapping] = {
+            categoria: _congelar(data.get(categoria, {})) for categoria in CATEGORIAS
+        }
+
+        itens: dict[str, CatalogItem] = {}
+        por_raridade: dict[str, list[str]] = {}
+        for categoria in CATEGORIAS:
+            for item_id, dados in self._categorias[categoria].items():
+                if item_id in itens:
+                    continue
+                raridade = dados.get("raridade", "comum")
+                valor_base = dados.get("valor_base", dados.get("valor", 0))
+                multiplicador = self.raridades.get(raridade, {}).get("valor_multiplicador", 1.0)
+                itens[item_id] = CatalogItem(
+                    item_id, categoria, dados, raridade, int(valor_base * multiplicador * FATOR_VENDA)
+                )
+                por_raridade.setdefault(raridade, []).append(item_id)
+        self._itens = MappingProxyType(itens)
+        self._por_raridade = MappingProxyType({r: tuple(ids) for r, ids in por_raridade.items()})
+
+        loja_por_tipo: dict[str, list[tuple[str, Mapping]]] = {}
+        for item_id, dados in self._categorias["loja_items"].items():
+            loja_por_tipo.setdefault(dados.get("tipo", "consumivel"), []).append((item_id, dados))
+        self._loja_por_tipo = MappingProxyType({t: tuple(itens) for t, itens in loja_por_tipo.items()})
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._itens
+
+    def get(self, item_id: str) -> CatalogItem | None:
+        """Busca um item em todas as categorias"""
+        return self._itens.get(item_id)
+
+    def categoria(self, nome: str) -> Mapping:
+        """Itens de uma categoria (itens_craft, itens_forja, itens_passivos, loja_items)"""
+        return self._categorias[nome]
+
+    def por_raridade(self, raridade: str) -> tuple[str, ...]:
+        return self._por_raridade.get(raridade, ())
+
+    def loja_por_tipo(self, tipo: str) -> tuple[tuple[str, Mapping], ...]:
+        """Itens da loja de um tipo (consumivel, lootbox, especial)"""
+        return self._loja_por_tipo.get(tipo, ())
+
+
+_cache: tuple[int, ItemCatalog] | None = None
+
+
+def get_catalog(path: Path = ECONOMIA_PATH) -> ItemCatalog:
+    """Retorna o catálogo em cache, recarregando só se o arquivo mudou"""
+    global _cache
+    try:
+        mtime = Path(path).stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = -1
+    if _cache is None or _cache[0] != mtime:
+        _cache = (mtime, ItemCatalog(read_json(path)))
+    return _cache[1]
@@ -0,0 +1,180 @@
+"""Codificação JSON dos arquivos em data/.
+
+Usa o codec mais rápido instalado (orjson, depois ujson) e cai para o `json`
+da biblioteca padrão se nenhum estiver disponível; `JSON_BACKEND` força um
+deles. Os arquivos são gravados compactos (sem indentação nem espaços), o que
+reduz tamanho e tempo de gravação pela metade em relação ao `indent=2`. Para
+ler um arquivo com calma, exporte uma cópia formatada:
+
+    python -m core.codec exportar data/db.json [destino]
+
+Comparação dos codecs com 1k/10k/100k registros parecidos com os do db.json:
+
+    python -m core.codec benchmark
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from core.config import resolve_setting
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - dependência opcional
+    ujson = None
+
+
+# ---------- Implementações ----------
+def _json_dumps(data, pretty: bool) -> bytes:
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(raw: bytes | str):
+    return json.loads(raw)
+
+
+def _orjson_dumps(data, pretty: bool) -> bytes:
+    opcoes = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+    try:
+        return orjson.dumps(data, option=opcoes)
+    except TypeError:
+        # Tipos que o orjson não aceita (ex.: inteiros acima de 64 bits)
+        return _json_dumps(data, pretty)
+
+
+def _ujson_dumps(data, pretty: bool) -> bytes:
+    try:
+        texto = ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False, indent=2 if pretty else 0)
+    except (TypeError, OverflowError):
+        return _json_dumps(data, pretty)
+    return texto.encode("utf-8")
+
+
+# nome -> (dumps, loads), em ordem de preferência
+BACKENDS: dict[str, tuple[Callable, Callable]] = {}
+if orjson is not None:
+    BACKENDS["orjson"] = (_orjson_dumps, orjson.loads)
+if ujson is not None:
+    BACKENDS["ujson"] = (_ujson_dumps, ujson.loads)
+BACKENDS["json"] = (_json_dumps, _json_loads)
+
+
+def _escolher() -> str:
+    nome = str(resolve_setting("JSON_BACKEND", "")).lower()
+    if nome and nome not in BACKENDS:
+        print(f"⚠️ JSON_BACKEND={nome} não está instalado; usando {next(iter(BACKENDS))}")
+    return nome if nome in BACKENDS else next(iter(BACKENDS))
+
+
+BACKEND = _escolher()
+_dumps, _loads = BACKENDS[BACKEND]
+
+
+# ---------- API ----------
+def dumps(data, pretty: bool = False) -> bytes:
+    """Serializa em UTF-8: compacto por padrão, indentado com `pretty`"""
+    return _dumps(data, pretty)
+
+
+def dumps_str(data, pretty: bool = False) -> str:
+    return dumps(data, pretty).decode("utf-8")
+
+
+def loads(raw: bytes | str):
+    """Lê JSON; erros de formato levantam ValueError (como json.JSONDecodeError)"""
+    return _loads(raw)
+
+
+# ---------- Linha de comando ----------
+def exportar(origem: Path, destino: Path | None = None) -> None:
+    """Grava (ou mostra) uma cópia indentada de um arquivo de dados"""
+    from core.persistencia import read_json
+
+    texto = dumps_str(read_json(origem), pretty=True)
+    if destino is None:
+        sys.stdout.write(texto + "\n")
+    else:
+        destino.write_text(texto + "\n", encoding="utf-8")
+        print(f"✅ {origem.name} exportado para {destino}")
+
+
+def _registros(quantidade: int) -> dict:
+    """Usuários fictícios no formato do db.json"""
+    rng = random.Random(quantidade)
+    return {
+        str(10**17 + rng.randrange(10**17)): {
+            "xp": rng.randrange(100_000),
+            "level": rng.randrange(1, 80),
+            "last_daily": rng.randrange(1_700_000_000, 1_800_000_000),
+            "last_mine": rng.randrange(1_700_000_000, 1_800_000_000),
+            "caca_streak": rng.randrange(10),
+            "missoes": [
+                {"id": f"m{n}", "tipo": "mensagens", "meta": 50, "progresso": rng.randrange(50), "concluida": False}
+                for n in range(3)
+            ],
+            "bio": "Exilado à procura de almas perdidas ☠️",
+        }
+        for _ in range(quantidade)
+    }
+
+
+def _medir(func: Callable, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def benchmark(tamanhos=(1_000, 10_000, 100_000)) -> None:
+    """Vazão de serialização e leitura de cada codec instalado"""
+    variantes = [(nome, dumps_, loads_, False) for nome, (dumps_, loads_) in BACKENDS.items()]
+    variantes.append(("json indent=2", _json_dumps, _json_loads, True))
+
+    print(f"Codec ativo: {BACKEND}")
+    print(f"{'registros':>9}  {'codec':<14} {'tamanho':>9} {'dumps':>9} {'loads':>9} {'MB/s dumps':>11} {'MB/s loads':>11}")
+    for quantidade in tamanhos:
+        dados = _registros(quantidade)
+        repeticoes = 5 if quantidade <= 10_000 else 2
+        for nome, dumps_, loads_, pretty in variantes:
+            raw = dumps_(dados, pretty)
+            t_dumps = _medir(lambda: dumps_(dados, pretty), repeticoes)
+            t_loads = _medir(lambda: loads_(raw), repeticoes)
+            mb = len(raw) / 1_000_000
+            print(
+                f"{quantidade:>9}  {nome:<14} {mb:>7.1f}MB {t_dumps * 1000:>7.1f}ms {t_loads * 1000:>7.1f}ms"
+                f" {mb / t_dumps:>11.0f} {mb / t_loads:>11.0f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Codec JSON dos arquivos de dados")
+    sub = parser.add_subparsers(dest="acao", required=True)
+    exp = sub.add_parser("exportar", help="Cópia indentada de um arquivo, para leitura")
+    exp.add_argument("origem", type=Path)
+    exp.add_argument("destino", type=Path, nargs="?")
+    bench = sub.add_parser("benchmark", help="Compara os codecs instalados")
+    bench.add_argument("--tamanhos", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    if args.acao == "exportar":
+        exportar(args.origem, args.destino)
+    else:
+        benchmark(args.tamanhos)
+
+
+if __name__ == "__main__":
+    main()
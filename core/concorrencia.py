@@ -0,0 +1,75 @@
+"""Locks por usuário para as alterações da economia.
+
+Os comandos leem e alteram o registro do usuário no banco residente e, entre
+uma coisa e outra, costumam esperar o Discord (`send_message`, `sleep` da
+caçada, botão de confirmação). Sem lock, duas interações do mesmo usuário
+podem passar pela mesma verificação (cooldown, saldo) antes de qualquer uma
+gravar. Com `hold(uid)` as alterações de um mesmo usuário são feitas uma de
+cada vez, enquanto usuários diferentes continuam em paralelo.
+
+Transferências seguram os dois usuários com `hold(remetente, destinatario)`;
+os locks são sempre adquiridos na mesma ordem (por id), então duas
+transferências cruzadas não travam uma à outra.
+
+Cada usuário tem também um contador de versão, incrementado por
+`alterado()` quando uma alteração de fato é gravada (lançamento no
+livro-razão, commit de uma transação do inventário). Quem decide algo fora
+do lock (ex.: o pedido de transferência, que só é confirmado depois) guarda
+a versão e, já com o lock, confere com `mudou()` se o usuário foi alterado
+no meio tempo.
+
+Os locks só existem enquanto alguém segura ou espera: o último a sair
+descarta o lock do usuário, então o dicionário não cresce com cada usuário
+que já usou o bot.
+"""
+
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+
+
+class UserLocks:
+    """Um asyncio.Lock e um contador de versão por usuário"""
+
+    def __init__(self):
+        # uid -> [lock, quantos seguram ou esperam]
+        self._locks: dict[str, list] = {}
+        self._versoes: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Usuários com lock em uso"""
+        return len(self._locks)
+
+    def versao(self, user_id) -> int:
+        return self._versoes.get(str(user_id), 0)
+
+    def alterado(self, user_id) -> None:
+        """Registra que uma alteração do usuário foi gravada"""
+        uid = str(user_id)
+        self._versoes[uid] = self.versao(uid) + 1
+
+    def mudou(self, user_id, versao: int) -> bool:
+        """True se o usuário foi alterado desde que `versao` foi lida"""
+        return self.versao(user_id) != versao
+
+    @asynccontextmanager
+    async def hold(self, *user_ids):
+        """Segura os locks dos usuários (em ordem de id) durante o bloco"""
+        uids = sorted({str(user_id) for user_id in user_ids}, key=lambda uid: (len(uid), uid))
+        async with AsyncExitStack() as stack:
+            for uid in uids:
+                stack.callback(self._soltar, uid)
+                await stack.enter_async_context(self._reservar(uid))
+            yield
+
+    def _reservar(self, uid: str) -> asyncio.Lock:
+        entrada = self._locks.get(uid)
+        if entrada is None:
+            entrada = self._locks[uid] = [asyncio.Lock(), 0]
+        entrada[1] += 1
+        return entrada[0]
+
+    def _soltar(self, uid: str) -> None:
+        entrada = self._locks[uid]
+        entrada[1] -= 1
+        if entrada[1] == 0:
+            del self._locks[uid]
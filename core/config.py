@@ -0,0 +1,26 @@
+"""Leitura das configurações opcionais do bot."""
+
+import json
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+CONFIG_PATH = BASE_DIR / "config.json"
+
+
+def resolve_setting(name: str, default):
+    """Lê uma configuração opcional da variável de ambiente ou do config.json"""
+    value = os.getenv(name)
+    if value is not None:
+        return value
+
+    if CONFIG_PATH.exists():
+        with CONFIG_PATH.open("r", encoding="utf-8") as fp:
+            try:
+                cfg = json.load(fp)
+            except json.JSONDecodeError:
+                cfg = {}
+        if name in cfg:
+            return cfg[name]
+
+    return default
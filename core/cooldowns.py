@@ -0,0 +1,79 @@
+"""Cooldowns dos comandos (daily, mine, caça, trabalhar) e do XP por mensagem.
+
+Cada ação registrada tem uma duração e, opcionalmente, o campo de data do
+registro do usuário onde o último uso fica gravado (`last_daily`, ...). Em
+memória fica só uma tabela (uid, ação) -> instante em que a ação libera, então
+`restante()` é uma consulta num dict: um comando repetido em cooldown é
+recusado sem tocar no banco nem no disco.
+
+O que persiste é o campo do registro, gravado junto com o resto do usuário;
+na inicialização `carregar()` refaz a tabela a partir dos registros. As
+durações são lidas (por uma função) só ao iniciar um cooldown, então mudanças
+no catálogo valem a partir do próximo uso.
+"""
+
+import time
+from typing import Callable
+
+
+class CooldownService:
+    """Tabela em memória de (usuário, ação) -> liberado em (epoch)"""
+
+    def __init__(self):
+        # ação -> (função que retorna a duração em segundos, campo do registro)
+        self._acoes: dict[str, tuple[Callable[[], int], str | None]] = {}
+        self._liberado_em: dict[tuple[str, str], float] = {}
+
+    def registrar(self, acao: str, duracao: int | Callable[[], int], campo: str | None = None) -> None:
+        """Declara uma ação com cooldown (duração fixa ou função) e o campo onde ela persiste"""
+        self._acoes[acao] = (duracao if callable(duracao) else (lambda: duracao), campo)
+
+    def duracao(self, acao: str) -> int:
+        return int(self._acoes[acao][0]())
+
+    def restante(self, user_id, acao: str, agora: float | None = None) -> int:
+        """Segundos até a ação liberar para o usuário (0 se já pode)"""
+        liberado = self._liberado_em.get((str(user_id), acao))
+        if liberado is None:
+            return 0
+        agora = time.time() if agora is None else agora
+        return max(0, int(liberado - agora + 0.999))
+
+    def iniciar(self, user_id, acao: str, registro=None, agora: int | None = None) -> int:
+        """Começa o cooldown agora; com `registro`, grava o instante no campo da ação. Retorna o instante."""
+        agora = int(time.time()) if agora is None else agora
+        duracao, campo = self._acoes[acao]
+        self._liberado_em[(str(user_id), acao)] = agora + duracao()
+        if registro is not None and campo is not None:
+            registro[campo] = agora
+        return agora
+
+    def tentar(self, user_id, acao: str) -> bool:
+        """Verifica e, se liberada, já inicia o cooldown (para ações sem await no meio)"""
+        agora = time.time()
+        if self.restante(user_id, acao, agora):
+            return False
+        self.iniciar(user_id, acao, agora=int(agora))
+        return True
+
+    def carregar(self, registros: dict) -> None:
+        """Refaz a tabela a partir dos campos de data dos registros (uid -> registro)"""
+        agora = time.time()
+        for acao, (duracao, campo) in self._acoes.items():
+            if campo is None:
+                continue
+            segundos = duracao()
+            for uid, registro in registros.items():
+                ultimo = registro.get(campo)
+                if ultimo is None or ultimo + segundos <= agora:
+                    continue
+                chave = (str(uid), acao)
+                # Não recua um cooldown mais novo que o gravado (ex.: XP ainda não aplicado no banco)
+                self._liberado_em[chave] = max(self._liberado_em.get(chave, 0), ultimo + segundos)
+
+    def limpar(self) -> None:
+        """Descarta os cooldowns já vencidos para a tabela não crescer sem limite"""
+        agora = time.time()
+        vencidos = [chave for chave, liberado in self._liberado_em.items() if liberado <= agora]
+        for chave in vencidos:
+            del self._liberado_em[chave]
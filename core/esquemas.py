@@ -0,0 +1,107 @@
+"""Esquemas versionados dos registros de usuário.
+
+Cada tipo de registro (economia, perfil, top_tempo, inventario) tem um
+`Schema` com a classe do registro (`core.registros`, que define os campos e
+os padrões) e a versão atual. Os registros no disco são esparsos: um campo
+ausente vale o padrão, aplicado na leitura sem gravar nada. Por isso consultar
+um usuário (mesmo um que nunca usou o bot) não cria nem altera registro
+nenhum; só os comandos que mudam o estado criam o registro, com `novo()`.
+
+A versão fica no próprio registro (`_v`). Mudanças de formato entram como
+migração da versão anterior para a nova e rodam uma vez, em lote, na
+inicialização (`migrar_todos`), gravando só os registros que mudaram.
+"""
+
+from typing import Callable
+
+from core.registros import (
+    VERSAO, EconomyRecord, InventoryRecord, ProfileRecord, Record, VoiceRecord, para_epoch,
+)
+
+
+class Schema:
+    """Classe, versão e migrações de um tipo de registro"""
+
+    def __init__(self, nome: str, versao: int, tipo: type[Record],
+                 migracoes: dict[int, Callable[[Record], None]] | None = None):
+        self.nome = nome
+        self.versao = versao
+        self.tipo = tipo
+        # versão de destino -> função que altera o registro da versão anterior
+        self.migracoes = migracoes or {}
+
+    @property
+    def campos(self) -> dict:
+        return self.tipo.PADROES
+
+    def novo(self, **valores) -> Record:
+        """Registro novo, já na versão atual"""
+        registro = self.tipo(**valores)
+        registro[VERSAO] = self.versao
+        return registro
+
+    def view(self, registro: Record | None) -> Record:
+        """O registro, ou um registro só com os padrões (que não é guardado) se ele não existir"""
+        return self.tipo() if registro is None else registro
+
+    def migrar(self, registro) -> bool:
+        """Leva o registro (ou o dict do JSON) à versão atual. Retorna True se ele mudou."""
+        versao = registro.get(VERSAO, 0)
+        if versao >= self.versao:
+            return False
+        for destino in range(versao + 1, self.versao + 1):
+            migracao = self.migracoes.get(destino)
+            if migracao is not None:
+                migracao(registro)
+        registro[VERSAO] = self.versao
+        return True
+
+    def migrar_todos(self, registros: dict) -> list[str]:
+        """Migra uma coleção inteira. Retorna as chaves dos registros alterados."""
+        return [
+            chave for chave, registro in registros.items()
+            if isinstance(registro, (dict, Record)) and self.migrar(registro)
+        ]
+
+
+# ==============================
+# Migrações
+# ==============================
+def _remover(*campos: str) -> Callable[[Record], None]:
+    def migracao(registro) -> None:
+        for campo in campos:
+            registro.pop(campo, None)
+    return migracao
+
+
+def _datas_para_epoch(registro) -> None:
+    """Datas em texto ISO viram epoch (os registros já convertem ao carregar)"""
+    for campo in EconomyRecord.TEMPOS:
+        if registro.get(campo) is not None:
+            registro[campo] = para_epoch(registro[campo])
+    caca_longa = registro.get("caca_longa_ativa")
+    if caca_longa:
+        for campo in ("inicio", "fim"):
+            if campo in caca_longa:
+                caca_longa[campo] = para_epoch(caca_longa[campo])
+
+
+# ==============================
+# Esquemas
+# ==============================
+ECONOMIA = Schema("economia", 2, EconomyRecord, {
+    # "sobre" e "tempo_total" eram criados no db.json, mas vivem no perfil e no top_tempo
+    1: _remover("sobre", "tempo_total"),
+    2: _datas_para_epoch,
+})
+
+PERFIL = Schema("perfil", 1, ProfileRecord, {
+    # O casamento e o /set-sobre antigos criavam o perfil com um tempo_total que nunca era lido
+    1: _remover("tempo_total"),
+})
+
+TOP_TEMPO = Schema("top_tempo", 1, VoiceRecord)
+
+INVENTARIO = Schema("inventario", 1, InventoryRecord)
+
+ESQUEMAS = {esquema.nome: esquema for esquema in (ECONOMIA, PERFIL, TOP_TEMPO, INVENTARIO)}
@@ -0,0 +1,165 @@
+"""Cache persistente de identidade dos usuários (bot?, nome, apelido e banner).
+
+Os rankings e perfis precisam saber se um id é bot e qual nome mostrar,
+inclusive para quem já saiu do servidor. Em vez de um `fetch_user` por
+registro a cada comando, a identidade fica guardada em
+data/identidades.json, é aquecida com a lista de membros dos servidores e
+só é buscada na API quando não existe ou passou do TTL. O banner do perfil
+não vem com os membros do gateway, então é guardado à parte, a partir de
+cada `fetch_user`, com um TTL próprio.
+"""
+
+import time
+from pathlib import Path
+
+import discord
+
+from core.io_assincrono import Retrato, gravar
+from core.persistencia import read_json, write_json_atomic
+
+# Validade das entradas (segundos)
+TTL = 7 * 86400
+TTL_AUSENTE = 86400
+TTL_BANNER = 86400
+# Campos da entrada que o `remember` não conhece e precisa preservar
+CAMPOS_BANNER = ("banner", "banner_ts")
+
+
+class IdentityCache:
+    """Resolve identidade de usuários consultando membro > cache > API"""
+
+    def __init__(self, bot, path: Path, ttl: int = TTL, ttl_ausente: int = TTL_AUSENTE):
+        self.bot = bot
+        self.path = Path(path)
+        self.ttl = ttl
+        self.ttl_ausente = ttl_ausente
+        self._dados: dict[str, dict] = read_json(self.path)
+        self._alterado = False
+
+    def remember(self, user: discord.abc.User) -> dict:
+        """Guarda a identidade de um usuário ou membro já conhecido"""
+        uid = str(user.id)
+        antigo = self._dados.get(uid, {})
+        entry = {"bot": user.bot, "nome": user.name, "display": user.display_name}
+        # Renova o ts só ao mudar ou perto de vencer, para não regravar o arquivo à toa
+        if any(antigo.get(k) != v for k, v in entry.items()) or time.time() - antigo.get("ts", 0) > self.ttl / 2:
+            entry["ts"] = int(time.time())
+            entry.update({campo: antigo[campo] for campo in CAMPOS_BANNER if campo in antigo})
+            self._dados[uid] = entry
+            self._alterado = True
+            return entry
+        return antigo
+
+    def warm(self, members) -> None:
+        """Aquece o cache com os membros de um servidor (após o chunk)"""
+        for member in members:
+            self.remember(member)
+
+    def is_known_bot(self, user_id) -> bool:
+        """True se o cache já sabe que o id é de um bot (sem consultar a API)"""
+        return bool(self._dados.get(str(user_id), {}).get("bot"))
+
+    def _fresca(self, entry: dict) -> bool:
+        ttl = self.ttl_ausente if entry.get("ausente") else self.ttl
+        return time.time() - entry.get("ts", 0) < ttl
+
+    async def resolve(self, user_id, guild: discord.Guild | None = None) -> dict | None:
+        """Retorna {"bot", "nome", "display"} do usuário, ou None se não existir"""
+        user_id = int(user_id)
+        member = guild.get_member(user_id) if guild else None
+        if member:
+            return self.remember(member)
+
+        uid = str(user_id)
+        entry = self._dados.get(uid)
+        if entry and self._fresca(entry):
+            return None if entry.get("ausente") else entry
+
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except discord.NotFound:
+            self._dados[uid] = {"ausente": True, "ts": int(time.time())}
+            self._alterado = True
+            return None
+        except discord.HTTPException:
+            # Falha temporária (ex.: rate limit): usa o que tiver, mesmo vencido
+            return None if not entry or entry.get("ausente") else entry
+        entry = self.remember(user)
+        self._guardar_banner(user)
+        return entry
+
+    async def banner(self, user_id) -> str | None:
+        """URL do banner do perfil; só chama `fetch_user` sem banner no cache ou após o TTL"""
+        entry = self._dados.get(str(user_id), {})
+        if time.time() - entry.get("banner_ts", 0) < TTL_BANNER:
+            return entry.get("banner")
+        try:
+            user = await self.bot.fetch_user(int(user_id))
+        except discord.HTTPException:
+            return entry.get("banner")
+        self.remember(user)
+        return self._guardar_banner(user)
+
+    def _guardar_banner(self, user: discord.User) -> str | None:
+        url = user.banner.url if user.banner else None
+        entry = self._dados[str(user.id)]
+        entry["banner"] = url
+        entry["banner_ts"] = int(time.time())
+        self._alterado = True
+        return url
+
+    async def is_human(self, user_id, guild: discord.Guild | None = None) -> bool:
+        """True se o usuário existe e não é bot"""
+        entry = await self.resolve(user_id, guild)
+        return entry is not None and not entry["bot"]
+
+    async def top_humanos(self, board, guild: discord.Guild | None = None, limite: int = 10) -> list[tuple[str, object]]:
+        """Percorre um ranking do topo para baixo, pulando bots, até juntar `limite` membros reais"""
+        ranking = []
+        for uid, valor in board.iter_top():
+            if not await self.is_human(uid, guild):
+                continue
+            ranking.append((uid, valor))
+            if len(ranking) >= limite:
+                break
+        return ranking
+
+    async def display_name(self, user_id, guild: discord.Guild | None = None, fallback: str | None = None) -> str:
+        """Apelido no servidor se for membro, senão o nome de usuário"""
+        member = guild.get_member(int(user_id)) if guild else None
+        if member:
+            self.remember(member)
+            return member.display_name
+        entry = await self.resolve(user_id, guild)
+        if entry:
+            return entry["nome"]
+        return fallback or f"Usuário {user_id}"
+
+    def _retrato(self) -> Retrato | None:
+        """Cópia do cache para gravar (None se nada mudou); limpa a marca de alterado"""
+        if not self._alterado:
+            return None
+        self._alterado = False
+        return Retrato(self._dados)
+
+    def flush(self) -> None:
+        """Grava o cache se houver entradas novas ou alteradas"""
+        retrato = self._retrato()
+        if retrato is None:
+            return
+        try:
+            write_json_atomic(self.path, retrato.abrir())
+        except Exception:
+            self._alterado = True
+            raise
+
+    async def flush_async(self) -> None:
+        """Como `flush()`, mas grava no pool de I/O enquanto o loop aprende nomes"""
+        retrato = self._retrato()
+        if retrato is None:
+            return
+        try:
+            await gravar(self.path, write_json_atomic, self.path, retrato)
+        except Exception:
+            self._alterado = True
+            raise
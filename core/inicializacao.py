@@ -0,0 +1,90 @@
+"""Inicialização do bot: carga dos cogs e sincronização dos comandos.
+
+Os cogs são declarados numa lista de `CogSpec` e carregados juntos: os
+imports acontecem um a um (são síncronos), mas os `setup()` rodam
+concorrentemente. Os cogs marcados com `paralelo=False` (os que mexem direto
+na árvore de comandos) são carregados depois, um de cada vez. O tempo de
+import e de setup de cada cog é registrado e mostrado no log.
+
+A sincronização da árvore de comandos com o Discord é uma chamada REST com
+rate limit. Por isso o bot guarda em data/comandos.json uma assinatura (hash)
+dos comandos registrados e só sincroniza quando ela muda.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import importlib
+import json
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from core.persistencia import read_json, write_json_atomic
+
+
+class CogSpec(NamedTuple):
+    modulo: str
+    nome: str
+    # False para cogs que alteram a árvore de comandos por conta própria no setup
+    paralelo: bool = True
+
+
+async def _carregar(bot, spec: CogSpec) -> tuple[float, float] | None:
+    """Importa e configura um cog. Retorna (segundos de import, segundos de setup)."""
+    try:
+        inicio = time.perf_counter()
+        modulo = importlib.import_module(spec.modulo)
+        importado = time.perf_counter()
+        await modulo.setup(bot)
+    except Exception as e:
+        print(f"Erro ao carregar cog {spec.nome}: {e}")
+        return None
+    return importado - inicio, time.perf_counter() - importado
+
+
+async def carregar_cogs(bot, registro) -> dict[str, tuple[float, float]]:
+    """Carrega os cogs do registro e retorna os tempos dos que carregaram"""
+    inicio = time.perf_counter()
+    paralelos = [spec for spec in registro if spec.paralelo]
+    resultados = await asyncio.gather(*(_carregar(bot, spec) for spec in paralelos))
+    tempos = dict(zip((spec.nome for spec in paralelos), resultados))
+    for spec in registro:
+        if not spec.paralelo:
+            tempos[spec.nome] = await _carregar(bot, spec)
+
+    tempos = {nome: tempo for nome, tempo in tempos.items() if tempo is not None}
+    for nome, (importacao, setup) in tempos.items():
+        print(f"  • {nome}: import {importacao * 1000:.0f} ms, setup {setup * 1000:.0f} ms")
+    total = time.perf_counter() - inicio
+    print(f"✅ {len(tempos)}/{len(registro)} cogs carregados em {total * 1000:.0f} ms")
+    return tempos
+
+
+def assinatura_comandos(tree, application_id=None) -> str:
+    """Hash dos comandos globais como seriam enviados ao Discord"""
+    comandos = sorted(
+        (comando.to_dict() for comando in tree.get_commands()),
+        key=lambda comando: (comando.get("type", 1), comando["name"]),
+    )
+    payload = json.dumps(
+        {"application_id": application_id, "comandos": comandos},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def sincronizar_comandos(bot, path: Path, forcar: bool = False) -> bool:
+    """Sincroniza a árvore de comandos só se a assinatura mudou. Retorna True se sincronizou."""
+    assinatura = assinatura_comandos(bot.tree, bot.application_id)
+    if not forcar and read_json(path).get("assinatura") == assinatura:
+        print("⏭️ Comandos sem alterações desde a última sincronização")
+        return False
+
+    comandos = await bot.tree.sync()
+    write_json_atomic(path, {
+        "assinatura": assinatura,
+        "sincronizado_em": datetime.datetime.now().isoformat(),
+    }, backups=0)
+    print(f"🔄 {len(comandos)} comandos sincronizados com o Discord")
+    return True
@@ -0,0 +1,221 @@
+"""Serviço transacional de inventários (itens e equipados, com as almas do livro-razão).
+
+O banco de inventários fica residente em memória e cada comando altera o
+inventário de um usuário dentro de uma transação:
+
+    async with bot.inventarios.transaction(user_id) as tx:
+        if tx.remove_almas(custo) and tx.remove_itens(ingredientes):
+            tx.add_item(item)
+
+A transação trabalha numa cópia do registro, segura o lock do usuário do
+começo ao fim e, ao sair do bloco sem exceção, aplica tudo de uma vez com uma
+única gravação (feita no pool de I/O, já fora do lock). Se uma verificação
+falhar no meio, basta chamar `rollback()` (ou levantar uma exceção) para nada
+ser aplicado.
+
+As almas não ficam no inventário: a transação parte do saldo do livro-razão
+e, no commit, lança a diferença com o `motivo` da transação. Os locks são os
+mesmos da economia (`bot.locks`), então nenhum outro débito do usuário
+acontece entre a verificação do saldo e o lançamento.
+
+Uma transação pode ser uma operação numerada (`operacao=(chave, número)`,
+com números crescentes por usuário), que precisa valer uma vez só mesmo que
+seja repetida depois de uma queda. O número fica gravado junto com cada
+parte aplicada: no registro do inventário (itens) e no marco do livro-razão
+(almas). Ao repetir a operação, a parte já aplicada é ignorada.
+"""
+
+import copy
+from contextlib import asynccontextmanager
+
+from core.concorrencia import UserLocks
+from core.esquemas import INVENTARIO
+from core.registros import InventoryRecord, decode_colecao, encode_colecao
+from core.sqlite_backend import load_collection, save_collection
+from core.store import JsonStore
+
+
+def _validar(quantidade: int, minimo: int = 1) -> None:
+    """Quantidades negativas inverteriam a operação (uma compra viraria crédito)"""
+    if quantidade < minimo:
+        raise ValueError(f"Quantidade inválida na transação do inventário: {quantidade}")
+
+
+class InventoryTransaction:
+    """Alterações pendentes no inventário de um usuário"""
+
+    def __init__(self, registro: InventoryRecord, almas: int = 0):
+        self.registro = copy.deepcopy(registro)
+        self.registro.setdefault("itens", {})
+        self.registro.setdefault("equipados", {})
+        self.alterado = False
+        self.delta_almas = 0
+        self._almas_iniciais = almas
+        self._descartada = False
+
+    @property
+    def almas(self) -> int:
+        return self._almas_iniciais + self.delta_almas
+
+    @property
+    def itens(self) -> dict:
+        return self.registro["itens"]
+
+    def quantidade(self, item_id: str) -> int:
+        return self.itens.get(item_id, 0)
+
+    def faltando(self, itens: dict[str, int]) -> dict[str, tuple[int, int]]:
+        """item -> (quantidade que tem, quantidade necessária) dos que não bastam"""
+        return {
+            item_id: (self.quantidade(item_id), qtd)
+            for item_id, qtd in itens.items()
+            if self.quantidade(item_id) < qtd
+        }
+
+    def add_item(self, item_id: str, quantidade: int = 1) -> None:
+        _validar(quantidade)
+        self.itens[item_id] = self.quantidade(item_id) + quantidade
+        self.alterado = True
+
+    def remove_item(self, item_id: str, quantidade: int = 1) -> bool:
+        """Remove o item se houver quantidade suficiente"""
+        _validar(quantidade)
+        if self.quantidade(item_id) < quantidade:
+            return False
+        self.itens[item_id] -= quantidade
+        if self.itens[item_id] == 0:
+            del self.itens[item_id]
+        self.alterado = True
+        return True
+
+    def remove_itens(self, itens: dict[str, int]) -> bool:
+        """Remove vários itens de uma vez; não remove nenhum se faltar algum"""
+        for qtd in itens.values():
+            _validar(qtd)
+        if self.faltando(itens):
+            return False
+        for item_id, qtd in itens.items():
+            self.remove_item(item_id, qtd)
+        return True
+
+    def add_almas(self, quantidade: int) -> None:
+        _validar(quantidade, minimo=0)
+        self.delta_almas += quantidade
+
+    def remove_almas(self, quantidade: int) -> bool:
+        """Remove almas se houver saldo suficiente"""
+        _validar(quantidade, minimo=0)
+        if self.almas < quantidade:
+            return False
+        self.delta_almas -= quantidade
+        return True
+
+    def equip(self, item_id: str) -> bool:
+        if self.quantidade(item_id) <= 0:
+            return False
+        self.registro["equipados"][item_id] = True
+        self.alterado = True
+        return True
+
+    def unequip(self, item_id: str) -> bool:
+        if item_id not in self.registro["equipados"]:
+            return False
+        del self.registro["equipados"][item_id]
+        self.alterado = True
+        return True
+
+    def rollback(self) -> None:
+        """Descarta todas as alterações desta transação"""
+        self._descartada = True
+
+
+class InventoryService:
+    """Inventários residentes em memória, com lock por usuário e uma gravação por transação"""
+
+    def __init__(self, ledger, locks: UserLocks | None = None):
+        self.ledger = ledger
+        self._store = JsonStore(self._carregar, self._gravar)
+        self._locks = locks or UserLocks()
+
+    @staticmethod
+    def _carregar() -> dict:
+        return decode_colecao(InventoryRecord, load_collection("inventario"))
+
+    @staticmethod
+    def _gravar(registros: dict, completo: bool) -> None:
+        save_collection("inventario", encode_colecao(registros), completo)
+
+    def usuarios(self) -> dict:
+        """Todos os inventários (uid -> registro)"""
+        return self._store.load()
+
+    def get(self, user_id) -> InventoryRecord:
+        """Inventário atual do usuário, somente para leitura (não cria registro)"""
+        return INVENTARIO.view(self.usuarios().get(str(user_id)))
+
+    def aplicada(self, user_id, operacao: tuple[str, int]) -> tuple[bool, bool]:
+        """(itens, almas): se cada parte da operação numerada já foi aplicada"""
+        uid = str(user_id)
+        chave, numero = operacao
+        itens = self.get(uid)["marcos"].get(chave, 0) >= numero
+        almas = self.ledger.marco(f"{chave}:{uid}") >= numero
+        return itens, almas
+
+    @asynccontextmanager
+    async def transaction(self, user_id, motivo: str = "inventario", operacao: tuple[str, int] | None = None):
+        """Abre uma transação no inventário do usuário (aplicada ao sair do bloco)"""
+        uid = str(user_id)
+        async with self._locks.hold(uid):
+            registro = self.usuarios().get(uid) or INVENTARIO.novo()
+            tx = InventoryTransaction(registro, self.ledger.saldo(uid))
+            yield tx
+            gravar = not tx._descartada and self._commit(uid, tx, motivo, operacao)
+        if gravar:
+            # Fora do lock: gravações de transações próximas são fundidas numa só
+            await self._store.flush_async()
+
+    def _commit(self, uid: str, tx: InventoryTransaction, motivo: str,
+                operacao: tuple[str, int] | None = None) -> bool:
+        """Aplica a transação. Retorna True se o inventário mudou (precisa gravar)."""
+        itens_aplicados, almas_aplicadas = self.aplicada(uid, operacao) if operacao else (False, False)
+        marco = (f"{operacao[0]}:{uid}", operacao[1]) if operacao else None
+        if not almas_aplicadas:
+            if tx.delta_almas > 0:
+                self.ledger.creditar(uid, tx.delta_almas, motivo, marco=marco)
+            elif tx.delta_almas < 0 and not self.ledger.debitar(uid, -tx.delta_almas, motivo, marco=marco):
+                raise RuntimeError(f"Saldo de {uid} mudou durante a transação do inventário")
+        if not tx.alterado or itens_aplicados:
+            return False
+        if operacao:
+            tx.registro["marcos"][operacao[0]] = operacao[1]
+        self.usuarios()[uid] = tx.registro
+        self._store.mark_dirty(uid)
+        self._locks.alterado(uid)
+        return True
+
+    def extrair_almas(self) -> dict[str, int]:
+        """Tira dos inventários o saldo antigo de almas (migração para o livro-razão)
+
+        Só marca os inventários como alterados: quem chama grava com `flush()`
+        depois de creditar as almas no livro-razão.
+        """
+        almas = {}
+        for uid, registro in self.usuarios().items():
+            if "almas" in registro:
+                almas[uid] = registro.pop("almas") or 0
+        if almas:
+            self._store.mark_dirty(*almas)
+        return almas
+
+    def migrar(self) -> None:
+        """Leva os inventários à versão atual do esquema (na inicialização)"""
+        alterados = INVENTARIO.migrar_todos(self.usuarios())
+        if alterados:
+            self._store.mark_dirty(*alterados)
+            self._store.flush()
+
+    def flush(self) -> None:
+        self._store.flush()
+
+    async def flush_async(self) -> None:
+        await self._store.flush_async()
@@ -0,0 +1,112 @@
+"""Leitura e gravação dos arquivos fora do event loop.
+
+Um `json.dump` de alguns megabytes rodando direto num handler segura o loop
+inteiro: heartbeat do gateway, respostas de interação e tasks ficam
+esperando. Aqui a leitura/serialização roda num pool de threads pequeno e
+limitado (`IO_WORKERS`), e o handler só espera com `await`.
+
+Gravações da mesma chave (em geral, o mesmo arquivo) são fundidas: enquanto
+uma gravação está em andamento, os pedidos seguintes esperam e, quando ela
+termina, só o mais recente é executado, uma vez só, respondendo a todos.
+Duas gravações do mesmo arquivo nunca rodam ao mesmo tempo.
+
+O loop continua alterando os bancos residentes enquanto o pool grava, então
+os dados nunca vão vivos para a thread: quem grava passa um `Retrato`, uma
+cópia congelada tirada no loop com `pickle` (bem mais rápido que
+`deepcopy` ou que o próprio JSON), que só é desfeita dentro do pool.
+"""
+
+import asyncio
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable
+
+from core.config import resolve_setting
+
+# Threads dedicadas à leitura e gravação de arquivos
+IO_WORKERS = int(resolve_setting("IO_WORKERS", 2))
+
+_executor: ThreadPoolExecutor | None = None
+_filas: dict[Hashable, "_Fila"] = {}
+
+
+class _Fila:
+    """Gravação em andamento e o pedido mais recente à espera dela"""
+
+    def __init__(self):
+        self.rodando = False
+        self.pedido: tuple[Callable, tuple] | None = None
+        self.futuros: list[asyncio.Future] = []
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, IO_WORKERS), thread_name_prefix="io")
+    return _executor
+
+
+class Retrato:
+    """Cópia congelada de dados residentes, tirada no loop e aberta no pool"""
+
+    __slots__ = ("_bytes",)
+
+    def __init__(self, dados):
+        self._bytes = pickle.dumps(dados, pickle.HIGHEST_PROTOCOL)
+
+    def abrir(self):
+        return pickle.loads(self._bytes)
+
+
+def _executar(func: Callable, args: tuple):
+    return func(*(arg.abrir() if isinstance(arg, Retrato) else arg for arg in args))
+
+
+async def em_thread(func: Callable, *args):
+    """Executa `func(*args)` no pool de I/O e devolve o resultado (abrindo os `Retrato`)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), _executar, func, args)
+
+
+async def gravar(chave: Hashable, func: Callable, *args) -> None:
+    """Executa a gravação `func(*args)` no pool, fundida com as outras da mesma chave
+
+    Dados que o loop continua alterando devem ir num `Retrato`.
+    """
+    fila = _filas.get(chave)
+    if fila is None:
+        fila = _filas[chave] = _Fila()
+    futuro = asyncio.get_running_loop().create_future()
+    fila.pedido = (func, args)
+    fila.futuros.append(futuro)
+    if not fila.rodando:
+        fila.rodando = True
+        asyncio.create_task(_drenar(fila))
+    await asyncio.shield(futuro)
+
+
+async def _drenar(fila: _Fila) -> None:
+    try:
+        while fila.pedido is not None:
+            (func, args), futuros = fila.pedido, fila.futuros
+            fila.pedido, fila.futuros = None, []
+            try:
+                await em_thread(func, *args)
+            except Exception as e:
+                for futuro in futuros:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+            else:
+                for futuro in futuros:
+                    if not futuro.done():
+                        futuro.set_result(None)
+    finally:
+        fila.rodando = False
+
+
+def encerrar() -> None:
+    """Espera as gravações em andamento e fecha o pool (no desligamento)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
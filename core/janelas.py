@@ -0,0 +1,138 @@
+"""Rankings por período (dia, semana, mês) mantidos incrementalmente.
+
+Cada métrica (tempo em call, almas ganhas, XP ganha) tem um contador por
+usuário para o dia, a semana e o mês atuais, com um `Leaderboard` ao lado.
+Os caminhos de escrita chamam `add()`; quando o período vira, os contadores
+daquele período são zerados. Consultas leem o ranking pronto, sem reprocessar
+histórico. Ouvintes registrados com `on_add()` recebem cada incremento (as
+missões usam isso).
+
+Os contadores ficam em data/janelas.json, gravado pelo flush periódico.
+"""
+
+import datetime
+from pathlib import Path
+from typing import Callable
+
+from core.io_assincrono import Retrato, gravar
+from core.persistencia import read_json, write_json_atomic
+from core.ranking import Leaderboard
+
+PERIODOS = ("dia", "semana", "mes")
+METRICAS = ("tempo", "soul", "xp")
+
+
+def periodo_atual(periodo: str, agora: datetime.datetime) -> str:
+    """Identificador do período que contém `agora` (ex.: 2024-05-13, 2024-W20, 2024-05)"""
+    if periodo == "dia":
+        return agora.strftime("%Y-%m-%d")
+    if periodo == "semana":
+        ano, semana, _ = agora.isocalendar()
+        return f"{ano}-W{semana:02d}"
+    if periodo == "mes":
+        return agora.strftime("%Y-%m")
+    raise ValueError(f"Período desconhecido: {periodo}")
+
+
+class WindowedCounters:
+    """Contadores por usuário no dia/semana/mês atuais, com ranking de cada um"""
+
+    def __init__(self, path: Path, metricas=METRICAS):
+        self.path = Path(path)
+        self.metricas = tuple(metricas)
+        self._ids: dict[str, str] = {}
+        # (metrica, periodo) -> {uid: valor}
+        self._contadores: dict[tuple[str, str], dict[str, int]] = {}
+        self._boards: dict[tuple[str, str], Leaderboard] = {}
+        self._listeners: list[Callable[[str, str, int], None]] = []
+        self._alterado = False
+        self._carregar()
+
+    def _carregar(self) -> None:
+        data = read_json(self.path)
+        self._ids = data.get("ids", {})
+        salvos = data.get("contadores", {})
+        for metrica in self.metricas:
+            for periodo in PERIODOS:
+                valores = salvos.get(metrica, {}).get(periodo, {})
+                self._contadores[(metrica, periodo)] = valores
+                board = self._boards[(metrica, periodo)] = Leaderboard()
+                board.rebuild(valores)
+
+    def on_add(self, listener: Callable[[str, str, int], None]) -> None:
+        """Registra `listener(metrica, uid, quantidade)`, chamado a cada incremento"""
+        self._listeners.append(listener)
+
+    def _rodar(self, agora: datetime.datetime | None = None) -> None:
+        """Zera os contadores dos períodos que viraram"""
+        agora = agora or datetime.datetime.now()
+        for periodo in PERIODOS:
+            atual = periodo_atual(periodo, agora)
+            if self._ids.get(periodo) == atual:
+                continue
+            self._ids[periodo] = atual
+            for metrica in self.metricas:
+                self._contadores[(metrica, periodo)] = {}
+                self._boards[(metrica, periodo)] = Leaderboard()
+            self._alterado = True
+
+    def add(self, metrica: str, uid, quantidade: int) -> None:
+        """Soma `quantidade` ao usuário em todos os períodos atuais"""
+        if quantidade <= 0:
+            return
+        uid = str(uid)
+        self._rodar()
+        for periodo in PERIODOS:
+            contadores = self._contadores[(metrica, periodo)]
+            contadores[uid] = contadores.get(uid, 0) + quantidade
+            self._boards[(metrica, periodo)].update(uid, contadores[uid])
+        self._alterado = True
+        for listener in self._listeners:
+            listener(metrica, uid, quantidade)
+
+    def board(self, metrica: str, periodo: str) -> Leaderboard:
+        self._rodar()
+        return self._boards[(metrica, periodo)]
+
+    def get(self, metrica: str, periodo: str, uid) -> int:
+        self._rodar()
+        return self._contadores[(metrica, periodo)].get(str(uid), 0)
+
+    def discard(self, uid) -> None:
+        """Remove o usuário de todos os rankings (ex.: descoberto que é bot)"""
+        for board in self._boards.values():
+            board.discard(str(uid))
+
+    def _retrato(self) -> Retrato | None:
+        """Cópia dos contadores para gravar (None se nada mudou); limpa a marca de alterado"""
+        if not self._alterado:
+            return None
+        self._alterado = False
+        return Retrato({
+            "ids": self._ids,
+            "contadores": {
+                metrica: {periodo: self._contadores[(metrica, periodo)] for periodo in PERIODOS}
+                for metrica in self.metricas
+            },
+        })
+
+    def flush(self) -> None:
+        retrato = self._retrato()
+        if retrato is None:
+            return
+        try:
+            write_json_atomic(self.path, retrato.abrir())
+        except Exception:
+            self._alterado = True
+            raise
+
+    async def flush_async(self) -> None:
+        """Como `flush()`, mas grava no pool de I/O enquanto o loop soma contadores"""
+        retrato = self._retrato()
+        if retrato is None:
+            return
+        try:
+            await gravar(self.path, write_json_atomic, self.path, retrato)
+        except Exception:
+            self._alterado = True
+            raise
@@ -0,0 +1,198 @@
+"""Livro-razão das almas: todo ganho, gasto e transferência de todos os cogs.
+
+As almas de cada usuário existem num lugar só. Cada alteração é um
+lançamento acrescentado a data/ledger.jsonl (uma linha por lançamento,
+nunca reescrita) e o saldo materializado de cada usuário fica em memória,
+então consultar saldo não lê arquivo nenhum. De tempos em tempos os saldos
+são gravados em data/saldos.json junto com a posição do diário até onde eles
+valem; na inicialização o bot carrega esse retrato e reaplica só os
+lançamentos posteriores.
+
+Formato das linhas:
+    {"seq": n, "ts": ..., "uid": "...", "delta": +/-n, "saldo": n, "motivo": "...", "ref": ..., "marco": [chave, n]}
+
+Um lançamento pode levar um marco (`chave`, número): o ledger guarda o maior
+número já lançado de cada chave. Quem entrega algo que pode ser repetido
+depois de uma queda (ex.: créditos do mercado) consulta `marco(chave)` para
+não lançar a mesma operação duas vezes.
+
+Os lançamentos são síncronos: quem precisa verificar algo e só depois
+lançar, com `await` no meio, segura o lock do usuário (`bot.locks`).
+"""
+
+import time
+from pathlib import Path
+from typing import Callable
+
+from core import codec
+from core.io_assincrono import gravar
+from core.persistencia import read_json, write_json_atomic
+
+
+class Ledger:
+    """Diário só de acréscimo dos lançamentos de almas, com saldos materializados"""
+
+    def __init__(self, path: Path, saldos_path: Path):
+        self.path = Path(path)
+        self.saldos_path = Path(saldos_path)
+        self._saldos: dict[str, int] = {}
+        self._seq = 0
+        self._seq_salvo = 0
+        # chave -> maior número de operação já lançado com ela
+        self._marcos: dict[str, int] = {}
+        self._listeners: list[Callable[[str, int, str, int], None]] = []
+        self._arquivo = None
+        self._carregar()
+
+    # ---------- Consultas ----------
+    def __len__(self) -> int:
+        """Quantidade de lançamentos já feitos"""
+        return self._seq
+
+    def saldo(self, uid) -> int:
+        return self._saldos.get(str(uid), 0)
+
+    def saldos(self) -> dict[str, int]:
+        """uid -> saldo de todos os usuários com saldo"""
+        return dict(self._saldos)
+
+    def marco(self, chave: str) -> int:
+        """Maior número de operação já lançado com a chave (0 se nenhum)"""
+        return self._marcos.get(chave, 0)
+
+    def on_lancamento(self, listener: Callable[[str, int, str, int], None]) -> None:
+        """Registra `listener(uid, delta, motivo, saldo)`, chamado a cada lançamento"""
+        self._listeners.append(listener)
+
+    # ---------- Lançamentos ----------
+    def creditar(self, uid, quantidade: int, motivo: str, ref=None, marco: tuple[str, int] | None = None) -> int:
+        """Soma almas ao usuário. Retorna o novo saldo."""
+        if quantidade <= 0:
+            return self.saldo(uid)
+        return self._lancar([(str(uid), quantidade, motivo, ref)], marco)[0]
+
+    def debitar(self, uid, quantidade: int, motivo: str, ref=None, marco: tuple[str, int] | None = None) -> bool:
+        """Tira almas do usuário se houver saldo suficiente"""
+        if quantidade <= 0:
+            return True
+        if self.saldo(uid) < quantidade:
+            return False
+        self._lancar([(str(uid), -quantidade, motivo, ref)], marco)
+        return True
+
+    def transferir(self, origem, destino, quantidade: int, motivo: str) -> bool:
+        """Move almas entre dois usuários (os dois lançamentos vão numa única escrita)"""
+        origem, destino = str(origem), str(destino)
+        if quantidade <= 0 or origem == destino or self.saldo(origem) < quantidade:
+            return False
+        self._lancar([
+            (origem, -quantidade, motivo, destino),
+            (destino, quantidade, motivo, origem),
+        ])
+        return True
+
+    def _lancar(self, lancamentos: list[tuple[str, int, str, object]],
+                marco: tuple[str, int] | None = None) -> list[int]:
+        agora = int(time.time())
+        linhas = []
+        novos_saldos = []
+        for uid, delta, motivo, ref in lancamentos:
+            self._seq += 1
+            saldo = self._saldos.get(uid, 0) + delta
+            registro = {"seq": self._seq, "ts": agora, "uid": uid, "delta": delta, "saldo": saldo, "motivo": motivo}
+            if ref is not None:
+                registro["ref"] = ref
+            if marco is not None:
+                registro["marco"] = list(marco)
+                self._marcar(*marco)
+            linhas.append(codec.dumps(registro) + b"\n")
+            self._aplicar(uid, delta)
+            novos_saldos.append(saldo)
+        self._append(b"".join(linhas))
+        for (uid, delta, motivo, _), saldo in zip(lancamentos, novos_saldos):
+            for listener in self._listeners:
+                listener(uid, delta, motivo, saldo)
+        return novos_saldos
+
+    def _aplicar(self, uid: str, delta: int) -> None:
+        saldo = self._saldos.get(uid, 0) + delta
+        if saldo:
+            self._saldos[uid] = saldo
+        else:
+            self._saldos.pop(uid, None)
+
+    def _marcar(self, chave: str, numero: int) -> None:
+        if numero > self._marcos.get(chave, 0):
+            self._marcos[chave] = numero
+
+    # ---------- Persistência ----------
+    def _append(self, linhas: bytes) -> None:
+        if self._arquivo is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._arquivo = self.path.open("ab")
+        self._arquivo.write(linhas)
+        self._arquivo.flush()
+
+    def _carregar(self) -> None:
+        if not self.path.exists():
+            return
+        retrato = read_json(self.saldos_path)
+        offset = retrato.get("offset", 0)
+        if 0 < offset <= self.path.stat().st_size:
+            self._saldos = {uid: saldo for uid, saldo in retrato.get("saldos", {}).items() if saldo}
+            self._marcos = dict(retrato.get("marcos", {}))
+            self._seq = retrato.get("seq", 0)
+        else:
+            # Sem retrato (ou retrato de outro diário): refaz os saldos do começo
+            offset = 0
+
+        with self.path.open("rb") as fp:
+            fp.seek(offset)
+            novos = fp.read()
+        # Uma queda no meio de uma escrita pode deixar a última linha incompleta:
+        # ela é descartada para o próximo lançamento não grudar nela
+        completo = novos.rfind(b"\n") + 1
+        if completo < len(novos):
+            with self.path.open("r+b") as fp:
+                fp.truncate(offset + completo)
+        for linha in novos[:completo].splitlines():
+            registro = codec.loads(linha)
+            self._aplicar(registro["uid"], registro["delta"])
+            if "marco" in registro:
+                self._marcar(*registro["marco"])
+            self._seq = registro["seq"]
+        self._seq_salvo = self._seq if not completo else -1
+
+    def _retrato(self) -> dict | None:
+        """Saldos e posição do diário agora (None se nada mudou desde o último)"""
+        if self._seq == self._seq_salvo:
+            return None
+        return {
+            "offset": self.path.stat().st_size if self.path.exists() else 0,
+            "seq": self._seq,
+            # Cópia: o retrato precisa bater com o offset mesmo gravado em outra thread
+            "saldos": dict(self._saldos),
+            "marcos": dict(self._marcos),
+        }
+
+    def flush(self) -> None:
+        """Grava o retrato dos saldos e a posição do diário até onde ele vale"""
+        retrato = self._retrato()
+        if retrato is None:
+            return
+        write_json_atomic(self.saldos_path, retrato, backups=1)
+        self._seq_salvo = retrato["seq"]
+
+    async def flush_async(self) -> None:
+        """Como `flush()`, mas grava no pool de I/O"""
+        retrato = self._retrato()
+        if retrato is None:
+            return
+        await gravar(self.saldos_path, write_json_atomic, self.saldos_path, retrato, 1)
+        self._seq_salvo = retrato["seq"]
+
+    def close(self) -> None:
+        self.flush()
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
@@ -0,0 +1,66 @@
+"""Curva de níveis por XP compartilhada entre main.py e o cog de economia.
+
+A XP para passar de nível começa em 100 e aumenta 50% a cada nível, com o
+mesmo truncamento inteiro (`int(xp * 1.5)`) usado desde o início. Os
+limiares acumulados são calculados uma vez (e estendidos sob demanda), e a
+consulta de nível vira uma busca binária em vez de um loop nível a nível.
+"""
+
+from bisect import bisect_right
+from typing import Iterable
+
+# _requisitos[n - 1]: XP necessária para ir do nível n para o n + 1
+_requisitos = [100]
+# _acumulado[n - 1]: XP total necessária para alcançar o nível n
+_acumulado = [0]
+
+
+def _estender() -> None:
+    _acumulado.append(_acumulado[-1] + _requisitos[-1])
+    _requisitos.append(int(_requisitos[-1] * 1.5))
+
+
+def _garantir_xp(xp: int) -> None:
+    while _acumulado[-1] <= xp:
+        _estender()
+
+
+def _garantir_nivel(level: int) -> None:
+    while len(_acumulado) < level:
+        _estender()
+
+
+# Pré-calcula os primeiros níveis, que cobrem qualquer XP realista
+_garantir_nivel(100)
+
+
+def calculate_level(xp: int) -> int:
+    """Calcula o nível baseado na XP"""
+    if xp >= _acumulado[-1]:
+        _garantir_xp(xp)
+    return max(bisect_right(_acumulado, xp), 1)
+
+
+def calculate_levels(xps: Iterable[int]) -> list[int]:
+    """Calcula o nível de várias XPs de uma vez (rankings)"""
+    xps = list(xps)
+    if xps:
+        _garantir_xp(max(xps))
+    acumulado = _acumulado
+    return [max(bisect_right(acumulado, xp), 1) for xp in xps]
+
+
+def get_xp_for_level(level: int) -> int:
+    """Retorna a XP total necessária para alcançar um nível"""
+    if level <= 1:
+        return 0
+    _garantir_nivel(level)
+    return _acumulado[level - 1]
+
+
+def get_xp_for_next_level(level: int) -> int:
+    """Retorna a XP necessária para o próximo nível"""
+    if level <= 1:
+        return _requisitos[0]
+    _garantir_nivel(level)
+    return _requisitos[level - 1]
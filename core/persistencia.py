@@ -0,0 +1,92 @@
+"""Persistência segura dos arquivos JSON em data/.
+
+A gravação usa arquivo temporário + fsync + rename atômico, então uma queda
+no meio da escrita nunca deixa o arquivo truncado. As últimas versões ficam
+guardadas em backups rotativos (`arquivo.json.bak1`, `.bak2`, ...) e a
+leitura recorre ao backup válido mais recente se o arquivo principal estiver
+corrompido ou ausente. A codificação é a de `core.codec` (JSON compacto).
+"""
+
+import datetime
+import os
+from pathlib import Path
+
+from core import codec
+
+# Quantidade de backups rotativos mantidos para cada arquivo
+BACKUPS = 3
+
+
+def backup_path(path: Path, n: int) -> Path:
+    return path.with_name(f"{path.name}.bak{n}")
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Garante que o rename foi persistido (não suportado no Windows)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_json_atomic(path, data, backups: int = BACKUPS, pretty: bool = False) -> None:
+    """Grava `data` em `path` de forma atômica, rotacionando os backups"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    raw = codec.dumps(data, pretty)
+    with tmp_path.open("wb") as fp:
+        fp.write(raw)
+        fp.flush()
+        os.fsync(fp.fileno())
+
+    if backups > 0 and path.exists():
+        for n in range(backups, 1, -1):
+            older = backup_path(path, n - 1)
+            if older.exists():
+                os.replace(older, backup_path(path, n))
+        os.replace(path, backup_path(path, 1))
+
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+
+def read_json(path, default=None):
+    """Lê um JSON, recorrendo ao backup válido mais recente em caso de erro.
+
+    Se nenhum arquivo existir, retorna `default` (ou `{}`). Se existirem mas
+    todos estiverem corrompidos, o arquivo principal é renomeado para
+    `.corrompido-<data>` (para recuperação manual) antes de retornar o padrão.
+    """
+    path = Path(path)
+    candidates = [path] + [backup_path(path, n) for n in range(1, BACKUPS + 1)]
+    found_any = False
+
+    for candidate in candidates:
+        if not candidate.exists():
+            continue
+        found_any = True
+        try:
+            with candidate.open("rb") as fp:
+                data = codec.loads(fp.read())
+        except (ValueError, OSError) as e:
+            print(f"⚠️ Falha ao ler {candidate.name}: {e}")
+            continue
+        if candidate != path:
+            print(f"⚠️ {path.name} restaurado a partir de {candidate.name}")
+        return data
+
+    if found_any and path.exists():
+        stamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+        corrupted = path.with_name(f"{path.name}.corrompido-{stamp}")
+        os.replace(path, corrupted)
+        print(f"❌ {path.name} e backups corrompidos; original movido para {corrupted.name}")
+
+    return {} if default is None else default
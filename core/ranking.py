@@ -0,0 +1,115 @@
+"""Índice incremental dos rankings (almas, nível, tempo em call).
+
+Cada métrica mantém uma lista ordenada que é atualizada a cada escrita, então
+os comandos de ranking leem o topo direto do índice em vez de varrer e
+ordenar o banco inteiro, e a posição de um usuário sai por busca binária.
+"""
+
+from typing import Iterator
+
+from sortedcontainers import SortedList
+
+# Métricas mantidas pelo bot
+METRICAS = ("soul", "level", "tempo")
+
+
+def _chave(valor):
+    """Chave de ordenação decrescente (valores simples ou tuplas como (level, xp))"""
+    if isinstance(valor, tuple):
+        return tuple(-v for v in valor)
+    return -valor
+
+
+class Leaderboard:
+    """Ranking ordenado (maior primeiro) de uma métrica"""
+
+    def __init__(self):
+        self._valores: dict[str, object] = {}
+        self._ordem = SortedList()
+
+    def __len__(self) -> int:
+        return len(self._valores)
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self._valores
+
+    def get(self, uid: str, default=None):
+        return self._valores.get(uid, default)
+
+    def update(self, uid: str, valor) -> None:
+        """Insere ou atualiza o valor de um usuário em O(log n)"""
+        antigo = self._valores.get(uid)
+        if antigo is not None:
+            if antigo == valor:
+                return
+            self._ordem.remove((_chave(antigo), uid))
+        self._valores[uid] = valor
+        self._ordem.add((_chave(valor), uid))
+
+    def discard(self, uid: str) -> None:
+        antigo = self._valores.pop(uid, None)
+        if antigo is not None:
+            self._ordem.remove((_chave(antigo), uid))
+
+    def rebuild(self, valores: dict) -> None:
+        """Reconstrói o ranking inteiro de uma vez (usado na inicialização)"""
+        self._valores = dict(valores)
+        self._ordem = SortedList((_chave(valor), uid) for uid, valor in self._valores.items())
+
+    def top(self, k: int) -> list[tuple[str, object]]:
+        return [(uid, self._valores[uid]) for _, uid in self._ordem[:k]]
+
+    def iter_top(self) -> Iterator[tuple[str, object]]:
+        """Percorre o ranking do topo para baixo.
+
+        Usa acesso por posição, então continua válido mesmo se o ranking for
+        atualizado entre um item e outro (por exemplo, durante um await).
+        """
+        pos = 0
+        vistos = set()
+        while True:
+            try:
+                _, uid = self._ordem[pos]
+            except IndexError:
+                return
+            pos += 1
+            valor = self._valores.get(uid)
+            if valor is None or uid in vistos:
+                continue
+            vistos.add(uid)
+            yield uid, valor
+
+    def rank(self, uid: str) -> int | None:
+        """Posição (1 = primeiro) do usuário em O(log n)"""
+        valor = self._valores.get(uid)
+        if valor is None:
+            return None
+        return self._ordem.index((_chave(valor), uid)) + 1
+
+    def percentile(self, uid: str) -> float | None:
+        """Porcentagem de usuários do ranking que estão abaixo deste"""
+        pos = self.rank(uid)
+        if pos is None:
+            return None
+        return 100 * (len(self._ordem) - pos) / len(self._ordem)
+
+
+class RankingIndex:
+    """Conjunto de rankings do bot, um por métrica"""
+
+    def __init__(self, metricas=METRICAS):
+        self._boards = {metrica: Leaderboard() for metrica in metricas}
+
+    def __getitem__(self, metrica: str) -> Leaderboard:
+        return self._boards[metrica]
+
+    def update(self, metrica: str, uid, valor) -> None:
+        self._boards[metrica].update(str(uid), valor)
+
+    def discard(self, uid) -> None:
+        """Remove o usuário de todos os rankings (ex.: descoberto que é bot)"""
+        for board in self._boards.values():
+            board.discard(str(uid))
+
+    def rebuild(self, metrica: str, valores: dict) -> None:
+        self._boards[metrica].rebuild(valores)
@@ -0,0 +1,221 @@
+"""Registros tipados dos bancos de usuários: economia, perfil, tempo em call e inventário.
+
+Os bancos ficam residentes em memória com um registro por usuário. Um dict
+com ~15 chaves (e datas em texto ISO) custa várias vezes mais memória que um
+objeto com `__slots__`, então cada tipo de registro é uma classe com os
+campos em slots e os padrões em `PADROES`. As datas são inteiros (epoch em
+segundos): um cooldown é só `agora() - registro.last_daily < cooldown`, sem
+`datetime.fromisoformat`.
+
+Os registros mantêm a API de dicionário (`registro["xp"]`, `get`,
+`setdefault`, `pop`, `del`) que os comandos e as migrações usam, e convertem
+de/para o JSON com `from_json`/`to_json`. O JSON é esparso (campos no padrão
+não são gravados) e chaves desconhecidas são preservadas.
+"""
+
+import copy
+import datetime
+import time
+
+# Campo com a versão do esquema (ver core.esquemas)
+VERSAO = "_v"
+
+
+def agora() -> int:
+    """Epoch atual em segundos"""
+    return int(time.time())
+
+
+def para_epoch(valor) -> int | None:
+    """Converte uma data (epoch, texto ISO ou datetime) para epoch em segundos"""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, (int, float)):
+        return int(valor)
+    if isinstance(valor, datetime.datetime):
+        return int(valor.timestamp())
+    try:
+        return int(datetime.datetime.fromisoformat(valor).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+class Record:
+    """Base dos registros: campos em slots com API de dicionário"""
+
+    __slots__ = ("_v", "_extras")
+    # campo -> valor padrão (listas e dicionários são copiados por registro)
+    PADROES: dict = {}
+    # Campos de data, guardados como epoch
+    TEMPOS: frozenset = frozenset()
+
+    def __init__(self, **valores):
+        self._v = 0
+        self._extras = None
+        for campo, padrao in self.PADROES.items():
+            setattr(self, campo, copy.copy(padrao) if isinstance(padrao, (list, dict)) else padrao)
+        for campo, valor in valores.items():
+            self[campo] = valor
+
+    # ---------- Conversão ----------
+    @classmethod
+    def from_json(cls, dados: dict) -> "Record":
+        registro = cls()
+        for campo, valor in dados.items():
+            registro[campo] = valor
+        return registro
+
+    def to_json(self) -> dict:
+        dados = {VERSAO: self._v} if self._v else {}
+        for campo, padrao in self.PADROES.items():
+            valor = getattr(self, campo)
+            if valor != padrao:
+                dados[campo] = valor
+        if self._extras:
+            dados.update(self._extras)
+        return dados
+
+    # ---------- API de dicionário ----------
+    def __getitem__(self, campo: str):
+        if campo in self.PADROES:
+            return getattr(self, campo)
+        if campo == VERSAO:
+            return self._v
+        if self._extras and campo in self._extras:
+            return self._extras[campo]
+        raise KeyError(campo)
+
+    def __setitem__(self, campo: str, valor) -> None:
+        if campo in self.PADROES:
+            setattr(self, campo, para_epoch(valor) if campo in self.TEMPOS else valor)
+        elif campo == VERSAO:
+            self._v = valor
+        else:
+            if self._extras is None:
+                self._extras = {}
+            self._extras[campo] = valor
+
+    def __delitem__(self, campo: str) -> None:
+        """Campos voltam ao padrão; chaves extras são removidas"""
+        self.pop(campo)
+
+    def __contains__(self, campo) -> bool:
+        return campo in self.PADROES or campo == VERSAO or bool(self._extras and campo in self._extras)
+
+    def __iter__(self):
+        yield from self.PADROES
+        if self._extras:
+            yield from self._extras
+
+    def __len__(self) -> int:
+        return len(self.PADROES) + len(self._extras or ())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_json()!r})"
+
+    def get(self, campo: str, padrao=None):
+        try:
+            return self[campo]
+        except KeyError:
+            return padrao
+
+    def setdefault(self, campo: str, padrao=None):
+        if campo not in self:
+            self[campo] = padrao
+        return self[campo]
+
+    def pop(self, campo: str, *padrao):
+        if campo in self.PADROES:
+            valor = getattr(self, campo)
+            original = self.PADROES[campo]
+            setattr(self, campo, copy.copy(original) if isinstance(original, (list, dict)) else original)
+            return valor
+        if campo == VERSAO:
+            valor, self._v = self._v, 0
+            return valor
+        if self._extras and campo in self._extras:
+            return self._extras.pop(campo)
+        if padrao:
+            return padrao[0]
+        raise KeyError(campo)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(campo, self[campo]) for campo in self]
+
+
+class EconomyRecord(Record):
+    """Registro do db.json: XP, nível, cooldowns, streaks, caçada longa e missões"""
+
+    PADROES = {
+        "xp": 0,
+        "level": 1,
+        "last_daily": None,
+        "daily_streak": 0,
+        "last_mine": None,
+        "mine_streak": 0,
+        "last_caca": None,
+        "caca_streak": 0,
+        # {"inicio": epoch, "fim": epoch, "channel_id": id} durante uma caça longa
+        "caca_longa_ativa": None,
+        "trabalho_atual": None,
+        "last_trabalho": None,
+        "last_message_xp": None,
+        "missoes": [],
+        "missoes_completas": [],
+    }
+    TEMPOS = frozenset({"last_daily", "last_mine", "last_caca", "last_trabalho", "last_message_xp"})
+    __slots__ = tuple(PADROES)
+
+
+class ProfileRecord(Record):
+    """Registro do perfil.json"""
+
+    PADROES = {
+        "sobre": None,
+        "casado_com": None,
+    }
+    __slots__ = tuple(PADROES)
+
+
+class VoiceRecord(Record):
+    """Registro do top_tempo.json (segundos em call)"""
+
+    PADROES = {
+        "tempo_total": 0,
+    }
+    __slots__ = tuple(PADROES)
+
+
+class InventoryRecord(Record):
+    """Registro do inventario.json (as almas ficam no livro-razão)"""
+
+    PADROES = {
+        "itens": {},
+        "equipados": {},
+        "created_at": "",
+        # chave de operação -> maior número já aplicado (ver InventoryService.transaction)
+        "marcos": {},
+    }
+    __slots__ = tuple(PADROES)
+
+
+# ==============================
+# Coleções
+# ==============================
+def decode_colecao(tipo: type[Record], dados: dict) -> dict:
+    """uid -> dict do JSON para uid -> registro"""
+    return {
+        chave: tipo.from_json(registro) if isinstance(registro, dict) else registro
+        for chave, registro in dados.items()
+    }
+
+
+def encode_colecao(registros: dict) -> dict:
+    """uid -> registro para o formato JSON"""
+    return {
+        chave: registro.to_json() if isinstance(registro, Record) else registro
+        for chave, registro in registros.items()
+    }
@@ -0,0 +1,100 @@
+"""Orçamento de renomeios e texto do timer dos canais de voz.
+
+O Discord só permite renomear um canal 2 vezes a cada 10 minutos, o que
+sustenta um renomeio a cada 5 minutos. O timer mostra o tempo de call
+arredondado para a menor granularidade cujo próximo passo já encontra um
+renomeio livre: em regime vai de 5 em 5 minutos e só engrossa (até horas)
+quando o orçamento foi gasto fora do ritmo, como após um 429.
+
+A granularidade é escolhida quando um renomeio é feito e vale até o próximo,
+e o tempo mostrado nunca volta: um valor menor ou igual ao que já está no
+nome não gera renomeio. Assim uma troca de granularidade não faz o timer
+recuar nem gasta renomeios à toa.
+"""
+
+from collections import deque
+
+RENAME_LIMIT = 2
+RENAME_WINDOW = 600
+# Granularidades do timer (segundos), da mais fina para a mais grossa
+GRANULARIDADES = (300, 900, 3600)
+
+
+class RenameBudget:
+    """Conta os renomeios feitos em cada canal dentro da janela do Discord"""
+
+    def __init__(self, limit: int = RENAME_LIMIT, window: int = RENAME_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._usos: dict[int, deque] = {}
+
+    def restante(self, channel_id: int, agora: float) -> int:
+        usos = self._usos.get(channel_id)
+        if not usos:
+            return self.limit
+        while usos and usos[0] <= agora - self.window:
+            usos.popleft()
+        return max(self.limit - len(usos), 0)
+
+    def livre_em(self, channel_id: int, agora: float) -> float:
+        """Instante em que haverá um renomeio disponível (sem alterar o orçamento)"""
+        usos = [uso for uso in self._usos.get(channel_id, ()) if uso > agora - self.window]
+        if len(usos) < self.limit:
+            return agora
+        return usos[len(usos) - self.limit] + self.window
+
+    def consumir(self, channel_id: int, agora: float) -> None:
+        self._usos.setdefault(channel_id, deque()).append(agora)
+
+    def esgotar(self, channel_id: int, agora: float, retry_after: float) -> None:
+        """Marca o orçamento como esgotado até `retry_after` segundos (após um 429)"""
+        liberado = agora + retry_after - self.window
+        self._usos[channel_id] = deque([liberado] * self.limit)
+
+    def esquecer(self, channel_id: int) -> None:
+        self._usos.pop(channel_id, None)
+
+
+def formatar_tempo(segundos: int, granularidade: int = 300) -> str:
+    horas = segundos // 3600
+    if granularidade >= 3600:
+        return f"{horas}h"
+    minutos = (segundos % 3600) // 60
+    return f"{horas}:{minutos:02d}"
+
+
+class TimerLabels:
+    """Tempo mostrado no nome de cada canal, sem nunca voltar"""
+
+    def __init__(self, budget: RenameBudget):
+        self.budget = budget
+        # channel_id -> (granularidade escolhida no último renomeio, segundos mostrados)
+        self._mostrado: dict[int, tuple[int, int]] = {}
+
+    def proximo(self, channel_id: int, inicio: int, agora: float) -> tuple[int, str] | None:
+        """(segundos, texto) a mostrar agora, ou None se o nome atual ainda vale"""
+        estado = self._mostrado.get(channel_id)
+        if estado is None:
+            granularidade, mostrado = self._granularidade(channel_id, agora), -1
+        else:
+            granularidade, mostrado = estado
+        decorrido = int(agora) - inicio
+        decorrido -= decorrido % granularidade
+        if decorrido <= mostrado:
+            return None
+        return decorrido, formatar_tempo(decorrido, granularidade)
+
+    def mostrado(self, channel_id: int, segundos: int, agora: float) -> None:
+        """Registra o tempo que ficou no nome e escolhe a granularidade até o próximo renomeio"""
+        self._mostrado[channel_id] = (self._granularidade(channel_id, agora), segundos)
+
+    def _granularidade(self, channel_id: int, agora: float) -> int:
+        """Menor passo cujo próximo renomeio já terá orçamento"""
+        livre = self.budget.livre_em(channel_id, agora)
+        for granularidade in GRANULARIDADES:
+            if agora + granularidade >= livre:
+                return granularidade
+        return GRANULARIDADES[-1]
+
+    def esquecer(self, channel_id: int) -> None:
+        self._mostrado.pop(channel_id, None)
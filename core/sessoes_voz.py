@@ -0,0 +1,213 @@
+"""Diário das sessões de call, para o tempo em call sobreviver a reinícios.
+
+As sessões abertas e os créditos de quem saiu da call vão para um arquivo
+JSON Lines só de acréscimo (uma linha pequena por evento, sem reescrever
+nenhum banco). Periodicamente o bot credita o tempo das sessões abertas,
+grava o top_tempo e compacta o diário, que passa a conter só as sessões
+ainda abertas. Na inicialização o diário é relido: créditos ainda não
+gravados são reaplicados e as sessões abertas são conferidas com quem está
+de fato nas calls.
+
+Cada "fechar" leva um número crescente `n`. Depois de gravar o top_tempo, o
+bot acrescenta um marco "gravado" com o último número que a gravação já
+inclui; na releitura, os créditos até esse número não são reaplicados. Assim
+uma queda entre a gravação do top_tempo e a compactação não credita o mesmo
+tempo duas vezes.
+
+Formato das linhas:
+    {"ev": "sessao", "uid": ..., "inicio": ..., "creditado": ...}  (compactação)
+    {"ev": "abrir", "uid": ..., "ts": ...}
+    {"ev": "fechar", "uid": ..., "ts": ..., "creditar": segundos, "n": ...}
+    {"ev": "gravado", "ate": n}
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+
+from core.io_assincrono import gravar
+
+
+class VoiceSessionJournal:
+    """Sessões de call abertas, com diário em disco"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # user_id -> [início da sessão, creditado até] (epoch em segundos)
+        self._sessoes: dict[int, list[float]] = {}
+        # Sessões lidas do diário que ainda não foram conferidas com as calls
+        self._recuperadas: set[int] = set()
+        self._arquivo = None
+        # Linhas acrescentadas durante uma compactação no pool de I/O (None fora dela)
+        self._durante: list[str] | None = None
+        # Número do último "fechar" registrado
+        self._seq = 0
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._sessoes
+
+    def sessoes(self) -> dict[int, float]:
+        """user_id -> início da sessão aberta"""
+        return {uid: sessao[0] for uid, sessao in self._sessoes.items()}
+
+    def _append(self, registro: dict) -> None:
+        if self._arquivo is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._arquivo = self.path.open("a", encoding="utf-8")
+        linha = json.dumps(registro, separators=(",", ":")) + "\n"
+        self._arquivo.write(linha)
+        self._arquivo.flush()
+        if self._durante is not None:
+            self._durante.append(linha)
+
+    def recover(self) -> dict[int, int]:
+        """Relê o diário. Retorna os créditos de sessões fechadas que ainda não foram gravados."""
+        # (n, uid, segundos) dos créditos ainda não cobertos por um marco "gravado"
+        fechados: list[tuple[int, int, int]] = []
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as fp:
+                for linha in fp:
+                    try:
+                        registro = json.loads(linha)
+                    except json.JSONDecodeError:
+                        # Última linha pode ter ficado pela metade numa queda
+                        continue
+                    uid = registro.get("uid")
+                    ev = registro.get("ev")
+                    if ev == "sessao":
+                        self._sessoes[uid] = [registro["inicio"], registro["creditado"]]
+                    elif ev == "abrir":
+                        self._sessoes[uid] = [registro["ts"], registro["ts"]]
+                    elif ev == "fechar":
+                        self._sessoes.pop(uid, None)
+                        # Linhas sem número (formato antigo) valem como anteriores a qualquer marco
+                        n = registro.get("n", 0)
+                        self._seq = max(self._seq, n)
+                        fechados.append((n, uid, registro.get("creditar", 0)))
+                    elif ev == "gravado":
+                        ate = registro["ate"]
+                        self._seq = max(self._seq, ate)
+                        fechados = [fechado for fechado in fechados if fechado[0] > ate]
+        pendentes: dict[int, int] = {}
+        for _, uid, segundos in fechados:
+            pendentes[uid] = pendentes.get(uid, 0) + segundos
+        self._recuperadas = set(self._sessoes)
+        return pendentes
+
+    def abrir(self, user_id: int, agora: float) -> None:
+        self._sessoes[user_id] = [agora, agora]
+        self._recuperadas.discard(user_id)
+        self._append({"ev": "abrir", "uid": user_id, "ts": agora})
+
+    def fechar(self, user_id: int, agora: float) -> int:
+        """Fecha a sessão e retorna os segundos ainda não creditados"""
+        sessao = self._sessoes.pop(user_id, None)
+        self._recuperadas.discard(user_id)
+        if sessao is None:
+            return 0
+        segundos = max(int(agora - sessao[1]), 0)
+        self._seq += 1
+        self._append({"ev": "fechar", "uid": user_id, "ts": agora, "creditar": segundos, "n": self._seq})
+        return segundos
+
+    def posicao(self) -> int:
+        """Número do último crédito registrado (tomar antes de gravar o top_tempo)"""
+        return self._seq
+
+    def gravado(self, ate: int) -> None:
+        """Marca os créditos até `ate` como já gravados no top_tempo"""
+        self._append({"ev": "gravado", "ate": ate})
+
+    def creditar_abertas(self, agora: float) -> dict[int, int]:
+        """Credita o tempo decorrido das sessões abertas até `agora`"""
+        creditos = {}
+        for uid, sessao in self._sessoes.items():
+            if uid in self._recuperadas:
+                continue
+            segundos = int(agora - sessao[1])
+            if segundos > 0:
+                # Soma só os segundos inteiros para a fração não se perder
+                sessao[1] += segundos
+                creditos[uid] = segundos
+        return creditos
+
+    def reconcile(self, presentes: Iterable[int], agora: float) -> dict[int, int]:
+        """Confere as sessões com quem está nas calls e retorna créditos a aplicar.
+
+        - sessão recuperada e membro ainda na call: continua, sem creditar o
+          tempo em que o bot ficou fora
+        - sessão recuperada e membro fora da call: fecha sem crédito extra
+        - sessão ativa e membro fora da call (evento perdido): fecha creditando
+        - membro na call sem sessão: abre uma sessão nova
+        """
+        presentes = set(presentes)
+        creditos = {}
+        for uid in list(self._sessoes):
+            recuperada = uid in self._recuperadas
+            if uid in presentes:
+                if recuperada:
+                    self._sessoes[uid][1] = agora
+            elif recuperada:
+                self.fechar(uid, self._sessoes[uid][1])
+            else:
+                segundos = self.fechar(uid, agora)
+                if segundos:
+                    creditos[uid] = segundos
+        self._recuperadas.clear()
+        for uid in presentes - self._sessoes.keys():
+            self.abrir(uid, agora)
+        return creditos
+
+    def _compactado(self) -> list[str]:
+        """Linhas do diário compactado: só as sessões abertas"""
+        return [
+            json.dumps(
+                {"ev": "sessao", "uid": uid, "inicio": inicio, "creditado": creditado},
+                separators=(",", ":"),
+            ) + "\n"
+            for uid, (inicio, creditado) in self._sessoes.items()
+        ]
+
+    @staticmethod
+    def _gravar_tmp(tmp: Path, linhas: list[str]) -> None:
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("w", encoding="utf-8") as fp:
+            fp.writelines(linhas)
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    def _tmp(self) -> Path:
+        return self.path.with_name(self.path.name + ".tmp")
+
+    def compactar(self) -> None:
+        """Reescreve o diário só com as sessões abertas (após gravar o top_tempo)"""
+        self.close()
+        self._gravar_tmp(self._tmp(), self._compactado())
+        os.replace(self._tmp(), self.path)
+
+    async def compactar_async(self) -> None:
+        """Como `compactar()`, com o arquivo novo escrito no pool de I/O
+
+        Os eventos que chegam enquanto o pool escreve continuam indo para o
+        diário atual e são copiados para o novo antes da troca, que acontece
+        de volta no loop.
+        """
+        if self._durante is not None:
+            # Já há uma compactação em andamento
+            return
+        self._durante = []
+        try:
+            await gravar(self.path, self._gravar_tmp, self._tmp(), self._compactado())
+            if self._durante:
+                with self._tmp().open("a", encoding="utf-8") as fp:
+                    fp.writelines(self._durante)
+            self.close()
+            os.replace(self._tmp(), self.path)
+        finally:
+            self._durante = None
+
+    def close(self) -> None:
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
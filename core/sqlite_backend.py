@@ -0,0 +1,230 @@
+"""Backend SQLite opcional para os bancos de usuários.
+
+Cada banco (db, perfil, top_tempo, inventario) vira uma coleção da tabela
+`registros`, com uma linha por usuário indexada por (colecao, chave). Os
+bancos residentes passam só os registros marcados como alterados, e cada
+gravação faz upsert/delete apenas dessas linhas, em vez de reescrever o
+arquivo todo.
+
+Ative com `STORAGE_BACKEND=sqlite` (variável de ambiente ou config.json).
+Migração dos JSON existentes e exportação de volta:
+
+    python -m core.sqlite_backend importar
+    python -m core.sqlite_backend exportar
+"""
+
+import argparse
+import sqlite3
+import threading
+from pathlib import Path
+
+from core import codec
+from core.config import BASE_DIR, resolve_setting
+from core.persistencia import read_json, write_json_atomic
+
+DATA_DIR = BASE_DIR / "data"
+SQLITE_DB_PATH = DATA_DIR / "exilium.db"
+
+# coleção -> (arquivo JSON equivalente, chave onde ficam os usuários no JSON)
+COLECOES = {
+    "db": (DATA_DIR / "db.json", None),
+    "perfil": (DATA_DIR / "perfil.json", None),
+    "top_tempo": (DATA_DIR / "top_tempo.json", None),
+    "inventario": (DATA_DIR / "inventario.json", "usuarios"),
+}
+
+
+def _dumps(value) -> str:
+    return codec.dumps_str(value)
+
+
+class SQLiteBackend:
+    """Armazena registros JSON por usuário em um banco SQLite (modo WAL)"""
+
+    def __init__(self, path: Path = SQLITE_DB_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS registros ("
+            " colecao TEXT NOT NULL,"
+            " chave TEXT NOT NULL,"
+            " dados TEXT NOT NULL,"
+            " PRIMARY KEY (colecao, chave)"
+            ") WITHOUT ROWID"
+        )
+        self.conn.commit()
+        # Última versão gravada de cada registro, para gravar apenas o que mudou
+        self._gravados: dict[str, dict[str, str]] = {}
+        # As coleções são gravadas pelo pool de I/O: uma gravação por vez na conexão
+        self._lock = threading.Lock()
+
+    def load(self, colecao: str) -> dict:
+        """Carrega todos os registros de uma coleção"""
+        rows = self.conn.execute(
+            "SELECT chave, dados FROM registros WHERE colecao = ?", (colecao,)
+        ).fetchall()
+        self._gravados[colecao] = dict(rows)
+        return {chave: codec.loads(dados) for chave, dados in rows}
+
+    def save(self, colecao: str, registros: dict, completo: bool = True) -> int:
+        """Grava registros de uma coleção. Retorna quantas linhas mudaram.
+
+        Com `completo`, `registros` é a coleção inteira: grava só o que mudou
+        desde a última gravação e apaga as chaves que sumiram. Senão, são
+        apenas os registros alterados, com None para os removidos.
+        """
+        with self._lock:
+            return self._save(colecao, registros, completo)
+
+    def _save(self, colecao: str, registros: dict, completo: bool) -> int:
+        gravados = self._gravados.get(colecao)
+        if gravados is None:
+            gravados = dict(self.conn.execute(
+                "SELECT chave, dados FROM registros WHERE colecao = ?", (colecao,)
+            ).fetchall())
+            self._gravados[colecao] = gravados
+
+        upserts = []
+        removidos = []
+        for chave, valor in registros.items():
+            if valor is None:
+                if chave in gravados:
+                    removidos.append((colecao, chave))
+                continue
+            dados = _dumps(valor)
+            if gravados.get(chave) != dados:
+                upserts.append((colecao, chave, dados))
+        if completo:
+            removidos += [(colecao, chave) for chave in gravados if chave not in registros]
+
+        if not upserts and not removidos:
+            return 0
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO registros (colecao, chave, dados) VALUES (?, ?, ?) "
+                "ON CONFLICT (colecao, chave) DO UPDATE SET dados = excluded.dados",
+                upserts,
+            )
+            self.conn.executemany(
+                "DELETE FROM registros WHERE colecao = ? AND chave = ?", removidos
+            )
+
+        for _, chave, dados in upserts:
+            gravados[chave] = dados
+        for _, chave in removidos:
+            gravados.pop(chave, None)
+        return len(upserts) + len(removidos)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# ==============================
+# Seleção do backend
+# ==============================
+_backend: SQLiteBackend | None = None
+_backend_resolvido = False
+
+
+def get_backend() -> SQLiteBackend | None:
+    """Retorna o backend SQLite se configurado, ou None para usar os JSON"""
+    global _backend, _backend_resolvido
+    if not _backend_resolvido:
+        if str(resolve_setting("STORAGE_BACKEND", "json")).lower() == "sqlite":
+            _backend = SQLiteBackend()
+        _backend_resolvido = True
+    return _backend
+
+
+def load_collection(colecao: str) -> dict:
+    """Carrega os registros de uma coleção (uid -> registro)"""
+    path, aninhado = COLECOES[colecao]
+    backend = get_backend()
+    if backend is not None:
+        return backend.load(colecao)
+    data = read_json(path)
+    return data.get(aninhado, {}) if aninhado else data
+
+
+# Conteúdo atual de cada arquivo JSON, mantido pelas gravações parciais para
+# não precisar reler o arquivo a cada gravação
+_imagens: dict[Path, dict] = {}
+_imagens_lock = threading.Lock()
+
+
+def save_collection(colecao: str, registros: dict, completo: bool = True) -> None:
+    """Grava registros de uma coleção no backend configurado
+
+    Com `completo`, `registros` é a coleção inteira; senão, só os registros
+    alterados, com None para os removidos. Os registros passam a pertencer
+    à gravação: quem chama não deve alterá-los depois.
+    """
+    path, aninhado = COLECOES[colecao]
+    backend = get_backend()
+    if backend is not None:
+        backend.save(colecao, registros, completo)
+        return
+    # Sem SQLite o arquivo continua sendo reescrito inteiro, mas a partir da
+    # imagem em memória, sem reler o disco
+    with _imagens_lock:
+        imagem = _imagens.get(path)
+        if imagem is None:
+            imagem = {} if completo and not aninhado else read_json(path)
+        if completo:
+            if aninhado:
+                imagem[aninhado] = registros
+            else:
+                imagem = registros
+        else:
+            alvo = imagem.setdefault(aninhado, {}) if aninhado else imagem
+            for chave, valor in registros.items():
+                if valor is None:
+                    alvo.pop(chave, None)
+                else:
+                    alvo[chave] = valor
+        write_json_atomic(path, imagem)
+        _imagens[path] = imagem
+
+
+# ==============================
+# Importação / exportação
+# ==============================
+def importar_json(backend: SQLiteBackend) -> None:
+    """Copia os data/*.json existentes para o SQLite"""
+    for colecao, (path, aninhado) in COLECOES.items():
+        data = read_json(path)
+        registros = data.get(aninhado, {}) if aninhado else data
+        backend.save(colecao, registros)
+        print(f"✅ {path.name}: {len(registros)} registros importados")
+
+
+def exportar_json(backend: SQLiteBackend, pretty: bool = False) -> None:
+    """Grava o conteúdo do SQLite de volta nos data/*.json"""
+    for colecao, (path, aninhado) in COLECOES.items():
+        registros = backend.load(colecao)
+        write_json_atomic(path, {aninhado: registros} if aninhado else registros, pretty=pretty)
+        print(f"✅ {path.name}: {len(registros)} registros exportados")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migração entre data/*.json e o banco SQLite")
+    parser.add_argument("acao", choices=["importar", "exportar"])
+    parser.add_argument("--banco", type=Path, default=SQLITE_DB_PATH, help="Caminho do arquivo SQLite")
+    parser.add_argument("--legivel", action="store_true", help="Exporta os JSON indentados")
+    args = parser.parse_args()
+
+    backend = SQLiteBackend(args.banco)
+    try:
+        if args.acao == "importar":
+            importar_json(backend)
+        else:
+            exportar_json(backend, pretty=args.legivel)
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Banco residente em memória com gravação adiada (write-behind)."""
+
+from collections import Counter
+from typing import Callable
+
+from core.io_assincrono import Retrato, gravar
+
+
+class JsonStore:
+    """Mantém um banco JSON carregado em memória e só grava quando houver alterações.
+
+    `load()` devolve sempre o mesmo dicionário, então quem altera os registros
+    só precisa chamar `mark_dirty()` com as chaves alteradas (ou `save()`,
+    que marca o banco inteiro); a gravação real acontece em `flush_async()`
+    (no pool de I/O, chamado periodicamente) e em `flush()` no desligamento
+    do bot.
+
+    O `saver` recebe `(registros, completo)`: com `completo`, o banco inteiro;
+    senão, só os registros marcados, com None para os que foram removidos.
+    Ele recebe sempre uma cópia, nunca os registros vivos.
+    """
+
+    def __init__(self, loader: Callable[[], dict], saver: Callable[[dict, bool], None]):
+        self._loader = loader
+        self._saver = saver
+        self._data: dict | None = None
+        self._dirty_all = False
+        self._dirty_keys: set[str] = set()
+        # Gravações entregues ao pool e ainda não concluídas. Um pedido na fila
+        # pode ser substituído pelo seguinte (`gravar` só executa o mais
+        # recente), então cada pedido leva também o que os anteriores levavam.
+        self._enviadas: Counter[str] = Counter()
+        self._completas_enviadas = 0
+
+    def load(self) -> dict:
+        """Retorna o banco residente, carregando do disco apenas na primeira vez"""
+        if self._data is None:
+            self._data = self._loader()
+        return self._data
+
+    def save(self, data: dict | None = None) -> None:
+        """Marca o banco inteiro como alterado (mesmo contrato do antigo save_db)"""
+        if data is not None:
+            self._data = data
+        self._dirty_all = True
+
+    def mark_dirty(self, *keys: str) -> None:
+        """Marca registros específicos como alterados"""
+        self._dirty_keys.update(keys)
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty_all or bool(self._dirty_keys)
+
+    def _pendentes(self) -> tuple[bool, set[str]]:
+        """Tira do estado sujo o que a próxima gravação precisa levar"""
+        completo = self._dirty_all or self._completas_enviadas > 0
+        chaves = set() if completo else self._dirty_keys | set(self._enviadas)
+        self._dirty_all = False
+        self._dirty_keys = set()
+        return completo, chaves
+
+    def _retrato(self, completo: bool, chaves: set[str]) -> Retrato:
+        data = self._data
+        return Retrato(data if completo else {chave: data.get(chave) for chave in chaves})
+
+    def flush(self) -> bool:
+        """Grava o banco se houver alterações pendentes. Retorna True se gravou."""
+        if self._data is None or not self.dirty:
+            return False
+        completo, chaves = self._pendentes()
+        try:
+            self._saver(self._retrato(completo, chaves).abrir(), completo)
+        except Exception:
+            self._marcar(completo, chaves)
+            raise
+        return True
+
+    async def flush_async(self) -> bool:
+        """Como `flush()`, mas grava no pool de I/O sem bloquear o event loop"""
+        if self._data is None or not self.dirty:
+            return False
+        # Limpa antes: o que mudar durante a gravação fica marcado para a próxima
+        completo, chaves = self._pendentes()
+        # Só os registros alterados são copiados no loop
+        retrato = self._retrato(completo, chaves)
+        self._completas_enviadas += completo
+        self._enviadas.update(chaves)
+        try:
+            await gravar(self, self._saver, retrato, completo)
+        except Exception:
+            self._marcar(completo, chaves)
+            raise
+        finally:
+            self._completas_enviadas -= completo
+            self._enviadas.subtract(chaves)
+            self._enviadas = +self._enviadas
+        return True
+
+    def _marcar(self, completo: bool, chaves: set[str]) -> None:
+        """Devolve ao estado sujo o que uma gravação que falhou levava"""
+        self._dirty_all = self._dirty_all or completo
+        self._dirty_keys.update(chaves)
@@ -0,0 +1,44 @@
+"""Acumulador de XP por mensagem.
+
+O cooldown de XP é a ação "xp_mensagem" do `CooldownService`, verificado em
+memória, então mensagens dentro da janela de cooldown não consultam o banco. O XP ganho e o progresso da
+missão "mensagens" são acumulados aqui e aplicados em lote por `drain()`.
+"""
+
+import datetime
+
+from core.cooldowns import CooldownService
+
+
+class MessageXPAccumulator:
+    """Controla o cooldown de XP por usuário e acumula os ganhos pendentes"""
+
+    ACAO = "xp_mensagem"
+
+    def __init__(self, cooldowns: CooldownService):
+        self.cooldowns = cooldowns
+        # user_id -> [xp acumulada, mensagens que deram XP, horário do último ganho]
+        self._pendentes: dict[int, list] = {}
+
+    def registrar(self, user_id: int, xp: int) -> bool:
+        """Registra o XP de uma mensagem. Retorna False se ainda estiver em cooldown."""
+        if not self.cooldowns.tentar(user_id, self.ACAO):
+            return False
+
+        pendente = self._pendentes.get(user_id)
+        if pendente is None:
+            pendente = self._pendentes[user_id] = [0, 0, None]
+        pendente[0] += xp
+        pendente[1] += 1
+        pendente[2] = datetime.datetime.now()
+        return True
+
+    def drain(self) -> dict[int, tuple[int, int, datetime.datetime]]:
+        """Retorna e limpa os ganhos pendentes: user_id -> (xp, mensagens, último ganho)"""
+        pendentes = {uid: tuple(p) for uid, p in self._pendentes.items()}
+        self._pendentes.clear()
+
+        # Descarta os cooldowns já vencidos (de todas as ações) para a tabela não crescer sem limite
+        self.cooldowns.limpar()
+
+        return pendentes
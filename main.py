@@ -4,12 +4,37 @@ from discord.ext import commands, tasks
 
 import datetime
 import json
+import os
 import random
 import asyncio
+import signal
+import time
 
 from itertools import cycle
 from pathlib import Path
 
+from core.agendador import PersistentScheduler
+from core.analise_voz import VoiceAnalytics
+from core.concorrencia import UserLocks
+from core.esquemas import ECONOMIA, PERFIL, TOP_TEMPO
+from core.registros import EconomyRecord, ProfileRecord, Record, VoiceRecord, decode_colecao, encode_colecao
+from core.config import resolve_setting
+from core.identidades import IdentityCache
+from core.inicializacao import CogSpec, carregar_cogs, sincronizar_comandos
+from core.inventarios import InventoryService
+from core.cooldowns import CooldownService
+from core.io_assincrono import encerrar as encerrar_io
+from core.janelas import PERIODOS as PERIODOS_RANKING, WindowedCounters
+from core.ledger import Ledger
+from core.mercado import Market
+from core.niveis import calculate_level as calculate_level_from_xp
+from core.persistencia import read_json, write_json_atomic
+from core.ranking import RankingIndex
+from core.sessoes_voz import VoiceSessionJournal
+from core.sqlite_backend import load_collection, save_collection
+from core.store import JsonStore
+from core.xp_mensagens import MessageXPAccumulator
+
 # ==============================
 # Configuração de Caminhos JSON
 # ==============================
@@ -18,96 +43,47 @@ DATA_DIR = BASE_DIR / "data"
 CONFIG_PATH = BASE_DIR / "config.json"
 
 ECONOMIA_DB_PATH = DATA_DIR / "economia.json"
-PERFIL_DB_PATH = DATA_DIR / "perfil.json"
-TOP_TEMPO_DB_PATH = DATA_DIR / "top_tempo.json"
-DB_JSON_PATH = DATA_DIR / "db.json"
-
-def ensure_data_dir() -> None:
-    """Garante que o diretório de dados existe"""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
+IDENTIDADES_PATH = DATA_DIR / "identidades.json"
+AGENDAMENTOS_PATH = DATA_DIR / "agendamentos.json"
+SESSOES_VOZ_PATH = DATA_DIR / "sessoes_voz.jsonl"
+ANALISE_VOZ_PATH = DATA_DIR / "analise_voz.json"
+JANELAS_PATH = DATA_DIR / "janelas.json"
+LEDGER_PATH = DATA_DIR / "ledger.jsonl"
+SALDOS_PATH = DATA_DIR / "saldos.json"
+COMANDOS_PATH = DATA_DIR / "comandos.json"
+MERCADO_PATH = DATA_DIR / "mercado.json"
 
 # Funções de Economia
-def ensure_economia_db_file() -> None:
-    ensure_data_dir()
-    if not ECONOMIA_DB_PATH.exists():
-        ECONOMIA_DB_PATH.write_text("{}", encoding="utf-8")
-
 def load_economia_db() -> dict:
-    ensure_economia_db_file()
-    try:
-        with ECONOMIA_DB_PATH.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except json.JSONDecodeError:
-        return {}
+    return read_json(ECONOMIA_DB_PATH)
 
 def save_economia_db(data: dict) -> None:
-    ensure_economia_db_file()
-    with ECONOMIA_DB_PATH.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
+    write_json_atomic(ECONOMIA_DB_PATH, data)
 
 # Funções de Perfil
-def ensure_perfil_db_file() -> None:
-    ensure_data_dir()
-    if not PERFIL_DB_PATH.exists():
-        PERFIL_DB_PATH.write_text("{}", encoding="utf-8")
-
 def load_perfil_db() -> dict:
-    ensure_perfil_db_file()
-    try:
-        with PERFIL_DB_PATH.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except json.JSONDecodeError:
-        return {}
+    return decode_colecao(ProfileRecord, load_collection("perfil"))
 
-def save_perfil_db(data: dict) -> None:
-    ensure_perfil_db_file()
-    with PERFIL_DB_PATH.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
+def save_perfil_db(data: dict, completo: bool = True) -> None:
+    save_collection("perfil", encode_colecao(data), completo)
 
 # Funções de Top Tempo
-def ensure_top_tempo_db_file() -> None:
-    ensure_data_dir()
-    if not TOP_TEMPO_DB_PATH.exists():
-        TOP_TEMPO_DB_PATH.write_text("{}", encoding="utf-8")
-
 def load_top_tempo_db() -> dict:
-    ensure_top_tempo_db_file()
-    try:
-        with TOP_TEMPO_DB_PATH.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except json.JSONDecodeError:
-        return {}
+    return decode_colecao(VoiceRecord, load_collection("top_tempo"))
 
-def save_top_tempo_db(data: dict) -> None:
-    ensure_top_tempo_db_file()
-    with TOP_TEMPO_DB_PATH.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
+def save_top_tempo_db(data: dict, completo: bool = True) -> None:
+    save_collection("top_tempo", encode_colecao(data), completo)
 
 # Funções de DB Geral
-def ensure_db_file() -> None:
-    ensure_data_dir()
-    if not DB_JSON_PATH.exists():
-        DB_JSON_PATH.write_text("{}", encoding="utf-8")
-
 def load_db() -> dict:
-    ensure_db_file()
-    try:
-        with DB_JSON_PATH.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except json.JSONDecodeError:
-        return {}
+    return decode_colecao(EconomyRecord, load_collection("db"))
 
-def save_db(data: dict) -> None:
-    ensure_db_file()
-    with DB_JSON_PATH.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
+def save_db(data: dict, completo: bool = True) -> None:
+    save_collection("db", encode_colecao(data), completo)
 
 def sync_all_databases() -> None:
     """Sincroniza todos os bancos de dados"""
     try:
-        economia = load_economia_db()
-        save_economia_db(economia)
-        
         perfil = load_perfil_db()
         save_perfil_db(perfil)
         
@@ -123,8 +99,6 @@ def sync_all_databases() -> None:
 
 
 def resolve_token() -> str:
-    import os
-    
     # Primeiro tenta variável de ambiente (para Square Cloud)
     token = os.getenv("TOKEN")
     if token:
@@ -147,6 +121,15 @@ def resolve_token() -> str:
 
 TOKEN = resolve_token()
 
+# Intervalo (em segundos) entre gravações do banco residente em memória
+DB_FLUSH_INTERVAL = int(resolve_setting("DB_FLUSH_INTERVAL", 30))
+# Intervalo (em segundos) entre aplicações em lote do XP por mensagem
+XP_COMMIT_INTERVAL = int(resolve_setting("XP_COMMIT_INTERVAL", 10))
+# Intervalo (em segundos) entre créditos do tempo das calls em andamento
+VOICE_CHECKPOINT_INTERVAL = int(resolve_setting("VOICE_CHECKPOINT_INTERVAL", 60))
+# Sincroniza os comandos mesmo sem alteração na assinatura
+FORCE_COMMAND_SYNC = str(resolve_setting("FORCE_COMMAND_SYNC", "0")).lower() in ("1", "true", "sim")
+
 # ==============================
 # Cria o BOT e variáveis globais
 # ==============================
@@ -171,10 +154,47 @@ except Exception:
 bot._last_presence = None
 bot.call_times = {}
 bot.active_users = set()
-bot.db = load_db
-bot.save_db = save_db
-bot.load_top_tempo_db = load_top_tempo_db
-bot.save_top_tempo_db = save_top_tempo_db
+# db.json fica residente em memória; as alterações são gravadas pelo flush_db
+db_store = JsonStore(load_db, save_db)
+bot.db_store = db_store
+bot.db = db_store.load
+bot.save_db = db_store.save
+# perfil.json (sobre mim, casamento) também fica residente, gravado pelo flush_db
+perfil_store = JsonStore(load_perfil_db, save_perfil_db)
+bot.perfil_store = perfil_store
+# Cooldowns (daily, mine, caça, trabalhar, XP por mensagem) verificados em memória
+bot.cooldowns = CooldownService()
+bot.cooldowns.registrar("xp_mensagem", 30, "last_message_xp")
+message_xp = MessageXPAccumulator(bot.cooldowns)
+# Índices de ranking mantidos incrementalmente pelos caminhos de escrita
+bot.rankings = RankingIndex()
+# Locks por usuário para as alterações da economia (cooldowns, saldo, transferências)
+bot.locks = UserLocks()
+# Rankings do dia/semana/mês atuais (tempo em call, almas e XP ganhas)
+bot.janelas = WindowedCounters(JANELAS_PATH)
+# Livro-razão das almas: todo ganho, gasto e transferência passa por ele
+bot.ledger = Ledger(LEDGER_PATH, SALDOS_PATH)
+bot.ledger.on_lancamento(lambda uid, delta, motivo, saldo: bot.rankings.update("soul", uid, saldo))
+# Lançamentos contam como alteração do usuário (ver UserLocks.mudou)
+bot.ledger.on_lancamento(lambda uid, delta, motivo, saldo: bot.locks.alterado(uid))
+# Inventários da loja (itens e equipados), alterados por transações com lock por usuário
+bot.inventarios = InventoryService(bot.ledger, bot.locks)
+# Livros de ofertas do mercado entre players, com custódia sobre os inventários
+bot.mercado = Market(MERCADO_PATH, bot.inventarios)
+# Identidade (bot?/nome) dos usuários, para rankings e perfis não chamarem fetch_user em massa
+bot.identities = IdentityCache(bot, IDENTIDADES_PATH)
+# Ações com prazo (mutes, cargos temporários, prisão) que sobrevivem a reinícios
+bot.agendamentos = PersistentScheduler(AGENDAMENTOS_PATH)
+# top_tempo.json fica residente; só é gravado no checkpoint das sessões de call
+top_tempo_store = JsonStore(load_top_tempo_db, save_top_tempo_db)
+bot.top_tempo_store = top_tempo_store
+bot.load_top_tempo_db = top_tempo_store.load
+bot.save_top_tempo_db = top_tempo_store.save
+# Sessões de call abertas, com diário em disco para sobreviver a quedas
+voice_sessions = VoiceSessionJournal(SESSOES_VOZ_PATH)
+# Agregados por hora de tempo em call por canal, usuário e servidor
+voice_analytics = VoiceAnalytics(ANALISE_VOZ_PATH)
+bot.voice_analytics = voice_analytics
 
 status_messages = [
     "Bot in Dev... 🚧",
@@ -199,111 +219,35 @@ def format_time(seconds: int) -> str:
     return f"{hours}h {minutes}m {secs}s"
 
 
-def ensure_user_record(user_id: int) -> tuple[dict, str]:
-    """Garante que o usuário existe no banco de dados principal"""
-    uid = str(user_id)
-    db = bot.db()
-    if uid not in db:
-        db[uid] = {}
-        bot.save_db(db)
-    return db, uid
-
-
 def ensure_perfil_record(user_id: int) -> tuple[dict, str]:
-    """Garante que o usuário existe no banco de dados de perfil"""
-    uid = str(user_id)
-    db = load_perfil_db()
-    if uid not in db:
-        db[uid] = {
-            "sobre": None,
-            "casado_com": None
-        }
-        save_perfil_db(db)
-    else:
-        # Garantir que campos novos existam para usuários antigos
-        defaults = {
-            "sobre": None,
-            "casado_com": None
-        }
-        for key, value in defaults.items():
-            if key not in db[uid]:
-                db[uid][key] = value
-        save_perfil_db(db)
-    return db, uid
-
-
-def ensure_top_tempo_record(user_id: int) -> tuple[dict, str]:
-    """Garante que o usuário existe no banco de dados de top tempo"""
+    """Garante que o usuário existe no banco de dados de perfil (só grava ao criar)"""
     uid = str(user_id)
-    db = load_top_tempo_db()
+    db = perfil_store.load()
     if uid not in db:
-        db[uid] = {
-            "tempo_total": 0
-        }
-        save_top_tempo_db(db)
-    else:
-        # Garantir que campos novos existam para usuários antigos
-        if "tempo_total" not in db[uid]:
-            db[uid]["tempo_total"] = 0
-            save_top_tempo_db(db)
+        db[uid] = PERFIL.novo()
+        perfil_store.mark_dirty(uid)
     return db, uid
 
 
-async def get_user_rank_call(user_id: str, interaction: discord.Interaction):
-    """Calcula o ranking do usuário em tempo de call"""
-    db = load_top_tempo_db()
-    ranking_items = []
-    checked_users = {}  # Cache de usuários já verificados
-    
-    for uid, data in db.items():
-        try:
-            uid_int = int(uid)
-            is_bot = None
-            
-            # Verificar cache primeiro
-            if uid in checked_users:
-                is_bot = checked_users[uid]
-            else:
-                member = interaction.guild.get_member(uid_int) if interaction.guild else None
-                if member:
-                    is_bot = member.bot
-                    checked_users[uid] = is_bot
-                else:
-                    try:
-                        user = await bot.fetch_user(uid_int)
-                        is_bot = user.bot
-                        checked_users[uid] = is_bot
-                    except:
-                        checked_users[uid] = True  # Marcar como bot se não conseguir buscar
-                        continue
-            
-            if not is_bot:
-                value = data.get("tempo_total", 0)
-                ranking_items.append((uid, value))
-        except (ValueError, discord.NotFound, discord.HTTPException):
-            continue
-    
-    # Ordenar por valor (maior primeiro)
-    ranking_items.sort(key=lambda x: x[1], reverse=True)
-    
-    # Encontrar posição do usuário
-    for pos, (uid, _) in enumerate(ranking_items, start=1):
-        if uid == user_id:
-            return pos
-    
-    return None
+def get_user_rank_call(user_id: str) -> tuple[int, float] | None:
+    """Posição e percentil do usuário no ranking de tempo em call (O(log n))"""
+    ranking = bot.rankings["tempo"]
+    rank = ranking.rank(user_id)
+    if rank is None:
+        return None
+    return rank, ranking.percentile(user_id)
 
 
 @bot.tree.command(name="perfil", description="Mostra um perfil completo do usuário.")
 @app_commands.describe(membro="Membro que terá o perfil exibido")
 async def slash_perfil(interaction: discord.Interaction, membro: discord.Member | None = None):
     membro = membro or interaction.user
-    db, uid = ensure_perfil_record(membro.id)
+    uid = str(membro.id)
+    perfil = PERFIL.view(perfil_store.load().get(uid))
 
-    sobre = db[uid].get("sobre") or "❌ Nenhum Sobre Mim definido ainda."
+    sobre = perfil["sobre"] or "❌ Nenhum Sobre Mim definido ainda."
     # Ler tempo_total do banco de top_tempo
-    top_tempo_db = load_top_tempo_db()
-    tempo_total = top_tempo_db.get(uid, {}).get("tempo_total", 0)
+    tempo_total = TOP_TEMPO.view(top_tempo_store.load().get(uid))["tempo_total"]
     tempo_total_fmt = format_time(tempo_total)
 
     if membro.id in bot.active_users:
@@ -314,7 +258,7 @@ async def slash_perfil(interaction: discord.Interaction, membro: discord.Member
         tempo_atual = "❌ Não está em call"
 
     # Calcular ranking
-    rank_call = await get_user_rank_call(uid, interaction)
+    rank_call = get_user_rank_call(uid)
 
     embed = discord.Embed(
         title=f"👤 Perfil de {membro.display_name}",
@@ -330,16 +274,15 @@ async def slash_perfil(interaction: discord.Interaction, membro: discord.Member
     )
 
     # CASAMENTO
-    casado_com_id = db[uid].get("casado_com")
+    casado_com_id = perfil["casado_com"]
     if casado_com_id:
-        try:
-            casado_com_user = await bot.fetch_user(int(casado_com_id))
+        if await bot.identities.resolve(casado_com_id, interaction.guild):
             embed.add_field(
                 name="💍 Casado(a) com:",
-                value=casado_com_user.mention,
+                value=f"<@{casado_com_id}>",
                 inline=True
             )
-        except:
+        else:
             embed.add_field(
                 name="💍 Casado(a) com:",
                 value="Usuário não encontrado",
@@ -361,19 +304,20 @@ async def slash_perfil(interaction: discord.Interaction, membro: discord.Member
     embed.add_field(name="📝 Sobre Mim:", value=sobre, inline=False)
     
     # TEMPO EM CALL
-    rank_call_text = f"🏆 **#{rank_call}**" if rank_call else "❌ Sem ranking"
+    if rank_call:
+        rank_call_text = f"🏆 **#{rank_call[0]}** (acima de {rank_call[1]:.0f}% dos membros)"
+    else:
+        rank_call_text = "❌ Sem ranking"
     embed.add_field(
         name="🎧 Tempo em Call",
         value=f"**Atual:** {tempo_atual}\n**Total:** {tempo_total_fmt}\n**Rank:** {rank_call_text}",
         inline=False
     )
 
-    try:
-        user = await bot.fetch_user(membro.id)
-        if user.banner:
-            embed.set_image(url=user.banner.url)
-    except discord.HTTPException:
-        pass
+    # Banner só vem do fetch_user: o cache de identidades evita uma chamada por /perfil
+    banner = await bot.identities.banner(membro.id)
+    if banner:
+        embed.set_image(url=banner)
 
     embed.set_footer(text="Aeternum Exilium • Sistema de Perfil")
     await interaction.response.send_message(embed=embed)
@@ -406,59 +350,73 @@ async def slash_mensagem(interaction: discord.Interaction, titulo: str, texto: s
 async def slash_set_sobre(interaction: discord.Interaction, texto: str):
     db, uid = ensure_perfil_record(interaction.user.id)
     db[uid]["sobre"] = texto
-    save_perfil_db(db)
+    perfil_store.mark_dirty(uid)
     await interaction.response.send_message("✅ Sobre Mim atualizado!")
 
 
+PERIODOS = {"dia": "Últimas 24h", "semana": "Últimos 7 dias", "mes": "Últimos 30 dias"}
+# Períodos de calendário dos rankings (zeram na virada do dia/semana/mês)
+PERIODOS_CALENDARIO = {"dia": "Hoje", "semana": "Esta semana", "mes": "Este mês"}
+
+
 @bot.tree.command(name="top-tempo", description="Mostra o ranking de tempo em call.")
-async def slash_top_tempo(interaction: discord.Interaction):
-    db = load_top_tempo_db()
-    
-    # Filtrar apenas membros reais (não bots)
-    ranking_items = []
-    for uid, data in db.items():
-        try:
-            user_id = int(uid)
-            # Tenta buscar o membro no servidor
-            member = interaction.guild.get_member(user_id) if interaction.guild else None
-            if member:
-                # Se encontrou o membro, verifica se não é bot
-                if not member.bot:
-                    ranking_items.append((uid, data.get("tempo_total", 0)))
-            else:
-                # Se não encontrou no servidor, tenta buscar o usuário globalmente
-                user = await bot.fetch_user(user_id)
-                if not user.bot:
-                    ranking_items.append((uid, data.get("tempo_total", 0)))
-        except (ValueError, discord.NotFound, discord.HTTPException):
-            # Se não conseguir buscar, pula este usuário
-            continue
+@app_commands.describe(periodo="Período do ranking (padrão: todo o tempo)")
+@app_commands.choices(periodo=[
+    app_commands.Choice(name=PERIODOS_CALENDARIO[valor], value=valor) for valor in PERIODOS_RANKING
+])
+async def slash_top_tempo(interaction: discord.Interaction, periodo: app_commands.Choice[str] | None = None):
+    if periodo:
+        board = bot.janelas.board("tempo", periodo.value)
+        titulo = f"🏆 Top 10 — Tempo em Call ({periodo.name})"
+    else:
+        board = bot.rankings["tempo"]
+        titulo = "🏆 Top 10 — Tempo em Call"
 
-    ranking = sorted(
-        ranking_items,
-        key=lambda item: item[1],
-        reverse=True,
-    )[:10]
+    # Percorrer o índice do topo para baixo, pulando bots, até juntar 10 membros reais
+    ranking = await bot.identities.top_humanos(board, interaction.guild)
 
-    embed = discord.Embed(title="🏆 Top 10 — Tempo em Call", color=discord.Color.gold())
+    embed = discord.Embed(title=titulo, color=discord.Color.gold())
     if not ranking:
         embed.description = "Ainda não há registros."
     else:
         for pos, (uid, seconds) in enumerate(ranking, start=1):
-            member = interaction.guild.get_member(int(uid)) if interaction.guild else None
-            if member:
-                nome = member.display_name
-            else:
-                try:
-                    user = await bot.fetch_user(int(uid))
-                    nome = user.name
-                except:
-                    nome = f"Usuário {uid}"
+            nome = await bot.identities.display_name(uid, interaction.guild)
             embed.add_field(name=f"{pos}. {nome}", value=format_time(seconds), inline=False)
 
     await interaction.response.send_message(embed=embed)
 
 
+@bot.tree.command(name="top-canais", description="Mostra os canais de voz mais movimentados.")
+@app_commands.describe(periodo="Período considerado")
+@app_commands.choices(periodo=[
+    app_commands.Choice(name=nome, value=valor) for valor, nome in PERIODOS.items()
+])
+async def slash_top_canais(interaction: discord.Interaction, periodo: app_commands.Choice[str] | None = None):
+    if not interaction.guild:
+        return await interaction.response.send_message("❌ Use este comando em um servidor.", ephemeral=True)
+    janela = periodo.value if periodo else "semana"
+    # Inclui quem está em call agora sem creditar nada (isso fica com o checkpoint periódico)
+    agora = int(time.time())
+
+    guild = interaction.guild
+    ranking = voice_analytics.top(
+        "canal", janela, 10, filtro=lambda cid: guild.get_channel(cid) is not None, agora=agora
+    )
+    total = voice_analytics.total("servidor", guild.id, janela, agora=agora)
+
+    embed = discord.Embed(
+        title=f"🔊 Canais mais movimentados — {PERIODOS[janela]}",
+        description=f"Tempo total em call no servidor: **{format_time(total)}**",
+        color=discord.Color.blurple(),
+    )
+    if not ranking:
+        embed.description = "Ainda não há registros neste período."
+    for pos, (channel_id, seconds) in enumerate(ranking, start=1):
+        embed.add_field(name=f"{pos}. {guild.get_channel(channel_id).name}", value=format_time(seconds), inline=False)
+
+    await interaction.response.send_message(embed=embed)
+
+
 @bot.tree.command(name="callstatus", description="Mostra seu tempo atual na call.")
 async def slash_callstatus(interaction: discord.Interaction):
     user = interaction.user
@@ -556,6 +514,49 @@ async def update_status():
             pass
 
 
+@tasks.loop(seconds=DB_FLUSH_INTERVAL)
+async def flush_db():
+    # As gravações rodam no pool de I/O; o loop só espera
+    gravacoes = {
+        "db.json": db_store.flush_async(),
+        "perfil.json": perfil_store.flush_async(),
+        "identidades.json": bot.identities.flush_async(),
+        "janelas.json": bot.janelas.flush_async(),
+        "saldos.json": bot.ledger.flush_async(),
+        "mercado.json": bot.mercado.flush_async(),
+    }
+    resultados = await asyncio.gather(*gravacoes.values(), return_exceptions=True)
+    for nome, resultado in zip(gravacoes, resultados):
+        if isinstance(resultado, Exception):
+            print(f"❌ Erro ao gravar {nome}: {resultado}")
+
+
+def commit_message_xp() -> None:
+    """Aplica no banco o XP de mensagens acumulado em memória"""
+    pendentes = message_xp.drain()
+    if not pendentes:
+        return
+
+    db = bot.db()
+    for user_id, (xp_gain, mensagens, ultimo_ganho) in pendentes.items():
+        uid = str(user_id)
+        record = db.get(uid)
+        if record is None:
+            record = db[uid] = ECONOMIA.novo()
+        record["xp"] = record.get("xp", 0) + xp_gain
+        record["level"] = calculate_level_from_xp(record["xp"])
+        record["last_message_xp"] = ultimo_ganho
+        update_missao_progresso(db, uid, "mensagens", mensagens)
+        db_store.mark_dirty(uid)
+        bot.rankings.update("level", uid, (record["level"], record["xp"]))
+        bot.janelas.add("xp", uid, xp_gain)
+
+
+@tasks.loop(seconds=XP_COMMIT_INTERVAL)
+async def commit_xp():
+    commit_message_xp()
+
+
 @bot.event
 async def on_message(message):
     # Ignorar mensagens de bots
@@ -565,51 +566,13 @@ async def on_message(message):
     # Não ignorar mensagens que começam com o prefixo — deixamos o processamento
     # de comandos para `bot.process_commands(message)` abaixo.
     
-    # Ganhar XP por mensagem
-    db, uid = ensure_user_record(message.author.id)
-    
-    # Cooldown de XP por mensagem (30 segundos)
-    last_message_xp = db[uid].get("last_message_xp")
-    now = datetime.datetime.now()
-    
-    if not last_message_xp or (now - datetime.datetime.fromisoformat(last_message_xp)).total_seconds() >= 30:
-        # Ganhar XP aleatória (1-5 XP)
-        xp_gain = random.randint(1, 5)
-        
-        # Calcular nível antigo
-        old_xp = db[uid].get("xp", 0)
-        old_level = calculate_level_from_xp(old_xp)
-        
-        # Adicionar XP
-        db[uid]["xp"] = old_xp + xp_gain
-        db[uid]["last_message_xp"] = now.isoformat()
-        
-        # Calcular novo nível
-        new_level = calculate_level_from_xp(db[uid]["xp"])
-        db[uid]["level"] = new_level
-        
-        # Atualizar progresso de missões
-        update_missao_progresso(db, uid, "mensagens", 1)
-        
-        bot.save_db(db)
+    # Ganhar XP aleatória (1-5 XP) com cooldown de 30s; o ganho fica em memória
+    # e é aplicado no banco em lote pelo commit_xp
+    message_xp.registrar(message.author.id, random.randint(1, 5))
     
     await bot.process_commands(message)
 
 
-def calculate_level_from_xp(xp: int) -> int:
-    """Calcula o nível baseado na XP"""
-    level = 1
-    required_xp = 100
-    current_xp = xp
-    
-    while current_xp >= required_xp:
-        current_xp -= required_xp
-        level += 1
-        required_xp = int(required_xp * 1.5)
-    
-    return level
-
-
 def update_missao_progresso(db: dict, uid: str, tipo: str, quantidade: int = 1):
     """Atualiza o progresso de missões"""
     missoes = db[uid].get("missoes", [])
@@ -624,140 +587,239 @@ async def on_voice_state_update(member, before, after):
     if getattr(member, "bot", False):
         return
 
+    # Agregados por canal: troca de canal também encerra o trecho no canal anterior
+    if before.channel != after.channel:
+        agora_ts = int(time.time())
+        if before.channel:
+            voice_analytics.sair(member.id, agora_ts)
+        if after.channel:
+            voice_analytics.entrar(member.id, after.channel.guild.id, after.channel.id, agora_ts)
+
     joined_channel = after.channel and not before.channel
     left_channel = before.channel and not after.channel
 
     if joined_channel:
+        agora = datetime.datetime.now()
         bot.active_users.add(member.id)
-        bot.call_times[member.id] = datetime.datetime.now()
+        bot.call_times[member.id] = agora
+        voice_sessions.abrir(member.id, agora.timestamp())
         return
 
     if left_channel:
         bot.active_users.discard(member.id)
-        start = bot.call_times.pop(member.id, None)
-        if start is None:
-            return
+        bot.call_times.pop(member.id, None)
+        # O diário registra o crédito; o top_tempo vai para o disco no checkpoint
+        elapsed = voice_sessions.fechar(member.id, time.time())
+        credit_call_time({member.id: elapsed})
+
 
-        delta = datetime.datetime.now() - start
-        elapsed = int(delta.total_seconds())
+def credit_call_time(creditos: dict[int, int]) -> None:
+    """Soma tempo de call no top_tempo residente (as missões recebem pelos rankings por período)"""
+    db = top_tempo_store.load()
+    for user_id, elapsed in creditos.items():
         if elapsed <= 0:
-            return
+            continue
+        uid = str(user_id)
+        record = db.get(uid)
+        if record is None:
+            record = db[uid] = TOP_TEMPO.novo()
+        record["tempo_total"] = record.get("tempo_total", 0) + elapsed
+        top_tempo_store.mark_dirty(uid)
+        bot.rankings.update("tempo", uid, record["tempo_total"])
+        bot.janelas.add("tempo", uid, elapsed)
+
+
+def checkpoint_voice_sessions() -> None:
+    """Credita as calls em andamento, grava o top_tempo e compacta o diário"""
+    agora = time.time()
+    credit_call_time(voice_sessions.creditar_abertas(agora))
+    ate = voice_sessions.posicao()
+    gravou = top_tempo_store.flush()
+    if gravou:
+        # Os créditos do diário até aqui já estão no top_tempo em disco
+        voice_sessions.gravado(ate)
+    if gravou or voice_sessions.sessoes():
+        voice_sessions.compactar()
+    voice_analytics.checkpoint(int(agora))
+    voice_analytics.flush()
+
+
+async def checkpoint_voice_sessions_async() -> None:
+    """Como `checkpoint_voice_sessions`, com o top_tempo gravado no pool de I/O"""
+    agora = time.time()
+    credit_call_time(voice_sessions.creditar_abertas(agora))
+    # O retrato do top_tempo é tirado já na chamada: inclui os créditos até `ate`
+    ate = voice_sessions.posicao()
+    gravou = await top_tempo_store.flush_async()
+    if gravou:
+        voice_sessions.gravado(ate)
+    # O diário só é compactado com o top_tempo no disco; se algum crédito entrou
+    # durante a gravação, o registro dele no diário fica para o próximo checkpoint
+    if (gravou or voice_sessions.sessoes()) and not top_tempo_store.dirty:
+        await voice_sessions.compactar_async()
+    voice_analytics.checkpoint(int(agora))
+    await voice_analytics.flush_async()
+
+
+def reconcile_voice_sessions() -> None:
+    """Confere as sessões do diário com quem está de fato nas calls"""
+    agora = time.time()
+    presentes = {}
+    for guild in bot.guilds:
+        for channel in guild.voice_channels:
+            for member in channel.members:
+                if not member.bot:
+                    presentes[member.id] = channel
+    # Sem compactar aqui: os créditos de quem saiu com o bot fora ficam no
+    # diário até o próximo checkpoint gravar o top_tempo
+    credit_call_time(voice_sessions.reconcile(presentes, agora))
+    for user_id, channel in presentes.items():
+        voice_analytics.entrar(user_id, channel.guild.id, channel.id, int(agora))
+    bot.active_users.clear()
+    bot.call_times.clear()
+    for user_id, inicio in voice_sessions.sessoes().items():
+        bot.active_users.add(user_id)
+        bot.call_times[user_id] = datetime.datetime.fromtimestamp(inicio)
+
+
+@tasks.loop(seconds=VOICE_CHECKPOINT_INTERVAL)
+async def voice_checkpoint():
+    try:
+        await checkpoint_voice_sessions_async()
+    except Exception as e:
+        print(f"❌ Erro no checkpoint das calls: {e}")
 
-        db, uid = ensure_top_tempo_record(member.id)
-        db[uid]["tempo_total"] = db[uid].get("tempo_total", 0) + elapsed
-        save_top_tempo_db(db)
-        
-        # Atualizar progresso de missão de call (no banco de economia)
-        economia_db = load_economia_db()
-        # Garantir que o usuário exista no banco de economia antes de atualizar missões
-        if uid not in economia_db:
-            economia_db[uid] = {
-                "soul": 0,
-                "xp": 0,
-                "level": 1,
-                "last_daily": None,
-                "last_mine": None,
-                "mine_streak": 0,
-                "daily_streak": 0,
-                "last_caca": None,
-                "caca_streak": 0,
-                "caca_longa_ativa": None,
-                "missoes": [],
-                "missoes_completas": []
-            }
-
-        update_missao_progresso(economia_db, uid, "call", elapsed)
-        save_economia_db(economia_db)
 
+def rebuild_rankings() -> None:
+    """Monta os índices de ranking a partir dos bancos (uma vez, na inicialização)"""
+    # Ids que o cache de identidades já sabe que são bots ficam fora dos rankings
+    def humano(uid: str) -> bool:
+        return uid.isdigit() and not bot.identities.is_known_bot(uid)
 
-@bot.event
-async def setup_hook():
-    import importlib
+    bot.rankings.rebuild("soul", {uid: saldo for uid, saldo in bot.ledger.saldos().items() if humano(uid)})
+    db = {uid: data for uid, data in bot.db().items() if humano(uid)}
+    bot.rankings.rebuild("level", {uid: (data.get("level", 1), data.get("xp", 0)) for uid, data in db.items()})
 
-    # Carregar cog economia
-    try:
-        economia = importlib.import_module("cogs.economia")
-        await economia.setup(bot)
-    except Exception as e:
-        print(f"Erro ao carregar cog economia: {e}")
+    top_tempo = top_tempo_store.load()
+    bot.rankings.rebuild("tempo", {uid: data.get("tempo_total", 0) for uid, data in top_tempo.items() if humano(uid)})
 
-    # Carregar mod
-    try:
-        mod = importlib.import_module("cogs.mod")
-        await mod.setup(bot)
-    except Exception as e:
-        print(f"Erro ao carregar cog mod: {e}")
 
-    # ==============================
-    # NOVO: carregar painel.py
-    # ==============================
-    try:
-        painel = importlib.import_module("cogs.painel")
-        await painel.setup(bot)
-        print("Painel carregado com sucesso!")
-    except Exception as e:
-        print(f"Erro ao carregar cog painel: {e}")
+def migrar_saldos() -> None:
+    """Leva para o livro-razão as almas que ficavam em três bancos
 
-    # Carregar casamento
-    try:
-        casamento = importlib.import_module("cogs.casamento")
-        await casamento.setup(bot)
-        print("Casamento carregado com sucesso!")
-    except Exception as e:
-        print(f"Erro ao carregar cog casamento: {e}")
+    Soma o `soul` do db.json, as `almas` do inventário e o `soul` das linhas de
+    usuário que o RPG e as missões de call gravavam no economia.json, e tira
+    esses campos dos bancos. As linhas de usuário saem do economia.json, que
+    volta a ter só o catálogo.
 
-    # Carregar frase
-    try:
-        frase = importlib.import_module("cogs.frase")
-        await frase.setup(bot)
-        print("Frase carregado com sucesso!")
-    except Exception as e:
-        print(f"Erro ao carregar cog frase: {e}")
+    Roda a cada inicialização, mas cada usuário é migrado uma vez só: o
+    crédito leva o marco `migracao:<uid>` no livro-razão e, com o marco já
+    lançado, o saldo antigo que ainda estiver num banco (uma queda antes de
+    gravar os bancos, um backup restaurado) só é retirado, sem crédito.
+    """
+    saldos: dict[str, int] = {}
 
-    # Carregar RPG Combate
-    try:
-        rpg_combate = importlib.import_module("cogs.rpg_combate")
-        await rpg_combate.setup(bot)
-        print("RPG Combate carregado com sucesso!")
-    except Exception as e:
-        print(f"Erro ao carregar cog RPG Combate: {e}")
+    db = bot.db()
+    for uid, data in db.items():
+        if isinstance(data, Record) and "soul" in data:
+            saldos[uid] = saldos.get(uid, 0) + (data.pop("soul") or 0)
+            db_store.mark_dirty(uid)
+
+    for uid, almas in bot.inventarios.extrair_almas().items():
+        saldos[uid] = saldos.get(uid, 0) + almas
+
+    economia = load_economia_db()
+    legados = [uid for uid in economia if uid.isdigit()]
+    for uid in legados:
+        saldos[uid] = saldos.get(uid, 0) + (economia.pop(uid).get("soul") or 0)
+
+    creditados = 0
+    for uid, saldo in saldos.items():
+        marco = f"migracao:{uid}"
+        if saldo > 0 and not bot.ledger.marco(marco):
+            bot.ledger.creditar(uid, saldo, "migracao", marco=(marco, 1))
+            creditados += 1
+    if creditados:
+        bot.ledger.flush()
+        print(f"🔧 Saldos antigos de {creditados} usuários levados para o livro-razão")
+    db_store.flush()
+    bot.inventarios.flush()
+    if legados:
+        save_economia_db(economia)
 
-    # Carregar Stay Voice
-    try:
-        stay_voice = importlib.import_module("cogs.stay_voice")
-        await stay_voice.setup(bot)
-        print("Stay Voice carregado com sucesso!")
-    except Exception as e:
-        print(f"Erro ao carregar cog Stay Voice: {e}")
 
-    # Carregar Loja
-    try:
-        loja = importlib.import_module("cogs.loja")
-        await loja.setup(bot)
-        print("🏪 Loja carregada com sucesso!")
-    except Exception as e:
-        print(f"Erro ao carregar cog Loja: {e}")
+def migrar_esquemas() -> None:
+    """Leva todos os registros à versão atual do esquema (em lote, na inicialização)
 
-    # Carregar Inventário
-    try:
-        inventario = importlib.import_module("cogs.inventario")
-        await inventario.setup(bot)
-        print("📦 Inventário carregado com sucesso!")
-    except Exception as e:
-        print(f"Erro ao carregar cog Inventário: {e}")
+    Só os registros que mudaram são marcados para gravação; se nenhum mudou,
+    nada é gravado.
+    """
+    colecoes = (
+        (ECONOMIA, db_store.load(), db_store),
+        (PERFIL, perfil_store.load(), perfil_store),
+        (TOP_TEMPO, top_tempo_store.load(), top_tempo_store),
+    )
+    for esquema, registros, store in colecoes:
+        alterados = esquema.migrar_todos(registros)
+        if alterados:
+            store.mark_dirty(*alterados)
+            store.flush()
+            print(f"🔧 {len(alterados)} registros de {esquema.nome} migrados para a versão {esquema.versao}")
+    bot.inventarios.migrar()
+
+
+def carregar_cooldowns() -> None:
+    """Refaz a tabela de cooldowns a partir das datas gravadas nos registros"""
+    bot.cooldowns.carregar(db_store.load())
+
+
+# Cogs carregados na inicialização
+COGS = (
+    CogSpec("cogs.economia", "Economia"),
+    CogSpec("cogs.mod", "Mod"),
+    CogSpec("cogs.painel", "Painel"),
+    CogSpec("cogs.casamento", "Casamento", paralelo=False),
+    CogSpec("cogs.frase", "Frase", paralelo=False),
+    CogSpec("cogs.rpg_combate", "RPG Combate"),
+    CogSpec("cogs.stay_voice", "Stay Voice"),
+    CogSpec("cogs.call_tempo", "Timer de Call"),
+    CogSpec("cogs.loja", "Loja"),
+    CogSpec("cogs.inventario", "Inventário"),
+    CogSpec("cogs.help", "Help"),
+)
 
-    # Carregar Help
-    try:
-        help_cog = importlib.import_module("cogs.help")
-        await help_cog.setup(bot)
-        print("📚 Help carregado com sucesso!")
-    except Exception as e:
-        print(f"Erro ao carregar cog Help: {e}")
+
+@bot.event
+async def setup_hook():
+    migrar_saldos()
+    migrar_esquemas()
+    # Créditos de call registrados no diário mas não gravados antes da última queda
+    credit_call_time(voice_sessions.recover())
+    # Créditos do mercado que não chegaram aos inventários antes da última queda
+    await bot.mercado.liquidar_pendentes()
+    rebuild_rankings()
+
+    await carregar_cogs(bot, COGS)
+    # Depois dos cogs, que registram as ações de cooldown da economia
+    carregar_cooldowns()
 
     update_status.start()
+    commit_xp.start()
+    flush_db.start()
+    voice_checkpoint.start()
+    # Handlers já registrados pelos cogs: retoma as ações pendentes do diário
+    bot.agendamentos.start()
+
+    # SIGTERM (reinício da Square Cloud) fecha o bot normalmente para gravar o banco
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, lambda: asyncio.create_task(bot.close())
+        )
+    except (NotImplementedError, RuntimeError):
+        pass
     
-    # Sincronizar comandos
-    await bot.tree.sync()
+    # Sincronizar comandos (só quando mudaram desde a última vez)
+    await sincronizar_comandos(bot, COMANDOS_PATH, forcar=FORCE_COMMAND_SYNC)
 
 async def main():
     await bot.start(TOKEN)
@@ -765,5 +827,69 @@ async def main():
 @bot.event
 async def on_ready():
     print(f"✅ Bot conectado como {bot.user} (ID: {bot.user.id})")
+    # Membros já vieram no chunk inicial: aquece o cache de identidades
+    for guild in bot.guilds:
+        bot.identities.warm(guild.members)
+        for member in guild.members:
+            if member.bot:
+                bot.rankings.discard(member.id)
+                bot.janelas.discard(member.id)
+    # on_ready roda de novo a cada reconexão; as sessões recuperadas do diário
+    # só fazem sentido conferir uma vez, logo após iniciar
+    if not getattr(bot, "_sessoes_conferidas", False):
+        bot._sessoes_conferidas = True
+        reconcile_voice_sessions()
+
+
+@bot.event
+async def on_member_join(member):
+    bot.identities.remember(member)
+    if member.bot:
+        bot.rankings.discard(member.id)
+        bot.janelas.discard(member.id)
+
+
+@bot.event
+async def on_member_update(before, after):
+    if before.display_name != after.display_name:
+        bot.identities.remember(after)
 
-bot.run(TOKEN)
\ No newline at end of file
+
+@bot.event
+async def on_user_update(before, after):
+    if before.name != after.name or before.display_name != after.display_name:
+        bot.identities.remember(after)
+
+def gravar_pendentes() -> None:
+    """Grava as alterações pendentes ao desligar
+
+    Antes, espera as gravações que ainda estejam no pool de I/O. Cada etapa
+    roda mesmo que uma anterior falhe, e o livro-razão é sempre fechado (com o
+    retrato dos saldos gravado).
+    """
+    etapas = (
+        encerrar_io,
+        commit_message_xp,
+        db_store.flush,
+        perfil_store.flush,
+        bot.inventarios.flush,
+        checkpoint_voice_sessions,
+        voice_sessions.close,
+        lambda: voice_analytics.flush(force=True),
+        bot.janelas.flush,
+        bot.identities.flush,
+        bot.agendamentos.flush,
+        bot.mercado.close,
+        bot.ledger.close,
+    )
+    for etapa in etapas:
+        try:
+            etapa()
+        except Exception as e:
+            print(f"❌ Erro ao gravar dados no desligamento: {e}")
+
+
+try:
+    bot.run(TOKEN)
+finally:
+    gravar_pendentes()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import time
+
+from core.agendador import DeadlineScheduler, PersistentScheduler
+
+
+def test_callback_lento_nao_atrasa_os_seguintes():
+    async def cenario():
+        concluidos = []
+
+        async def callback(chave, _dados):
+            if chave == "lento":
+                await asyncio.sleep(0.3)
+            concluidos.append(chave)
+
+        agendador = DeadlineScheduler(callback)
+        agora = time.time()
+        agendador.schedule("lento", agora)
+        agendador.schedule("rapido", agora + 0.02)
+        agendador.schedule("cancelado", agora + 0.01)
+        agendador.cancel("cancelado")
+        agendador.start()
+        await asyncio.sleep(0.1)
+        assert concluidos == ["rapido"]
+        await asyncio.sleep(0.3)
+        assert concluidos == ["rapido", "lento"]
+        agendador.stop()
+
+    asyncio.run(cenario())
+
+
+def test_acao_nao_concluida_continua_no_diario(tmp_path):
+    path = tmp_path / "agendamentos.json"
+
+    async def cenario():
+        tentativas = []
+
+        async def handler(member_id):
+            tentativas.append(member_id)
+            return len(tentativas) >= 2
+
+        agendador = PersistentScheduler(path)
+        agendador.REPETIR = 0.05
+        agendador.register("desmutar", handler)
+        await agendador.schedule("desmutar:1", "desmutar", time.time(), member_id=1)
+        assert "desmutar:1" in json.loads(path.read_text())
+        agendador.start()
+        await asyncio.sleep(0.02)
+        assert len(agendador) == 1
+        assert json.loads(path.read_text())["desmutar:1"]["tentativas"] == 1
+        await asyncio.sleep(0.1)
+        assert tentativas == [1, 1]
+        assert len(agendador) == 0
+        agendador.stop()
+
+    asyncio.run(cenario())
+    assert json.loads(path.read_text()) == {}
+
+
+def test_tipo_sem_handler_sai_do_diario(tmp_path):
+    path = tmp_path / "agendamentos.json"
+
+    async def cenario():
+        agendador = PersistentScheduler(path)
+        await agendador.schedule("desmutar_cargo:1", "desmutar_cargo", time.time(), member_id=1)
+        agendador.start()
+        await asyncio.sleep(0.05)
+        assert len(agendador) == 0
+        agendador.stop()
+
+    asyncio.run(cenario())
+    assert json.loads(path.read_text()) == {}
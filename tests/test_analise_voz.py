@@ -0,0 +1,19 @@
+from core.analise_voz import VoiceAnalytics
+
+
+def test_consulta_inclui_quem_esta_em_call_sem_creditar(tmp_path):
+    analise = VoiceAnalytics(tmp_path / "analise_voz.json")
+    hora = 1000 * 3600
+    analise.entrar(1, 10, 100, hora)
+    analise.entrar(2, 10, 200, hora)
+    analise.sair(2, hora + 60)
+
+    assert analise.top("canal", "dia", agora=hora + 600) == [(100, 600), (200, 60)]
+    assert analise.total("servidor", 10, "dia", agora=hora + 600) == 660
+    # Nada foi creditado: sem `agora`, só o que já estava nas séries
+    assert analise.top("canal", "dia") == [(200, 60)]
+    assert analise.total("canal", 100, "semana") == 0
+
+    analise.checkpoint(hora + 600)
+    assert analise.total("canal", 100, "semana") == 600
+    assert analise.top("canal", "dia", agora=hora + 600) == [(100, 600), (200, 60)]
@@ -0,0 +1,48 @@
+import asyncio
+
+from core.concorrencia import UserLocks
+
+
+def test_versao_so_muda_com_alteracao_gravada():
+    async def cenario():
+        locks = UserLocks()
+        versao = locks.versao("1")
+        async with locks.hold("1"):
+            pass
+        assert not locks.mudou("1", versao)
+        async with locks.hold("1", "2"):
+            locks.alterado("1")
+        assert locks.mudou("1", versao)
+        assert not locks.mudou("2", 0)
+
+    asyncio.run(cenario())
+
+
+def test_lock_e_descartado_quando_ninguem_usa():
+    async def cenario():
+        locks = UserLocks()
+        ordem = []
+
+        async def segurar(nome, espera):
+            async with locks.hold("1"):
+                ordem.append(nome)
+                await asyncio.sleep(espera)
+
+        primeiro = asyncio.create_task(segurar("a", 0.02))
+        await asyncio.sleep(0)
+        segundo = asyncio.create_task(segurar("b", 0))
+        await asyncio.sleep(0.01)
+        # Um segura e outro espera: o mesmo lock para os dois
+        assert len(locks) == 1
+        await asyncio.gather(primeiro, segundo)
+        assert ordem == ["a", "b"]
+        assert len(locks) == 0
+
+        espera = asyncio.create_task(segurar("c", 0))
+        async with locks.hold("1"):
+            await asyncio.sleep(0)
+        espera.cancel()
+        await asyncio.gather(espera, return_exceptions=True)
+        assert len(locks) == 0
+
+    asyncio.run(cenario())
@@ -0,0 +1,59 @@
+import datetime
+
+from core.esquemas import ECONOMIA, INVENTARIO, PERFIL
+from core.registros import VERSAO, EconomyRecord, InventoryRecord, decode_colecao, encode_colecao
+
+
+def test_migra_registro_antigo_ate_a_versao_atual():
+    data = datetime.datetime(2024, 5, 13, 12, 0)
+    registro = {
+        "xp": 50,
+        "sobre": "oi",
+        "tempo_total": 10,
+        "last_daily": data.isoformat(),
+        "caca_longa_ativa": {"inicio": data.isoformat(), "fim": data.isoformat(), "channel_id": 1},
+    }
+    assert ECONOMIA.migrar(registro)
+    assert registro[VERSAO] == ECONOMIA.versao
+    assert "sobre" not in registro and "tempo_total" not in registro
+    assert registro["last_daily"] == int(data.timestamp())
+    assert registro["caca_longa_ativa"]["fim"] == int(data.timestamp())
+    assert registro["xp"] == 50
+    # Já na versão atual: nada muda
+    assert not ECONOMIA.migrar(registro)
+
+
+def test_migrar_todos_devolve_so_os_alterados():
+    registros = {
+        "1": {"tempo_total": 5},
+        "2": PERFIL.novo(sobre="x"),
+        "meta": "não é registro",
+    }
+    assert PERFIL.migrar_todos(registros) == ["1"]
+    assert registros["1"] == {VERSAO: PERFIL.versao}
+
+
+def test_view_nao_cria_registro():
+    colecao = {}
+    registro = ECONOMIA.view(colecao.get("1"))
+    assert registro["level"] == 1 and registro["missoes"] == []
+    assert colecao == {}
+    assert ECONOMIA.novo()[VERSAO] == ECONOMIA.versao
+
+
+def test_json_esparso_preserva_chaves_desconhecidas():
+    registro = EconomyRecord.from_json({VERSAO: 2, "xp": 10, "campo_novo": [1]})
+    assert registro.to_json() == {VERSAO: 2, "xp": 10, "campo_novo": [1]}
+    assert EconomyRecord().to_json() == {}
+    # Padrões mutáveis não são compartilhados entre registros
+    outro = EconomyRecord()
+    registro["missoes"].append("m")
+    assert outro["missoes"] == []
+
+
+def test_colecao_ida_e_volta():
+    colecao = {"1": {"itens": {"pocao": 2}, "almas": 5}}
+    registros = decode_colecao(InventoryRecord, colecao)
+    assert registros["1"]["itens"] == {"pocao": 2}
+    assert INVENTARIO.migrar_todos(registros) == ["1"]
+    assert encode_colecao(registros) == {"1": {VERSAO: 1, "itens": {"pocao": 2}, "almas": 5}}
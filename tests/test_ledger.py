@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from core.ledger import Ledger
+
+
+def _ledger(tmp_path):
+    return Ledger(tmp_path / "ledger.jsonl", tmp_path / "saldos.json")
+
+
+def test_lancamentos_e_saldos(tmp_path):
+    ledger = _ledger(tmp_path)
+    assert ledger.creditar("a", 100, "daily") == 100
+    assert not ledger.debitar("a", 150, "loja")
+    assert ledger.debitar("a", 30, "loja")
+    assert ledger.transferir("a", "b", 20, "pix")
+    assert not ledger.transferir("a", "a", 10, "pix")
+    assert ledger.saldos() == {"a": 50, "b": 20}
+    assert len(ledger) == 4
+
+
+def test_retrato_e_releitura_so_do_que_veio_depois(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.creditar("a", 100, "daily")
+    ledger.creditar("b", 40, "daily")
+    ledger.flush()
+    retrato = json.loads((tmp_path / "saldos.json").read_text())
+    assert retrato["saldos"] == {"a": 100, "b": 40}
+    assert retrato["offset"] == (tmp_path / "ledger.jsonl").stat().st_size
+
+    ledger.debitar("a", 25, "loja")
+    ledger._arquivo.close()
+    # Sem close(): o retrato ficou para trás e o resto sai do diário
+    relido = _ledger(tmp_path)
+    assert relido.saldos() == {"a": 75, "b": 40}
+    assert len(relido) == 3
+
+
+def test_retrato_gravado_no_pool(tmp_path):
+    async def cenario():
+        ledger = _ledger(tmp_path)
+        ledger.creditar("a", 10, "daily")
+        await ledger.flush_async()
+        ledger.creditar("a", 5, "daily")
+        ledger.close()
+
+    asyncio.run(cenario())
+    assert _ledger(tmp_path).saldo("a") == 15
+
+
+def test_retrato_de_outro_diario_refaz_do_comeco(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.creditar("a", 10, "daily")
+    ledger.close()
+    (tmp_path / "saldos.json").write_text(json.dumps({"offset": 10 ** 6, "seq": 99, "saldos": {"a": 999}}))
+    relido = _ledger(tmp_path)
+    assert relido.saldos() == {"a": 10}
+    assert len(relido) == 1
+
+
+def test_linha_cortada_numa_queda_e_descartada(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.creditar("a", 10, "daily")
+    ledger.close()
+    with (tmp_path / "ledger.jsonl").open("ab") as fp:
+        fp.write(b'{"seq":2,"uid":"a","del')
+
+    relido = _ledger(tmp_path)
+    assert relido.saldo("a") == 10
+    relido.creditar("a", 5, "daily")
+    relido.close()
+    assert _ledger(tmp_path).saldo("a") == 15
+
+
+def test_marcos_sobrevivem_ao_reinicio(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.creditar("a", 10, "mercado", marco=("credito:a", 3))
+    ledger.creditar("a", 10, "mercado", marco=("credito:a", 2))
+    assert ledger.marco("credito:a") == 3
+    ledger._arquivo.close()
+    # Pelo diário
+    assert _ledger(tmp_path).marco("credito:a") == 3
+
+    ledger = _ledger(tmp_path)
+    ledger.close()
+    # Pelo retrato
+    assert _ledger(tmp_path).marco("credito:a") == 3
+    assert _ledger(tmp_path).marco("outra") == 0
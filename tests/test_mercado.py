@@ -0,0 +1,231 @@
+import asyncio
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+from core import mercado as mercado_mod
+from core import sqlite_backend
+from core.inventarios import InventoryService
+from core.ledger import Ledger
+from core.mercado import CUSTODIA, Market
+
+TAXA = 0.05
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_backend, "get_backend", lambda: None)
+    monkeypatch.setitem(sqlite_backend.COLECOES, "inventario", (tmp_path / "inventario.json", "usuarios"))
+    catalogo = SimpleNamespace(configuracoes={"taxa_imposto_mercado": TAXA})
+    monkeypatch.setattr(mercado_mod, "get_catalog", lambda: catalogo)
+
+    def montar():
+        """(mercado, inventários, livro-razão) lidos do disco, como num boot"""
+        ledger = Ledger(tmp_path / "ledger.jsonl", tmp_path / "saldos.json")
+        inventarios = InventoryService(ledger)
+        return Market(tmp_path / "mercado.json", inventarios), inventarios, ledger
+
+    return tmp_path, montar
+
+
+async def _dar(inventarios, uid, almas=0, **itens):
+    async with inventarios.transaction(uid, "teste") as tx:
+        if almas:
+            tx.add_almas(almas)
+        for item, quantidade in itens.items():
+            tx.add_item(item, quantidade)
+
+
+def test_cruza_por_preco_e_chegada_com_taxa(ambiente):
+    _, montar = ambiente
+
+    async def cenario():
+        mercado, inventarios, ledger = montar()
+        await _dar(inventarios, "a", espada=2)
+        await _dar(inventarios, "b", espada=1)
+        await _dar(inventarios, "c", almas=1000)
+
+        await mercado.colocar("a", "espada", "venda", 100, 2)
+        await mercado.colocar("b", "espada", "venda", 90, 1)
+        _, negocios = await mercado.colocar("c", "espada", "compra", 120, 3)
+
+        # Melhor preço primeiro, sempre pelo preço da ordem que estava no livro
+        assert [(n["vendedor"], n["preco"], n["quantidade"]) for n in negocios] == [("b", 90, 1), ("a", 100, 2)]
+        assert [n["imposto"] for n in negocios] == [int(90 * TAXA), int(200 * TAXA)]
+        assert ledger.saldo("b") == 90 - int(90 * TAXA)
+        assert ledger.saldo("a") == 200 - int(200 * TAXA)
+        # A diferença entre o preço da compra e o executado volta ao comprador
+        assert ledger.saldo("c") == 1000 - 290
+        assert inventarios.get("c")["itens"] == {"espada": 3}
+        assert inventarios.get("a")["itens"] == {}
+        assert mercado.melhor("espada", "venda") is None
+        assert mercado.melhor("espada", "compra") is None
+
+    asyncio.run(cenario())
+
+
+def test_mesmo_preco_respeita_ordem_de_chegada(ambiente):
+    _, montar = ambiente
+
+    async def cenario():
+        mercado, inventarios, _ = montar()
+        await _dar(inventarios, "a", pocao=1)
+        await _dar(inventarios, "b", pocao=1)
+        await _dar(inventarios, "c", almas=100)
+
+        await mercado.colocar("a", "pocao", "venda", 50, 1)
+        await mercado.colocar("b", "pocao", "venda", 50, 1)
+        _, negocios = await mercado.colocar("c", "pocao", "compra", 50, 1)
+
+        assert negocios[0]["vendedor"] == "a"
+        assert mercado.melhor("pocao", "venda")["usuario"] == "b"
+
+    asyncio.run(cenario())
+
+
+def test_sobra_fica_no_livro_e_cancelar_devolve_custodia(ambiente):
+    _, montar = ambiente
+
+    async def cenario():
+        mercado, inventarios, ledger = montar()
+        await _dar(inventarios, "a", pocao=1)
+        await _dar(inventarios, "c", almas=500)
+
+        await mercado.colocar("a", "pocao", "venda", 40, 1)
+        ordem, negocios = await mercado.colocar("c", "pocao", "compra", 60, 5)
+        assert len(negocios) == 1
+        assert ordem["restante"] == 4
+        assert mercado.profundidade("pocao", "compra") == [(60, 4)]
+        # 5 x 60 em custódia, 20 de volta pela diferença de preço
+        assert ledger.saldo("c") == 500 - 300 + 20
+
+        await mercado.cancelar("c", ordem["id"])
+        assert ledger.saldo("c") == 500 - 40
+        assert mercado.profundidade("pocao", "compra") == []
+
+    asyncio.run(cenario())
+
+
+def test_sem_saldo_nao_abre_ordem(ambiente):
+    _, montar = ambiente
+
+    async def cenario():
+        mercado, inventarios, ledger = montar()
+        await _dar(inventarios, "c", almas=10)
+        assert await mercado.colocar("c", "pocao", "compra", 60, 1) is None
+        assert await mercado.colocar("c", "pocao", "venda", 60, 1) is None
+        assert ledger.saldo("c") == 10
+        assert mercado.ordens_do_usuario("c") == []
+
+    asyncio.run(cenario())
+
+
+def test_ordem_contra_a_propria_cancela_a_antiga(ambiente):
+    _, montar = ambiente
+
+    async def cenario():
+        mercado, inventarios, ledger = montar()
+        await _dar(inventarios, "a", almas=100, pocao=1)
+        antiga, _ = await mercado.colocar("a", "pocao", "venda", 50, 1)
+        _, negocios = await mercado.colocar("a", "pocao", "compra", 60, 1)
+
+        assert negocios == []
+        assert mercado.ordem(antiga["id"]) is None
+        assert inventarios.get("a")["itens"] == {"pocao": 1}
+        assert ledger.saldo("a") == 100 - 60
+
+    asyncio.run(cenario())
+
+
+def test_credito_entregue_nao_e_entregue_de_novo(ambiente):
+    tmp_path, montar = ambiente
+    diario = tmp_path / "mercado.jsonl"
+
+    async def cenario():
+        mercado, _, ledger = montar()
+        mercado._creditar("a", almas=70, itens={"pocao": 2})
+        mercado._gravar()
+        shutil.copy(diario, tmp_path / "antes.jsonl")
+        await mercado._liquidar()
+        assert ledger.saldo("a") == 70
+        ledger.close()
+
+        # Queda antes de o mercado registrar a entrega: o crédito volta como pendente
+        shutil.copy(tmp_path / "antes.jsonl", diario)
+        mercado, inventarios, ledger = montar()
+        await mercado.liquidar_pendentes()
+        assert ledger.saldo("a") == 70
+        assert inventarios.get("a")["itens"] == {"pocao": 2}
+        assert mercado._pendentes == {}
+
+    asyncio.run(cenario())
+
+
+def test_reserva_com_custodia_aplicada_vira_ordem(ambiente):
+    _, montar = ambiente
+
+    async def cenario():
+        mercado, inventarios, ledger = montar()
+        await _dar(inventarios, "a", pocao=3)
+        await _dar(inventarios, "b", almas=100)
+        aplicada = {"id": 1, "usuario": "a", "item": "pocao", "lado": "venda",
+                    "preco": 10, "quantidade": 3, "restante": 3, "criada": 0}
+        perdida = {"id": 2, "usuario": "b", "item": "pocao", "lado": "compra",
+                   "preco": 10, "quantidade": 1, "restante": 1, "criada": 0}
+        mercado._proximo_id = 3
+        mercado._reservas = {"1": aplicada, "2": perdida}
+        mercado._reservas_alteradas.update(mercado._reservas)
+        mercado._gravar()
+        # Queda depois da custódia da ordem 1 e antes da custódia da ordem 2
+        async with inventarios.transaction("a", "mercado_custodia", (CUSTODIA, 1)) as tx:
+            tx.remove_item("pocao", 3)
+        ledger.close()
+
+        mercado, inventarios, ledger = montar()
+        await mercado.liquidar_pendentes()
+        assert mercado.profundidade("pocao", "venda") == [(10, 3)]
+        assert mercado.profundidade("pocao", "compra") == []
+        assert mercado._reservas == {}
+        assert ledger.saldo("b") == 100
+
+    asyncio.run(cenario())
+
+
+def test_diario_reconstroi_o_mercado_e_compacta(ambiente, monkeypatch):
+    tmp_path, montar = ambiente
+    monkeypatch.setattr(mercado_mod, "COMPACTAR_LINHAS", 3)
+
+    async def cenario():
+        mercado, inventarios, ledger = montar()
+        await _dar(inventarios, "a", pocao=5)
+        await _dar(inventarios, "c", almas=500)
+        await mercado.colocar("a", "pocao", "venda", 40, 5)
+        compra, _ = await mercado.colocar("c", "pocao", "compra", 30, 2)
+        await mercado.colocar("c", "pocao", "compra", 40, 2)
+        # Cada operação só acrescenta linhas; o retrato não foi gravado
+        assert not (tmp_path / "mercado.json").exists()
+        ledger.close()
+
+        # Queda: o estado volta só pelo diário
+        mercado, inventarios, ledger = montar()
+        assert mercado.profundidade("pocao", "venda") == [(40, 3)]
+        assert mercado.profundidade("pocao", "compra") == [(30, 2)]
+        assert [n["quantidade"] for n in mercado.historico("pocao")] == [2]
+        assert mercado._pendentes == {}
+
+        await mercado.cancelar("c", compra["id"])
+        await mercado.flush_async()
+        assert (tmp_path / "mercado.jsonl").read_bytes() == b""
+        # Depois da compactação, retrato + linhas novas
+        ordem, _ = await mercado.colocar("c", "pocao", "compra", 10, 1)
+        ledger.close()
+
+        mercado, _, ledger = montar()
+        assert mercado.profundidade("pocao", "venda") == [(40, 3)]
+        assert mercado.profundidade("pocao", "compra") == [(10, 1)]
+        assert mercado.historico("pocao")[0]["preco"] == 40
+        assert ledger.saldo("c") == 500 - 80 - 10
+        assert mercado._proximo_id == ordem["id"] + 1
+
+    asyncio.run(cenario())
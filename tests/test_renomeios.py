@@ -0,0 +1,93 @@
+from core.renomeios import GRANULARIDADES, RenameBudget, TimerLabels, formatar_tempo
+
+CANAL = 1
+
+
+def simular(labels, budget, ate, passo=5, inicio=0, eventos=None):
+    """Reproduz o loop do timer: retorna os (instante, segundos, texto) renomeados"""
+    eventos = eventos or {}
+    renomeios = []
+    for agora in range(inicio, ate, passo):
+        if agora in eventos:
+            eventos[agora]()
+        proximo = labels.proximo(CANAL, inicio, agora)
+        if proximo is None or budget.restante(CANAL, agora) == 0:
+            continue
+        budget.consumir(CANAL, agora)
+        segundos, texto = proximo
+        labels.mostrado(CANAL, segundos, agora)
+        renomeios.append((agora, segundos, texto))
+    return renomeios
+
+
+def test_formatar_tempo():
+    assert formatar_tempo(0) == "0:00"
+    assert formatar_tempo(2700, 900) == "0:45"
+    assert formatar_tempo(7200 + 600, 3600) == "2h"
+
+
+def test_primeiro_renomeio_usa_orcamento_cheio():
+    budget = RenameBudget()
+    labels = TimerLabels(budget)
+    assert labels.proximo(CANAL, 0, 0) == (0, "0:00")
+    assert labels._granularidade(CANAL, 0) == GRANULARIDADES[0]
+
+
+def test_troca_de_granularidade_nao_volta_o_tempo():
+    budget = RenameBudget()
+    labels = TimerLabels(budget)
+    renomeios = simular(labels, budget, ate=6 * 3600)
+
+    mostrados = [segundos for _, segundos, _ in renomeios]
+    assert mostrados == sorted(mostrados)
+    assert len(set(mostrados)) == len(mostrados)
+    # Depois de gastar o orçamento a granularidade engrossa sem o timer recuar
+    assert (0, 0, "0:00") in renomeios
+    assert all(texto != "0:00" for _, _, texto in renomeios[1:])
+
+
+def test_regime_renomeia_a_cada_5_minutos():
+    budget = RenameBudget()
+    labels = TimerLabels(budget)
+    instantes = [agora for agora, _, _ in simular(labels, budget, ate=4 * 3600)]
+    # 2 renomeios a cada 10 minutos sustentam um a cada 5, do começo ao fim
+    assert instantes == list(range(0, 4 * 3600, 300))
+
+
+def test_nao_renomeia_para_valor_menor_depois_de_gastar_orcamento():
+    budget = RenameBudget()
+    labels = TimerLabels(budget)
+    budget.consumir(CANAL, 590)
+    budget.consumir(CANAL, 600)
+    labels.mostrado(CANAL, 600, 600)
+    # Orçamento gasto fora do ritmo: o passo engrossa sem o timer recuar
+    assert labels.proximo(CANAL, 0, 605) is None
+    assert labels.proximo(CANAL, 0, 1800) == (1800, "0:30")
+
+
+def test_429_no_meio_nao_faz_o_timer_recuar():
+    budget = RenameBudget()
+    labels = TimerLabels(budget)
+    eventos = {1800: lambda: budget.esgotar(CANAL, 1800, 1200)}
+    renomeios = simular(labels, budget, ate=4 * 3600, eventos=eventos)
+
+    mostrados = [segundos for _, segundos, _ in renomeios]
+    assert mostrados == sorted(mostrados)
+    assert not any(1800 <= agora < 3000 for agora, _, _ in renomeios)
+
+
+def test_orcamento_respeitado_em_qualquer_janela():
+    budget = RenameBudget()
+    labels = TimerLabels(budget)
+    instantes = [agora for agora, _, _ in simular(labels, budget, ate=8 * 3600)]
+    for i, agora in enumerate(instantes):
+        na_janela = [t for t in instantes[i:] if t < agora + budget.window]
+        assert len(na_janela) <= budget.limit
+
+
+def test_esquecer_recomeca_do_zero():
+    budget = RenameBudget()
+    labels = TimerLabels(budget)
+    labels.mostrado(CANAL, 3600, 3600)
+    labels.esquecer(CANAL)
+    assert labels.proximo(CANAL, 3600, 3600) == (0, "0:00")
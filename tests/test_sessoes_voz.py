@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+from core.sessoes_voz import VoiceSessionJournal
+
+
+def _relido(path):
+    journal = VoiceSessionJournal(path)
+    return journal, journal.recover()
+
+
+def test_creditos_nao_gravados_sao_reaplicados(tmp_path):
+    path = tmp_path / "sessoes.jsonl"
+    journal = VoiceSessionJournal(path)
+    journal.abrir(1, 0)
+    journal.abrir(2, 0)
+    assert journal.fechar(1, 100) == 100
+    journal.close()
+
+    relido, pendentes = _relido(path)
+    assert pendentes == {1: 100}
+    assert relido.sessoes() == {2: 0}
+
+
+def test_marco_gravado_evita_credito_duplo(tmp_path):
+    path = tmp_path / "sessoes.jsonl"
+    journal = VoiceSessionJournal(path)
+    journal.abrir(1, 0)
+    journal.abrir(2, 0)
+    journal.fechar(1, 100)
+    ate = journal.posicao()
+    # Fechou enquanto o top_tempo era gravado: fica fora do marco
+    journal.fechar(2, 150)
+    journal.gravado(ate)
+    journal.close()
+
+    relido, pendentes = _relido(path)
+    assert pendentes == {2: 150}
+    # A numeração continua depois do reinício
+    assert relido.posicao() == 2
+
+
+def test_linhas_sem_numero_ficam_cobertas_pelo_marco(tmp_path):
+    path = tmp_path / "sessoes.jsonl"
+    path.write_text(
+        json.dumps({"ev": "fechar", "uid": 1, "ts": 10, "creditar": 10}) + "\n"
+        + json.dumps({"ev": "gravado", "ate": 0}) + "\n"
+    )
+    assert _relido(path)[1] == {}
+
+
+def test_compactacao_no_pool_preserva_eventos_do_meio(tmp_path):
+    path = tmp_path / "sessoes.jsonl"
+
+    async def cenario():
+        journal = VoiceSessionJournal(path)
+        journal.abrir(1, 0)
+        journal.abrir(2, 0)
+        journal.fechar(2, 50)
+        compactacao = asyncio.create_task(journal.compactar_async())
+        await asyncio.sleep(0)
+        journal.abrir(3, 60)
+        await compactacao
+        journal.close()
+
+    asyncio.run(cenario())
+    relido, pendentes = _relido(path)
+    assert relido.sessoes() == {1: 0, 3: 60}
+    assert pendentes == {}
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from core import sqlite_backend
+from core.store import JsonStore
+
+
+class Gravacoes:
+    """Saver de teste: guarda o que cada gravação recebeu"""
+
+    def __init__(self):
+        self.chamadas = []
+        self.falhar = False
+        self.liberar = threading.Event()
+        self.liberar.set()
+
+    def __call__(self, registros, completo):
+        self.liberar.wait(1)
+        if self.falhar:
+            raise OSError("disco cheio")
+        self.chamadas.append((registros, completo))
+
+
+def test_flush_grava_so_os_registros_marcados():
+    gravacoes = Gravacoes()
+    store = JsonStore(lambda: {"1": {"xp": 1}, "2": {"xp": 2}, "3": {"xp": 3}}, gravacoes)
+    data = store.load()
+    assert store.flush() is False
+
+    data["1"]["xp"] = 10
+    del data["3"]
+    store.mark_dirty("1", "3")
+    assert store.dirty
+    assert store.flush() is True
+    assert gravacoes.chamadas == [({"1": {"xp": 10}, "3": None}, False)]
+    assert not store.dirty
+
+    store.save()
+    store.flush()
+    assert gravacoes.chamadas[-1] == ({"1": {"xp": 10}, "2": {"xp": 2}}, True)
+
+
+def test_saver_recebe_copia():
+    gravacoes = Gravacoes()
+    store = JsonStore(lambda: {"1": {"xp": 1}}, gravacoes)
+    store.load()
+    store.mark_dirty("1")
+    store.flush()
+    store.load()["1"]["xp"] = 2
+    assert gravacoes.chamadas == [({"1": {"xp": 1}}, False)]
+
+
+def test_falha_no_flush_async_mantem_alteracoes_marcadas():
+    gravacoes = Gravacoes()
+    store = JsonStore(lambda: {"1": {}, "2": {}}, gravacoes)
+
+    async def cenario():
+        store.load()
+        store.mark_dirty("1")
+        gravacoes.falhar = True
+        with pytest.raises(OSError):
+            await store.flush_async()
+        assert store.dirty
+
+        store.mark_dirty("2")
+        gravacoes.falhar = False
+        assert await store.flush_async() is True
+        assert gravacoes.chamadas == [({"1": {}, "2": {}}, False)]
+        assert not store.dirty
+
+    asyncio.run(cenario())
+
+
+def test_gravacao_fundida_leva_as_chaves_dos_pedidos_substituidos():
+    gravacoes = Gravacoes()
+    store = JsonStore(lambda: {"1": 1, "2": 2, "3": 3}, gravacoes)
+
+    async def cenario():
+        store.load()
+        gravacoes.liberar.clear()
+        store.mark_dirty("1")
+        primeira = asyncio.create_task(store.flush_async())
+        await asyncio.sleep(0.01)
+        # Enquanto a primeira grava, "2" e "3" entram em pedidos separados:
+        # só o último é executado e precisa levar os dois
+        store.mark_dirty("2")
+        segunda = asyncio.create_task(store.flush_async())
+        await asyncio.sleep(0)
+        store.mark_dirty("3")
+        terceira = asyncio.create_task(store.flush_async())
+        await asyncio.sleep(0)
+        gravacoes.liberar.set()
+        await asyncio.gather(primeira, segunda, terceira)
+
+    asyncio.run(cenario())
+    assert [set(registros) for registros, _ in gravacoes.chamadas] == [{"1"}, {"1", "2", "3"}]
+
+
+def test_gravacao_parcial_do_json(tmp_path, monkeypatch):
+    path = tmp_path / "inventario.json"
+    path.write_text(json.dumps({"versao": 1, "usuarios": {"1": {"a": 1}, "2": {"b": 2}}}))
+    monkeypatch.setattr(sqlite_backend, "get_backend", lambda: None)
+    monkeypatch.setitem(sqlite_backend.COLECOES, "inventario", (path, "usuarios"))
+
+    assert sqlite_backend.load_collection("inventario") == {"1": {"a": 1}, "2": {"b": 2}}
+    sqlite_backend.save_collection("inventario", {"1": None, "3": {"c": 3}}, completo=False)
+    assert json.loads(path.read_text()) == {"versao": 1, "usuarios": {"2": {"b": 2}, "3": {"c": 3}}}
+
+
+def test_sqlite_grava_so_as_linhas_alteradas(tmp_path):
+    backend = sqlite_backend.SQLiteBackend(tmp_path / "exilium.db")
+    try:
+        assert backend.save("db", {"1": {"xp": 1}, "2": {"xp": 2}}) == 2
+        assert backend.save("db", {"1": {"xp": 5}, "3": None}, completo=False) == 1
+        assert backend.save("db", {"2": None}, completo=False) == 1
+        assert backend.load("db") == {"1": {"xp": 5}}
+        # Completa: o que não veio é apagado
+        assert backend.save("db", {"4": {"xp": 4}}) == 2
+        assert backend.load("db") == {"4": {"xp": 4}}
+    finally:
+        backend.close()